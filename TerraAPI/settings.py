@@ -58,7 +58,21 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ),
 }
-REST_FRAMEWORK = { 'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema' }
+REST_FRAMEWORK = {
+    'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
+    # Picked by the Accept / Content-Type headers; JSON stays the default.
+    'DEFAULT_RENDERER_CLASSES': (
+        'api_APP.renderers.ORJSONRenderer',
+        'api_APP.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api_APP.parsers.ORJSONParser',
+        'api_APP.parsers.MessagePackParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+}
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -178,6 +192,76 @@ MEDIA_ROOT = os.path.join(BASE_DIR,"media")
 MEDIA_URL = '/media/'
 DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
 
+# IPFS client (see api_APP/ipfs/client.py)
+IPFS_CLIENT = 'api_APP.ipfs.client.HTTPIPFSClient'
+IPFS_API_URL = 'http://127.0.0.1:5001'
+IPFS_HTTP_POOL_SIZE = 4         # keep-alive connections per worker process
+IPFS_CHUNK_SIZE = 256 * 1024    # bytes read from storage per upload chunk
+IPFS_CID_VERSION = 0            # CID computed at upload time (0 matches plain `ipfs add`)
+IPFS_PINNING_ENABLED = True     # queue uploads for pinning once their CID is known
+
+# IPFS pinning queue (see api_APP/ipfs/pinning.py, run with `manage.py pin_worker`)
+IPFS_PIN_TIMEOUT = 120          # seconds allowed for a single add
+IPFS_PIN_MAX_ATTEMPTS = 8       # attempts before a job is marked failed
+IPFS_PIN_BACKOFF_BASE = 5       # seconds, doubled on every retry
+IPFS_PIN_BACKOFF_MAX = 3600     # upper bound for the retry delay
+IPFS_PIN_LEASE = 600            # seconds before a running job of a dead worker is retried
+
+# Keyset pagination of list endpoints (see api_APP/pagination.py)
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 500
+
+# Conditional GET (see api_APP/conditional.py): clients and proxies may store
+# responses but must revalidate them with If-None-Match before reuse.
+API_CACHE_CONTROL = 'max-age=0, must-revalidate'
+
+# Per-process read-through cache for GET /properties/<ipfs>/ (see api_APP/cache.py)
+PROPERTY_CACHE_SIZE = 1024      # entries kept per worker (LRU eviction)
+PROPERTY_CACHE_TTL = 60         # seconds before an entry is reloaded from the database
+
+# Change feeds for sync clients (see api_APP/endpoints/changes.py)
+CHANGE_FEED_SETTLE_SECONDS = 2          # hold back rows this recent until in-flight transactions commit
+CHANGE_TOMBSTONE_RETENTION_DAYS = 30    # deletions kept for; older since tokens get 410 Gone
+
+# Property and document files (see api_APP/storage.py and api_APP/endpoints/uploads.py)
+CONTENT_STORE_GC_GRACE_MINUTES = 60     # unreferenced blobs are kept this long before gc_blobs deletes them
+UPLOAD_SESSION_TTL_HOURS = 24           # resumable uploads not finalized by then are dropped
+UPLOAD_CHUNK_MAX_BYTES = 16 * 1024 * 1024
+UPLOAD_MAX_LENGTH = 2 * 1024 ** 3
+DIRECT_TRANSFER_URL_EXPIRY_SECONDS = 3600   # lifetime of presigned S3 upload/download URLs
+
+# Protected downloads (see api_APP/downloads.py): with local storage, let the
+# front proxy send the bytes after the permission check.
+MEDIA_ACCEL_HEADER = None               # 'X-Accel-Redirect' (nginx) or 'X-Sendfile' (Apache, lighttpd)
+MEDIA_ACCEL_PREFIX = '/protected-media/'    # internal nginx location aliasing MEDIA_ROOT
+
+# Signature verification (see api_APP/signatures.py)
+SIGNATURE_KEY_CACHE_SIZE = 4096         # parsed public keys kept per process
+# Every web worker process starts its own pool for bulk verification, each
+# process a separate interpreter with Django and cryptography loaded (roughly
+# 55 MB apiece): budget web workers x pool size of them while it is up.
+SIGNATURE_VERIFY_PROCESSES = None       # bulk verification pool size; None = one per CPU, at most 4
+SIGNATURE_VERIFY_POOL_IDLE = 300        # seconds unused before the pool's processes are stopped
+SIGNATURE_VERIFY_INLINE_MAX = 256       # smaller batches are verified without the pool
+SIGNATURE_BULK_VERIFY_MAX = 10000       # signatures per POST /digital-signatures/verify/
+SIGNATURE_BATCH_MAX = 1000              # signatures per POST /digital-signatures/batch/
+
+# Merkle-batched anchoring (see api_APP/anchoring.py, run with `manage.py anchor_batch`)
+ANCHOR_BATCH_MAX_LEAVES = 100000        # documents and signatures per Merkle root
+ANCHOR_PUBLISHER = None                 # dotted path to publish(batch) -> blockchain transaction hash
+ANCHOR_SCAN_CHUNK_SIZE = 5000           # rows checked for unanchored changes per query
+
+# Hash-chained audit log (see api_APP/audit.py, checked with `manage.py verify_audit_log`)
+AUDIT_VERIFY_CHUNK_SIZE = 5000          # events re-hashed per query
+AUDIT_CHECKPOINT_INTERVAL = 100000      # verified events between checkpoints
+
+# Image previews rendered by preview_worker (see api_APP/previews.py)
+PREVIEW_WIDTHS = (160, 480, 1024)       # pixels; never larger than the original
+PREVIEW_FORMAT = 'WEBP'                 # or 'JPEG'; JPEG is used if Pillow lacks WebP
+PREVIEW_QUALITY = 80
+PREVIEW_MAX_ATTEMPTS = 3                # renders of an image whose process died before it is marked failed
+PREVIEW_LEASE = 600                     # seconds before a claim of a worker that died is given up
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -19,7 +19,7 @@ from django.urls import include, re_path
 from django.contrib import admin
 from django.urls import path
 from api_APP import views
-from api_APP.endpoints import digitalsig, login_endpoint,transactions,property,document,nin,login
+from api_APP.endpoints import digitalsig, login_endpoint,transactions,property,document,nin,login,ipfs,export,changes,uploads,direct,ingest,anchors,signing
 from django.conf import settings
 from django.conf.urls.static import static
 from django.urls import re_path
@@ -63,15 +63,37 @@ urlpatterns = [
 
     path('properties/', property.property_list_create, name='property-list-create'),
     path('properties/<str:ipfs>/', property.property_detail_update_delete, name='property-detail'),
+    path('properties/<str:ipfs>/download/', direct.property_document_download, name='property-download'),
+    path('properties/<str:ipfs>/download-url/', direct.property_document_download_url, name='property-download-url'),
 
     path('documents/', document.document_list_create, name='document-list-create'),
     path('documents/<uuid:pk>/', document.document_detail_update_delete, name='document-detail'),
+    path('documents/base64/', ingest.document_ingest_base64, name='document-ingest-base64'),
+    path('documents/<uuid:pk>/anchor-proof/', anchors.anchor_proof, {'kind': 'document'}, name='document-anchor-proof'),
+    path('documents/<uuid:pk>/download/', direct.document_download, name='document-download'),
+    path('documents/<uuid:pk>/download-url/', direct.document_download_url, name='document-download-url'),
 
     path('transactions/', transactions.transaction_list_create, name='transaction-list-create'),
     path('transactions/<uuid:pk>/', transactions.transaction_detail_update_delete, name='transaction-detail'),
+    path('transactions/<uuid:pk>/signing-requirements/', signing.signing_requirement_list_create, name='signingrequirement-list-create'),
+    path('transactions/<uuid:pk>/signing-requirements/<int:requirement_pk>/', signing.signing_requirement_delete, name='signingrequirement-delete'),
+    path('transactions/<uuid:pk>/signing-status/', signing.transaction_signing_status, name='transaction-signing-status'),
 
     path('digital-signatures/', digitalsig.digital_signature_list_create, name='digitalsignature-list-create'),
+    path('digital-signatures/batch/', digitalsig.digital_signature_batch_create, name='digitalsignature-batch-create'),
+    path('digital-signatures/verify/', digitalsig.digital_signature_bulk_verify, name='digitalsignature-bulk-verify'),
     path('digital-signatures/<uuid:pk>/', digitalsig.digital_signature_detail_update_delete, name='digitalsignature-detail'),
+    path('digital-signatures/<uuid:pk>/anchor-proof/', anchors.anchor_proof, {'kind': 'signature'}, name='digitalsignature-anchor-proof'),
+
+    path('ipfs/pin-queue/', ipfs.pin_queue_status, name='ipfs-pin-queue'),
+
+    path('export/<slug:resource>.<slug:fmt>', export.export_resource, name='export'),
+    path('changes/<slug:resource>/', changes.change_feed, name='change-feed'),
+
+    path('uploads/', uploads.upload_session_create, name='upload-session-create'),
+    path('uploads/direct/', direct.direct_upload_create, name='direct-upload-create'),
+    path('uploads/<uuid:pk>/', uploads.upload_session_detail, name='upload-session-detail'),
+    path('uploads/<uuid:pk>/finalize/', uploads.upload_session_finalize, name='upload-session-finalize'),
 
 
     re_path(r'^playground/$', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
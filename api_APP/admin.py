@@ -8,4 +8,13 @@ admin.site.register(UserProfile)
 admin.site.register(Document)
 admin.site.register(Transaction)
 admin.site.register(DigitalSignature)
-admin.site.register(Property)
\ No newline at end of file
+admin.site.register(Property)
+admin.site.register(PinJob)
+admin.site.register(ChangeTombstone)
+admin.site.register(ContentBlob)
+admin.site.register(UploadSession)
+admin.site.register(AnchorBatch)
+admin.site.register(AnchorProof)
+admin.site.register(AuditEvent)
+admin.site.register(AuditCheckpoint)
+admin.site.register(SigningRequirement)
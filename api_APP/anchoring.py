@@ -0,0 +1,202 @@
+"""
+Merkle-batched anchoring of document hashes and signatures.
+
+Instead of one on-chain write per document or signature, ``anchor_batch``
+periodically collects the rows whose current contents are not anchored yet,
+builds a Merkle tree over their leaf hashes and records one ``AnchorBatch``
+root, which the configured ``ANCHOR_PUBLISHER`` writes on chain. Each
+anchored leaf keeps an ``AnchorProof``: its leaf index and the sibling
+hashes up to the root, so inclusion is checked with ``log2(n)`` hashes
+against that single root. A row changed after anchoring (e.g. a re-uploaded
+document) is anchored again, keeping the proofs of its earlier contents.
+
+The tree follows RFC 6962 (Certificate Transparency): leaves are
+``SHA-256(0x00 || data)``, inner nodes ``SHA-256(0x01 || left || right)``,
+and a node without a sibling is carried up a level unchanged, never paired
+with itself. Leaf data is the compact JSON array of the row's anchored
+fields (see ``document_leaf`` and ``signature_leaf``), so anyone holding a
+row can recompute its leaf.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import AnchorBatch, AnchorLock, AnchorProof, DigitalSignature, Document
+
+# Leaves per batch; a proof holds about log2 of this many hashes.
+ANCHOR_BATCH_MAX_LEAVES = getattr(settings, 'ANCHOR_BATCH_MAX_LEAVES', 100000)
+# Rows whose current leaf is checked against their proofs per query.
+ANCHOR_SCAN_CHUNK_SIZE = getattr(settings, 'ANCHOR_SCAN_CHUNK_SIZE', 5000)
+
+
+def _leaf_hash(*fields):
+    data = json.dumps([str(field) for field in fields], separators=(',', ':')).encode()
+    return hashlib.sha256(b'\x00' + data).digest()
+
+
+def _node_hash(left, right):
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+def document_leaf(pk, document_hash):
+    return _leaf_hash('document', pk, document_hash)
+
+
+def signature_leaf(pk, document_hash_at_signing, signature_value, signer_public_key):
+    return _leaf_hash('signature', pk, document_hash_at_signing, signature_value, signer_public_key)
+
+
+def current_leaf(kind, obj):
+    """Leaf hash of ``obj`` as it is now, to compare with the anchored one."""
+    if kind == 'document':
+        return document_leaf(obj.pk, obj.document_hash)
+    return signature_leaf(obj.pk, obj.document_hash_at_signing, obj.signature_value, obj.signer_public_key)
+
+
+def build_tree(leaves):
+    """
+    ``(root, proofs)`` of a Merkle tree over the ``leaves`` (32-byte hashes);
+    ``proofs[i]`` is the concatenated sibling hashes of leaf ``i``.
+    """
+    if not leaves:
+        raise ValueError('a Merkle tree needs at least one leaf')
+    proofs = [bytearray() for _ in leaves]
+    # positions[i]: index of leaf i's ancestor on the current level.
+    positions = list(range(len(leaves)))
+    level = list(leaves)
+    while len(level) > 1:
+        for i, position in enumerate(positions):
+            sibling = position ^ 1
+            if sibling < len(level):
+                proofs[i] += level[sibling]
+            positions[i] = position >> 1
+        level = [
+            _node_hash(level[j], level[j + 1]) if j + 1 < len(level) else level[j]
+            for j in range(0, len(level), 2)
+        ]
+    return level[0], [bytes(proof) for proof in proofs]
+
+
+def verify_proof(leaf, leaf_index, leaf_count, siblings, root):
+    """Whether ``siblings`` lead from ``leaf`` at ``leaf_index`` to ``root`` (all bytes)."""
+    if not 0 <= leaf_index < leaf_count or len(siblings) % 32:
+        return False
+    node, index, size, offset = leaf, leaf_index, leaf_count, 0
+    while size > 1:
+        if index ^ 1 < size:
+            if offset + 32 > len(siblings):
+                return False
+            sibling = siblings[offset:offset + 32]
+            offset += 32
+            node = _node_hash(sibling, node) if index & 1 else _node_hash(node, sibling)
+        index >>= 1
+        size = (size + 1) // 2
+    return offset == len(siblings) and node == root
+
+
+def split_siblings(siblings):
+    return [bytes(siblings[i:i + 32]).hex() for i in range(0, len(siblings), 32)]
+
+
+def _unproven(kind, queryset, order, fields, leaf, limit):
+    """
+    ``[(kind, pk, leaf), ...]`` of up to ``limit`` rows of ``queryset`` whose
+    current leaf has no proof, walked in ``(order, pk)`` keyset chunks with
+    one proof lookup per chunk.
+    """
+    rows = []
+    queryset = queryset.order_by(order, 'pk').values_list(order, 'pk', *fields)
+    after = None
+    while len(rows) < limit:
+        chunk = queryset
+        if after is not None:
+            chunk = chunk.filter(Q(**{f'{order}__gt': after[0]}) | Q(**{order: after[0], 'pk__gt': after[1]}))
+        chunk = list(chunk[:ANCHOR_SCAN_CHUNK_SIZE])
+        if not chunk:
+            break
+        after = chunk[-1][:2]
+        proven = set(AnchorProof.objects.filter(
+            kind=kind, object_id__in=[row[1] for row in chunk]
+        ).values_list('object_id', 'leaf'))
+        for _, pk, *values in chunk:
+            hashed = leaf(pk, *values)
+            if (pk, hashed.hex()) not in proven:
+                rows.append((kind, pk, hashed))
+                if len(rows) == limit:
+                    break
+    return rows
+
+
+def unanchored_rows(limit=ANCHOR_BATCH_MAX_LEAVES):
+    """
+    ``[(kind, pk, leaf), ...]`` of up to ``limit`` rows, oldest first, whose
+    current leaf has no proof: rows never anchored, and rows changed since
+    (e.g. a re-uploaded document) whose new contents must be anchored too.
+    """
+    rows = _unproven('document', Document.objects.all(), 'upload_date', ('document_hash',), document_leaf, limit)
+    rows += _unproven(
+        'signature', DigitalSignature.objects.all(), 'signed_at',
+        ('document_hash_at_signing', 'signature_value', 'signer_public_key'), signature_leaf, limit - len(rows)
+    )
+    return rows
+
+
+def _drop_proven(rows):
+    """``rows`` less those whose ``(kind, object_id, leaf)`` already has a proof."""
+    proven = set()
+    for start in range(0, len(rows), ANCHOR_SCAN_CHUNK_SIZE):
+        chunk = rows[start:start + ANCHOR_SCAN_CHUNK_SIZE]
+        proven.update(AnchorProof.objects.filter(
+            object_id__in={pk for _, pk, _ in chunk}
+        ).values_list('kind', 'object_id', 'leaf'))
+    return [(kind, pk, leaf) for kind, pk, leaf in rows if (kind, pk, leaf.hex()) not in proven]
+
+
+def anchor_pending(limit=ANCHOR_BATCH_MAX_LEAVES):
+    """Anchor up to ``limit`` unanchored rows as one new batch; ``None`` if there are none."""
+    # The scan runs outside any transaction, so API writes are never held up by it.
+    rows = unanchored_rows(limit)
+    if not rows:
+        return None
+    with transaction.atomic():
+        # One run writes at a time. Writing the lock row takes the row lock
+        # (on SQLite, the database's write lock) before the proofs are read,
+        # so a run that overlapped this one drops what it anchored.
+        lock, _ = AnchorLock.objects.select_for_update().get_or_create(name='anchor_batch')
+        lock.locked_at = timezone.now()
+        lock.save(update_fields=['locked_at'])
+        rows = _drop_proven(rows)
+        if not rows:
+            return None
+        root, proofs = build_tree([leaf for _, _, leaf in rows])
+        batch = AnchorBatch.objects.create(merkle_root=root.hex(), leaf_count=len(rows))
+        AnchorProof.objects.bulk_create([
+            AnchorProof(batch=batch, kind=kind, object_id=pk, leaf=leaf.hex(), leaf_index=i, siblings=proof)
+            for i, ((kind, pk, leaf), proof) in enumerate(zip(rows, proofs))
+        ], batch_size=1000)
+    return batch
+
+
+def publish_pending():
+    """
+    Hand the roots of unpublished batches to ``ANCHOR_PUBLISHER``, a dotted
+    path to ``publish(batch) -> transaction hash``. Returns the number
+    published; without a publisher, roots are only kept in the database.
+    """
+    path = getattr(settings, 'ANCHOR_PUBLISHER', None)
+    if not path:
+        return 0
+    publish = import_string(path)
+    published = 0
+    for batch in AnchorBatch.objects.filter(blockchain_transaction_hash=None).order_by('created_at'):
+        batch.blockchain_transaction_hash = publish(batch)
+        batch.anchored_at = timezone.now()
+        batch.save(update_fields=['blockchain_transaction_hash', 'anchored_at'])
+        published += 1
+    return published
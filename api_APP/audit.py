@@ -0,0 +1,146 @@
+"""
+Tamper-evident audit log of transactions and signatures.
+
+``signals.py`` appends an ``AuditEvent`` for every save and deletion of a
+``Transaction`` or ``DigitalSignature``, holding the row's field values.
+Entries form a hash chain:
+
+    entry_hash = SHA-256(prev_hash || canonical JSON of the entry)
+
+with ``prev_hash`` of the first entry ``GENESIS_HASH``. Changing, inserting
+or removing an entry therefore changes every later hash; ``sequence`` has no
+gaps, so removals show even where hashes were recomputed.
+
+``verify_audit_log`` re-hashes the chain in keyset-paginated chunks, so
+memory stays flat however long it grows, and records ``AuditCheckpoint``
+rows as it goes. The next run starts at the latest checkpoint (checking
+that entry still hashes to the recorded value) instead of the beginning;
+``--full`` re-hashes everything.
+"""
+
+import datetime
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import AuditCheckpoint, AuditEvent
+
+GENESIS_HASH = '0' * 64
+# Events re-hashed per query, and between checkpoints, by verify_audit_log.
+AUDIT_VERIFY_CHUNK_SIZE = getattr(settings, 'AUDIT_VERIFY_CHUNK_SIZE', 5000)
+AUDIT_CHECKPOINT_INTERVAL = getattr(settings, 'AUDIT_CHECKPOINT_INTERVAL', 100000)
+# Concurrent writers race for the next sequence number; the loser retries.
+APPEND_ATTEMPTS = 10
+
+_FIELDS = ('sequence', 'created_at', 'action', 'model', 'object_id', 'data', 'prev_hash', 'entry_hash')
+
+
+class AuditChainError(Exception):
+    """The chain does not verify at ``sequence``."""
+
+    def __init__(self, sequence, reason):
+        super().__init__(f"audit log broken at #{sequence}: {reason}")
+        self.sequence = sequence
+        self.reason = reason
+
+
+def entry_hash(prev_hash, sequence, created_at, action, model, object_id, data):
+    created_at = created_at.astimezone(datetime.timezone.utc).isoformat()
+    payload = json.dumps(
+        [sequence, created_at, action, model, object_id, data], sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(bytes.fromhex(prev_hash) + payload.encode()).hexdigest()
+
+
+def snapshot(instance):
+    """The row's field values as plain JSON types, exactly as they are stored and hashed."""
+    values = {field.attname: field.value_from_object(instance) for field in instance._meta.concrete_fields}
+    return json.loads(json.dumps(values, cls=DjangoJSONEncoder))
+
+
+def record(action, instance):
+    """Append an event for ``action`` ('create', 'update' or 'delete') on ``instance``."""
+    return record_many(action, [instance])[0]
+
+
+def record_many(action, instances):
+    """
+    Append one event per instance with a single read and insert, for rows
+    written by ``bulk_create()`` (which sends no signals).
+    """
+    entries = [(instance._meta.label_lower, str(instance.pk), snapshot(instance)) for instance in instances]
+    if not entries:
+        return []
+    for attempt in range(APPEND_ATTEMPTS):
+        sequence, prev_hash = (
+            AuditEvent.objects.order_by('-sequence').values_list('sequence', 'entry_hash').first() or (0, GENESIS_HASH)
+        )
+        created_at = timezone.now()
+        events = []
+        for model, object_id, data in entries:
+            sequence += 1
+            event = AuditEvent(
+                sequence=sequence, created_at=created_at, action=action, model=model, object_id=object_id,
+                data=data, prev_hash=prev_hash,
+                entry_hash=entry_hash(prev_hash, sequence, created_at, action, model, object_id, data),
+            )
+            events.append(event)
+            prev_hash = event.entry_hash
+        try:
+            with transaction.atomic():
+                return AuditEvent.objects.bulk_create(events)
+        except IntegrityError:
+            if attempt == APPEND_ATTEMPTS - 1:
+                raise
+
+
+def _rehash(row):
+    sequence, created_at, action, model, object_id, data, prev_hash, _ = row
+    return entry_hash(prev_hash, sequence, created_at, action, model, object_id, data)
+
+
+def resume_point(full=False):
+    """
+    ``(sequence, entry_hash)`` to verify from: the latest checkpoint, after
+    checking its entry is unchanged, or the start of the chain.
+    """
+    checkpoint = None if full else AuditCheckpoint.objects.order_by('-sequence').first()
+    if checkpoint is None:
+        return 0, GENESIS_HASH
+    row = AuditEvent.objects.filter(sequence=checkpoint.sequence).values_list(*_FIELDS).first()
+    if row is None:
+        raise AuditChainError(checkpoint.sequence, 'checkpointed entry is missing')
+    if row[-1] != checkpoint.entry_hash or _rehash(row) != checkpoint.entry_hash:
+        raise AuditChainError(checkpoint.sequence, 'checkpointed entry was modified')
+    return checkpoint.sequence, checkpoint.entry_hash
+
+
+def verify_chain(after=0, prev_hash=GENESIS_HASH, chunk_size=AUDIT_VERIFY_CHUNK_SIZE):
+    """
+    Re-hash the events following ``after`` (whose hash is ``prev_hash``).
+    Yields ``(sequence, entry_hash)`` of the last event of each chunk and
+    raises ``AuditChainError`` at the first one that does not verify.
+    """
+    expected = after + 1
+    while True:
+        rows = list(
+            AuditEvent.objects.filter(sequence__gte=expected).order_by('sequence').values_list(*_FIELDS)[:chunk_size]
+        )
+        for row in rows:
+            sequence = row[0]
+            if sequence != expected:
+                raise AuditChainError(expected, 'entry is missing')
+            if row[6] != prev_hash:
+                raise AuditChainError(sequence, 'does not follow the previous entry')
+            prev_hash = _rehash(row)
+            if prev_hash != row[7]:
+                raise AuditChainError(sequence, 'contents do not match the entry hash')
+            expected += 1
+        if rows:
+            yield expected - 1, prev_hash
+        if len(rows) < chunk_size:
+            return
@@ -0,0 +1,130 @@
+"""
+Incremental base64 encoding and decoding.
+
+Integration partners send documents as base64 inside JSON. ``Base64Decoder``
+is fed the encoded text in pieces of any size and returns the bytes that are
+complete so far, so a file is decoded in fixed-size chunks with memory
+bounded by one chunk. Whitespace (including MIME line breaks) is ignored;
+anything else outside the standard alphabet, or data after the padding, is
+rejected. ``Base64Encoder`` is the reverse. Neither depends on Django, so the
+batch helpers can run in pool processes.
+"""
+
+import binascii
+import os
+
+CHUNK_SIZE = 48 * 1024  # a multiple of 3 and 4: whole base64 quanta both ways
+
+_WHITESPACE = b' \t\r\n\x0b\x0c'
+
+
+class Base64Error(ValueError):
+    """The input is not valid base64."""
+
+
+class Base64Decoder:
+    """
+    Decodes base64 fed in arbitrary pieces.
+
+        decoder = Base64Decoder()
+        for piece in pieces:
+            out.write(decoder.decode(piece))
+        decoder.finish()
+    """
+
+    def __init__(self):
+        self._pending = b''
+        self._padded = False
+        self.size = 0
+
+    def decode(self, data):
+        """Bytes decoded from ``data`` plus what was left over from earlier calls."""
+        if isinstance(data, str):
+            data = data.encode('ascii', 'replace')
+        data = self._pending + data.translate(None, _WHITESPACE)
+        if not data:
+            return b''
+        if self._padded:
+            raise Base64Error('data after the padding')
+        whole = len(data) - len(data) % 4
+        self._pending = data[whole:]
+        if not whole:
+            return b''
+        try:
+            decoded = binascii.a2b_base64(data[:whole], strict_mode=True)
+        except binascii.Error as e:
+            raise Base64Error(str(e)) from None
+        self._padded = data[whole - 1:whole] == b'='
+        self.size += len(decoded)
+        return decoded
+
+    def finish(self):
+        """Raises ``Base64Error`` if the input stopped in the middle of a quantum."""
+        if self._pending:
+            raise Base64Error('truncated input (length is not a multiple of 4)')
+
+
+class Base64Encoder:
+    """Encodes bytes fed in arbitrary pieces; ``finish()`` returns the padded tail."""
+
+    def __init__(self):
+        self._pending = b''
+
+    def encode(self, data):
+        data = self._pending + data
+        whole = len(data) - len(data) % 3
+        self._pending = data[whole:]
+        return binascii.b2a_base64(data[:whole], newline=False)
+
+    def finish(self):
+        tail, self._pending = self._pending, b''
+        return binascii.b2a_base64(tail, newline=False)
+
+
+def decode_stream(source, target, chunk_size=CHUNK_SIZE):
+    """Decode the base64 read from file object ``source`` into ``target``; returns the decoded size."""
+    decoder = Base64Decoder()
+    while True:
+        data = source.read(chunk_size)
+        if not data:
+            break
+        target.write(decoder.decode(data))
+    decoder.finish()
+    return decoder.size
+
+
+def encode_stream(source, target, chunk_size=CHUNK_SIZE):
+    """Encode file object ``source`` as base64 into ``target``; returns the encoded size."""
+    encoder = Base64Encoder()
+    size = 0
+    while True:
+        data = source.read(chunk_size)
+        if not data:
+            break
+        encoded = encoder.encode(data)
+        target.write(encoded)
+        size += len(encoded)
+    tail = encoder.finish()
+    target.write(tail)
+    return size + len(tail)
+
+
+def decode_file(source_path, target_path):
+    """Decode a base64 file into ``target_path``; a partial output is removed on error."""
+    return _convert(decode_stream, source_path, target_path)
+
+
+def encode_file(source_path, target_path):
+    """Encode a file as base64 into ``target_path``."""
+    return _convert(encode_stream, source_path, target_path)
+
+
+def _convert(convert, source_path, target_path):
+    # A target that cannot be created raises here, with nothing to clean up.
+    with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+        try:
+            return convert(source, target)
+        except Exception:
+            target.close()
+            os.unlink(target_path)
+            raise
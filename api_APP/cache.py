@@ -0,0 +1,124 @@
+"""
+In-process read-through object caches.
+
+Each gunicorn worker keeps its own bounded LRU with a TTL. Entries are
+dropped from ``signals.py`` whenever the underlying rows change in this
+process; the TTL bounds how long another worker can serve a stale copy.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Property
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with a per-entry time to live and tag-based
+    invalidation (an entry can be dropped by any of the tags it was stored
+    with, e.g. the primary key of a related row).
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()  # key -> (expires_at, value, tags)
+        self._tags = {}             # tag -> set of keys
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _unlink(self, key):
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] <= self.clock():
+                self._unlink(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, tags=()):
+        with self._lock:
+            if key in self._data:
+                self._unlink(key)
+            self._data[key] = (self.clock() + self.ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._unlink(next(iter(self._data)))
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._data:
+                self._unlink(key)
+
+    def invalidate_tag(self, tag):
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._unlink(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+
+
+property_cache = LRUCache(
+    maxsize=getattr(settings, 'PROPERTY_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'PROPERTY_CACHE_TTL', 60),
+)
+
+
+def get_property_by_ipfs_hash(ipfs_hash):
+    """
+    Return the property with ``ipfs_hash`` (owner joined), from the cache when
+    possible. Raises ``Property.DoesNotExist`` like ``QuerySet.get()``.
+
+    Callers get their own copy, so mutating it never leaks into the cache.
+    """
+    cached = property_cache.get(ipfs_hash)
+    if cached is None:
+        cached = Property.objects.select_related('current_owner').get(ipfs_hash=ipfs_hash)
+        property_cache.set(
+            ipfs_hash, cached,
+            tags=(f'property:{cached.pk}', f'userprofile:{cached.current_owner_id}'),
+        )
+    return copy.copy(cached)
+
+
+def get_fresh_property(cached):
+    """
+    ``cached`` (from ``get_property_by_ipfs_hash``) if the row has not changed
+    since, otherwise the current row; one indexed lookup when it is current.
+    Raises ``Property.DoesNotExist`` if the row is gone.
+    """
+    updated_at = Property.objects.filter(pk=cached.pk).values_list('updated_at', flat=True).first()
+    if updated_at == cached.updated_at:
+        return cached
+    # Changed (or deleted) by another worker, whose signals did not reach this cache.
+    property_cache.invalidate_tag(f'property:{cached.pk}')
+    if updated_at is None:
+        raise Property.DoesNotExist
+    return get_property_by_ipfs_hash(cached.ipfs_hash)
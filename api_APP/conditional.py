@@ -0,0 +1,88 @@
+"""
+Conditional GET: weak ETags and Last-Modified for API responses.
+
+A detail response is identified by its row's primary key and ``updated_at``;
+a list response by the ``ResourceVersion`` counter of its model. Nested
+``*_details`` objects add the counters of their models, and the shape of the
+body (``?fields=``, ``?expand=``, media type) is part of the tag, so two
+different representations never share one. Clients that send the tag back
+in ``If-None-Match`` get a 304 before anything is serialized.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import ResourceVersion
+
+# max-age=0 + must-revalidate: browsers and reverse proxies may store the
+# body but must revalidate it (cheaply, with If-None-Match) on every use.
+API_CACHE_CONTROL = getattr(settings, 'API_CACHE_CONTROL', 'max-age=0, must-revalidate')
+# Bodies depend on the negotiated format and on who is asking.
+API_VARY = ('Accept', 'Authorization', 'Cookie')
+
+
+def _etag(*parts):
+    return 'W/"%s"' % hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+def _shape(request, *params):
+    query = request.query_params
+    return (getattr(request, 'accepted_media_type', ''),) + tuple(query.get(name, '') for name in params)
+
+
+def resource_versions(models):
+    """``{label: (version, updated_at)}`` for the given models, in one query."""
+    labels = sorted({model._meta.label_lower for model in models})
+    found = {
+        row.resource: (row.version, row.updated_at)
+        for row in ResourceVersion.objects.filter(resource__in=labels)
+    }
+    return {label: found.get(label, (0, None)) for label in labels}
+
+
+def _validators(versions, *parts):
+    stamps = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+    parts += tuple(sorted((label, version) for label, (version, _) in versions.items()))
+    return _etag(*parts), max(stamps, default=None)
+
+
+def object_validators(request, instance, serializer_class):
+    """``(etag, last_modified)`` of ``instance`` rendered by ``serializer_class``."""
+    related = serializer_class.expanded_models(request)
+    versions = resource_versions(related) if related else {}
+    etag, last_modified = _validators(
+        versions, instance._meta.label_lower, str(instance.pk), instance.updated_at.isoformat(),
+        *_shape(request, 'fields', 'expand')
+    )
+    return etag, max(filter(None, [instance.updated_at, last_modified]))
+
+
+def list_validators(request, model, serializer_class):
+    """``(etag, last_modified)`` of a page of ``model`` rows; any query parameter changes the tag."""
+    versions = resource_versions([model] + serializer_class.expanded_models(request))
+    return _validators(versions, model._meta.label_lower, *_shape(request), request.get_full_path())
+
+
+def conditional_request(request):
+    """Whether the client is revalidating a copy it holds."""
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 response if the client's copy is current, otherwise ``None``."""
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified and int(last_modified.timestamp())
+    )
+    return response and with_validators(response, etag, last_modified)
+
+
+def with_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response['Cache-Control'] = API_CACHE_CONTROL
+    patch_vary_headers(response, API_VARY)
+    return response
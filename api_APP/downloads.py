@@ -0,0 +1,177 @@
+"""
+Authorized file downloads without Python-level copying.
+
+After the view's permission check, ``serve_file`` hands the transfer to
+whatever can do it cheapest:
+
+* the front proxy, with ``X-Accel-Redirect`` (nginx) or ``X-Sendfile``
+  (Apache, lighttpd) when ``MEDIA_ACCEL_HEADER`` is set;
+* S3 itself, by redirecting to a presigned URL;
+* otherwise a ``FileResponse`` over the local file, honouring a single
+  ``Range``. The response keeps the file's descriptor, so gunicorn sends
+  it with ``os.sendfile`` from the requested offset.
+
+Blob names are content addresses, so their SHA-256 is a strong ETag.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe
+
+from .models import ContentBlob
+from .storage import DirectTransferUnsupported, blob_digest, media_storage
+
+# Lifetime of presigned upload and download URLs.
+DIRECT_TRANSFER_URL_EXPIRY = getattr(settings, 'DIRECT_TRANSFER_URL_EXPIRY_SECONDS', 3600)
+# One range; several ranges would need a multipart/byteranges body.
+_BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def download_filename(field_file, stem):
+    """
+    Name offered to the client: ``stem`` plus an extension for blobs (whose
+    names have none), the stored file name otherwise. Also returns the
+    content type.
+    """
+    sha256 = blob_digest(field_file.name)
+    if sha256 is None:
+        filename = os.path.basename(field_file.name)
+        return filename, mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    content_type = ContentBlob.objects.filter(sha256=sha256).values_list('content_type', flat=True).first()
+    content_type = content_type or 'application/octet-stream'
+    return stem + (mimetypes.guess_extension(content_type) or ''), content_type
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) of a single ``bytes=`` range, or ``None`` to
+    send the whole file (no range, several ranges, or a malformed one).
+    Raises ``ValueError`` if the range lies beyond the end of the file.
+    """
+    match = _BYTE_RANGE.match(header.strip()) if header else None
+    if match is None or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if size == 0:
+        raise ValueError('the file is empty')
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError('empty suffix range')
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    end = int(last) if last else max(start, size - 1)
+    if end < start:
+        return None
+    if start >= size:
+        raise ValueError('range starts beyond the end of the file')
+    return start, min(end, size - 1)
+
+
+class _RangeFile:
+    """
+    Reads ``length`` bytes of ``file`` from ``start``. ``fileno`` lets a WSGI
+    server's file wrapper send them with ``os.sendfile``; it starts at the
+    descriptor's current offset and stops at ``Content-Length``.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _range_applies(request, etag, last_modified):
+    """``If-Range``: only send part of the file if the client's copy is current."""
+    validator = request.headers.get('If-Range')
+    if not validator:
+        return True
+    if validator.startswith('"') or validator.startswith('W/'):
+        return etag is not None and validator == etag
+    since = parse_http_date_safe(validator)
+    return since is not None and last_modified is not None and int(last_modified.timestamp()) == since
+
+
+def serve_file(request, field_file, stem):
+    """
+    Response delivering ``field_file`` to a client that may read it. Raises
+    ``FileNotFoundError`` if the file is missing from local storage.
+    """
+    name = field_file.name
+    filename, content_type = download_filename(field_file, stem)
+    disposition = content_disposition_header(True, filename)
+    storage = media_storage.inner
+
+    accel_header = getattr(settings, 'MEDIA_ACCEL_HEADER', None)
+    if accel_header:
+        # The proxy serves the bytes, Range requests included.
+        response = HttpResponse(content_type=content_type)
+        response['Content-Disposition'] = disposition
+        if accel_header.lower() == 'x-accel-redirect':
+            prefix = getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(name)
+            return response
+        try:
+            response[accel_header] = storage.path(name)
+            return response
+        except NotImplementedError:
+            pass  # X-Sendfile needs a local path
+
+    try:
+        return HttpResponseRedirect(media_storage.presigned_download(name, DIRECT_TRANSFER_URL_EXPIRY, filename=filename))
+    except DirectTransferUnsupported:
+        pass
+
+    sha256 = blob_digest(name)
+    etag = f'"{sha256}"' if sha256 else None
+    last_modified = None if sha256 else storage.get_modified_time(name)
+    cached = get_conditional_response(
+        request, etag=etag, last_modified=last_modified and int(last_modified.timestamp())
+    )
+    if cached is not None:
+        return cached
+
+    file = storage.open(name, 'rb')
+    size = file.size
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except ValueError:
+        file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if byte_range and not _range_applies(request, etag, last_modified):
+        byte_range = None
+    start, end = byte_range or (0, size - 1)
+
+    response = FileResponse(_RangeFile(file, start, end - start + 1), content_type=content_type)
+    response['Content-Length'] = end - start + 1
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = disposition
+    if etag:
+        response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
@@ -0,0 +1,79 @@
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..anchoring import current_leaf, split_siblings, verify_proof
+from ..models import AnchorProof, DigitalSignature, Document
+
+
+# --- Common OpenAPI Responses (optional, for consistency) ---
+RESPONSE_401_UNAUTHORIZED = openapi.Response(description="Unauthorized - Authentication credentials were not provided or are invalid")
+RESPONSE_404_NOT_FOUND = openapi.Response(description="Not anchored (yet) - anchor_batch has not included this row")
+
+MODELS = {'document': Document, 'signature': DigitalSignature}
+
+ANCHOR_PROOF_RESPONSE = openapi.Response(
+    description="Merkle inclusion proof of the row in its anchor batch",
+    schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+        'kind': openapi.Schema(type=openapi.TYPE_STRING, enum=list(MODELS)),
+        'object_id': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+        'leaf': openapi.Schema(type=openapi.TYPE_STRING, description="Hex leaf hash of the row as anchored"),
+        'leaf_index': openapi.Schema(type=openapi.TYPE_INTEGER),
+        'siblings': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING), description="Hex sibling hashes, leaf level first"),
+        'leaf_count': openapi.Schema(type=openapi.TYPE_INTEGER),
+        'merkle_root': openapi.Schema(type=openapi.TYPE_STRING),
+        'batch': openapi.Schema(type=openapi.TYPE_INTEGER),
+        'blockchain_transaction_hash': openapi.Schema(type=openapi.TYPE_STRING, x_nullable=True),
+        'anchored_at': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME, x_nullable=True),
+        'valid': openapi.Schema(type=openapi.TYPE_BOOLEAN, description="The proof leads to merkle_root"),
+        'matches_current': openapi.Schema(type=openapi.TYPE_BOOLEAN, x_nullable=True, description="The row still hashes to the anchored leaf (null if it was deleted)"),
+    })
+)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_id='retrieve_anchor_proof',
+    operation_description=(
+        "Proof that the document or signature was included in an anchored Merkle root. Recompute the leaf, "
+        "hash it with each sibling (on the left when that level's index is odd; a last node without a sibling "
+        "moves up unchanged) and compare with merkle_root. For a row changed since it was anchored, this is the "
+        "proof of its current contents once those are anchored, and the latest proof until then."
+    ),
+    tags=['Anchoring'],
+    responses={200: ANCHOR_PROOF_RESPONSE, 401: RESPONSE_401_UNAUTHORIZED, 404: RESPONSE_404_NOT_FOUND}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def anchor_proof(request, kind, pk):
+    """
+    Merkle inclusion proof of a document or digital signature.
+    """
+    # A row changed after anchoring has one proof per anchored leaf.
+    proofs = list(AnchorProof.objects.select_related('batch').filter(kind=kind, object_id=pk).order_by('-batch_id'))
+    if not proofs:
+        return Response({'detail': 'This record has not been anchored yet.'}, status=status.HTTP_404_NOT_FOUND)
+    obj = MODELS[kind].objects.filter(pk=pk).first()
+    current = None if obj is None else current_leaf(kind, obj).hex()
+    proof = next((proof for proof in proofs if proof.leaf == current), proofs[0])
+    batch = proof.batch
+    leaf = bytes.fromhex(proof.leaf)
+    siblings = bytes(proof.siblings)
+    return Response({
+        'kind': kind,
+        'object_id': proof.object_id,
+        'leaf': proof.leaf,
+        'leaf_index': proof.leaf_index,
+        'siblings': split_siblings(siblings),
+        'leaf_count': batch.leaf_count,
+        'merkle_root': batch.merkle_root,
+        'batch': batch.pk,
+        'blockchain_transaction_hash': batch.blockchain_transaction_hash,
+        'anchored_at': batch.anchored_at,
+        'valid': verify_proof(leaf, proof.leaf_index, batch.leaf_count, siblings, bytes.fromhex(batch.merkle_root)),
+        'matches_current': None if obj is None else proof.leaf == current,
+    })
@@ -0,0 +1,177 @@
+import datetime
+import uuid
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..fastserializers import CompiledSerializer, NotCompilable
+from ..models import ChangeTombstone, Property, Transaction
+from ..pagination import KeysetPagination, decode_cursor, encode_cursor, key_of, keyset_filter
+from ..serializers import PropertySerializer, SPARSE_FIELDSET_PARAMETERS, TransactionSerializer
+
+
+# --- Common OpenAPI Responses (optional, for consistency) ---
+RESPONSE_400_BAD_REQUEST = openapi.Response(description="Bad Request - Invalid since token")
+RESPONSE_401_UNAUTHORIZED = openapi.Response(description="Unauthorized - Authentication credentials were not provided or are invalid")
+RESPONSE_404_NOT_FOUND = openapi.Response(description="Unknown change feed")
+RESPONSE_410_GONE = openapi.Response(description="Gone - The since token is older than the tombstone retention; start a full resync")
+
+FEEDS = {
+    'properties': (PropertySerializer, Property),
+    'transactions': (TransactionSerializer, Transaction),
+}
+CHANGE_ORDERING = ('updated_at', 'id')
+TOMBSTONE_ORDERING = ('deleted_at', 'id')
+# Rows newer than this are held back until transactions that may still be
+# committing older timestamps have had time to land.
+CHANGE_FEED_SETTLE = datetime.timedelta(seconds=getattr(settings, 'CHANGE_FEED_SETTLE_SECONDS', 2))
+TOMBSTONE_RETENTION = datetime.timedelta(days=getattr(settings, 'CHANGE_TOMBSTONE_RETENTION_DAYS', 30))
+
+CHANGE_FEED_PARAMETERS = [
+    openapi.Parameter('since', openapi.IN_QUERY, description="Token returned as 'since' by the previous call; omit it for a full sync", type=openapi.TYPE_STRING),
+    openapi.Parameter('page_size', openapi.IN_QUERY, description="Maximum number of changed and of deleted rows per call", type=openapi.TYPE_INTEGER),
+]
+
+
+def _aware_datetime(value):
+    parsed = parse_datetime(value) if isinstance(value, str) else None
+    if parsed is None or timezone.is_naive(parsed):
+        raise ValueError('not an aware datetime')
+    return parsed
+
+
+def _parse_since(token):
+    """
+    ``([updated_at, id], [deleted_at, tombstone id])`` of a since token, the
+    first pair ``[None, None]`` before any change was seen. Raises
+    ``ValueError`` for anything ``change_feed`` did not produce.
+    """
+    values, _ = decode_cursor(token)
+    if len(values) != 4:
+        raise ValueError('invalid since token')
+    updated_at, pk, deleted_at, tombstone_id = values
+    if updated_at is None and pk is None:
+        changed_after = [None, None]
+    else:
+        if not isinstance(pk, str):
+            raise ValueError('invalid row id')
+        changed_after = [_aware_datetime(updated_at), uuid.UUID(pk)]
+    if type(tombstone_id) is not int:
+        raise ValueError('invalid tombstone id')
+    return changed_after, [_aware_datetime(deleted_at), tombstone_id]
+
+
+def _changed_rows(serializer_class, queryset, request, size):
+    """Serialize up to ``size`` rows; returns ``(data, key of the last row, more?)``."""
+    context = {'request': request}
+    try:
+        compiled = CompiledSerializer(serializer_class, context=context)
+    except NotCompilable:
+        rows = list(serializer_class.setup_eager_loading(queryset, request)[:size + 1])
+        page = rows[:size]
+        data = serializer_class(page, many=True, context=context).data
+    else:
+        rows = list(compiled.queryset(queryset, extra=CHANGE_ORDERING)[:size + 1])
+        page = rows[:size]
+        data = compiled.render(page)
+    last = key_of(page[-1], CHANGE_ORDERING) if page else None
+    return data, last, len(rows) > size
+
+
+# --- Change Feed Views ---
+
+@swagger_auto_schema(
+    method='get',
+    operation_id='change_feed',
+    operation_description=(
+        "Rows of `properties` or `transactions` changed since the given token, plus the ids of rows deleted since then. "
+        "Apply `changes`, then `deleted`, store `since`, and call again while `has_more` is true."
+    ),
+    tags=['Sync'],
+    manual_parameters=CHANGE_FEED_PARAMETERS + SPARSE_FIELDSET_PARAMETERS,
+    responses={
+        200: openapi.Response(
+            description="A batch of changes",
+            schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                'changes': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+                'deleted': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                    'id': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                    'deleted_at': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_DATETIME),
+                })),
+                'since': openapi.Schema(type=openapi.TYPE_STRING),
+                'has_more': openapi.Schema(type=openapi.TYPE_BOOLEAN),
+            })
+        ),
+        400: RESPONSE_400_BAD_REQUEST,
+        401: RESPONSE_401_UNAUTHORIZED,
+        404: RESPONSE_404_NOT_FOUND,
+        410: RESPONSE_410_GONE,
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def change_feed(request, resource):
+    """
+    Incremental sync: rows changed and deleted after the client's high-water mark.
+    """
+    if resource not in FEEDS:
+        return Response({'detail': 'Unknown change feed.'}, status=status.HTTP_404_NOT_FOUND)
+    serializer_class, model = FEEDS[resource]
+    now = timezone.now()
+    cutoff = now - CHANGE_FEED_SETTLE
+    size = KeysetPagination(ordering=CHANGE_ORDERING).get_page_size(request)
+
+    token = request.query_params.get('since')
+    if token:
+        try:
+            changed_after, deleted_after = _parse_since(token)
+        except ValueError:
+            return Response({'detail': 'Invalid since token.'}, status=status.HTTP_400_BAD_REQUEST)
+        if deleted_after[0] < now - TOMBSTONE_RETENTION:
+            return Response(
+                {'detail': 'This since token has expired. Discard local data and sync again without since.'},
+                status=status.HTTP_410_GONE
+            )
+    else:
+        # A client with no data has nothing to delete; start the deletions at now.
+        changed_after, deleted_after = [None, None], [cutoff, 0]
+
+    changed = model.objects.filter(updated_at__lte=cutoff)
+    if changed_after[0] is not None:
+        changed = changed.filter(keyset_filter(CHANGE_ORDERING, changed_after))
+    changes, last_changed, more_changes = _changed_rows(
+        serializer_class, changed.order_by(*CHANGE_ORDERING), request, size
+    )
+
+    tombstones = list(
+        ChangeTombstone.objects
+        .filter(keyset_filter(TOMBSTONE_ORDERING, deleted_after), resource=resource, deleted_at__lte=cutoff)
+        .order_by(*TOMBSTONE_ORDERING)
+        .values('id', 'object_id', 'deleted_at')[:size + 1]
+    )
+    more_deletions = len(tombstones) > size
+    tombstones = tombstones[:size]
+    if tombstones:
+        last_deleted = key_of(tombstones[-1], TOMBSTONE_ORDERING)
+    elif deleted_after[0] < cutoff:
+        # Nothing deleted up to the cutoff: move the mark forward so an idle
+        # client's token does not age past the retention window.
+        last_deleted = [cutoff, 0]
+    else:
+        last_deleted = deleted_after
+
+    return Response({
+        'changes': changes,
+        'deleted': [{'id': row['object_id'], 'deleted_at': row['deleted_at']} for row in tombstones],
+        'since': encode_cursor((last_changed or changed_after) + last_deleted),
+        'has_more': more_changes or more_deletions,
+    })
@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.shortcuts import render
 from rest_framework.response import Response
 from ..models import *
@@ -22,6 +23,10 @@ from django.http import HttpResponseBadRequest, JsonResponse
 from email.mime.multipart import MIMEMultipart
 
 from ..serializers import *
+from ..pagination import KeysetPagination, PAGINATION_PARAMETERS
+from ..audit import record_many
+from ..signatures import verify_parallel
+from ..signing import refresh as refresh_signing_requirements
 
 
 User = get_user_model()
@@ -40,11 +45,11 @@ RESPONSE_404_NOT_FOUND = openapi.Response(description="Resource not found")
 @swagger_auto_schema(
     method='get',
     operation_id='list_digital_signatures',
-    operation_description="Retrieve a list of all digital signatures. Can be filtered by 'document_id'.",
+    operation_description="Retrieve a page of digital signatures ordered by signing time. Can be filtered by 'document_id'.",
     tags=['Digital Signatures'],
     manual_parameters=[
         openapi.Parameter('document_id', openapi.IN_QUERY, description="Filter signatures by Document UUID", type=openapi.TYPE_STRING),
-    ],
+    ] + PAGINATION_PARAMETERS + SPARSE_FIELDSET_PARAMETERS,
     responses={200: DigitalSignatureSerializer(many=True), 401: RESPONSE_401_UNAUTHORIZED}
 )
 @swagger_auto_schema(
@@ -67,12 +72,14 @@ def digital_signature_list_create(request):
     'signer' is automatically set to the authenticated user on creation.
     """
     if request.method == 'GET':
-        signatures = DigitalSignature.objects.all()
+        signatures = DigitalSignatureSerializer.setup_eager_loading(DigitalSignature.objects.all(), request)
         document_id = request.query_params.get('document_id')
         if document_id:
             signatures = signatures.filter(document_id=document_id)
+        paginator = KeysetPagination(ordering=('signed_at', 'id'))
+        signatures = paginator.paginate_queryset(signatures, request)
         serializer = DigitalSignatureSerializer(signatures, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
     elif request.method == 'POST':
         serializer = DigitalSignatureSerializer(data=request.data, context={'request': request})
@@ -104,6 +111,7 @@ def digital_signature_list_create(request):
     operation_id='retrieve_digital_signature',
     operation_description="Retrieve a specific digital signature by its UUID.",
     tags=['Digital Signatures'],
+    manual_parameters=SPARSE_FIELDSET_PARAMETERS,
     responses={
         200: DigitalSignatureSerializer,
         401: RESPONSE_401_UNAUTHORIZED,
@@ -146,7 +154,7 @@ def digital_signature_detail_update_delete(request, pk): # pk is DigitalSignatur
     Updates and Deletes are typically restricted for digital signatures.
     """
     try:
-        signature = DigitalSignature.objects.get(pk=pk)
+        signature = DigitalSignatureSerializer.setup_eager_loading(DigitalSignature.objects.all(), request).get(pk=pk)
     except DigitalSignature.DoesNotExist:
         return Response({'detail': 'Digital Signature not found.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -186,4 +194,212 @@ def digital_signature_detail_update_delete(request, pk): # pk is DigitalSignatur
         signature.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
         # A more common approach:
-        # return Response({'detail': 'Digital signatures cannot be deleted.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
\ No newline at end of file
+        # return Response({'detail': 'Digital signatures cannot be deleted.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+BULK_VERIFICATION_RESPONSE = openapi.Response(
+    description="Per-signature results (in signing order) and a summary",
+    schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+        'results': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+            'id': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+            'document': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+            'signer': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'verified': openapi.Schema(type=openapi.TYPE_BOOLEAN, description="The signature is valid for document_hash_at_signing"),
+            'hash_matches': openapi.Schema(type=openapi.TYPE_BOOLEAN, description="document_hash_at_signing equals the document's current hash"),
+            'recorded_verified': openapi.Schema(type=openapi.TYPE_BOOLEAN, description="The 'verified' value stored when the signature was created"),
+        })),
+        'summary': openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+            'total': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'valid': openapi.Schema(type=openapi.TYPE_INTEGER, description="Verified and matching the current document hash"),
+            'invalid_signature': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'hash_mismatch': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'differs_from_record': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'not_found': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING)),
+        }),
+    })
+)
+
+
+@swagger_auto_schema(
+    method='post',
+    operation_id='verify_digital_signatures',
+    operation_description=(
+        "Re-verify many signatures at once (admins only): the listed 'ids', or every signature on a 'document' "
+        f"or on the documents of a 'property', at most {SIGNATURE_BULK_VERIFY_MAX}. Large batches are checked "
+        "in parallel on all CPU cores. Stored rows are not changed."
+    ),
+    tags=['Digital Signatures'],
+    request_body=SignatureVerificationRequestSerializer,
+    responses={
+        200: BULK_VERIFICATION_RESPONSE,
+        400: RESPONSE_400_BAD_REQUEST,
+        401: RESPONSE_401_UNAUTHORIZED,
+        403: RESPONSE_403_FORBIDDEN,
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def digital_signature_bulk_verify(request):
+    """
+    Cryptographically re-verify a batch of digital signatures.
+    """
+    if not request.user.is_staff:
+        return Response({'detail': 'You do not have permission to verify signatures in bulk.'}, status=status.HTTP_403_FORBIDDEN)
+    serializer = SignatureVerificationRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    selection = serializer.validated_data
+
+    signatures = DigitalSignature.objects.all()
+    if 'ids' in selection:
+        signatures = signatures.filter(pk__in=selection['ids'])
+    elif 'document' in selection:
+        signatures = signatures.filter(document_id=selection['document'])
+    else:
+        signatures = signatures.filter(document__property_id=selection['property'])
+    rows = list(signatures.order_by('signed_at', 'id').values_list(
+        'id', 'document_id', 'signer_id', 'signer_public_key', 'signature_value',
+        'document_hash_at_signing', 'document__document_hash', 'verified',
+    )[:SIGNATURE_BULK_VERIFY_MAX + 1])
+    if len(rows) > SIGNATURE_BULK_VERIFY_MAX:
+        return Response(
+            {'detail': f'More than {SIGNATURE_BULK_VERIFY_MAX} signatures match; verify them in smaller batches of ids.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    verdicts = verify_parallel((public_key, value, signed_hash) for _, _, _, public_key, value, signed_hash, _, _ in rows)
+    results = []
+    summary = {'total': len(rows), 'valid': 0, 'invalid_signature': 0, 'hash_mismatch': 0, 'differs_from_record': 0}
+    for (pk, document_id, signer_id, _, _, signed_hash, current_hash, recorded), verified in zip(rows, verdicts):
+        hash_matches = signed_hash == current_hash
+        results.append({
+            'id': pk, 'document': document_id, 'signer': signer_id,
+            'verified': verified, 'hash_matches': hash_matches, 'recorded_verified': recorded,
+        })
+        summary['valid'] += verified and hash_matches
+        summary['invalid_signature'] += not verified
+        summary['hash_mismatch'] += not hash_matches
+        summary['differs_from_record'] += verified != recorded
+    if 'ids' in selection:
+        found = {pk for pk, *_ in rows}
+        summary['not_found'] = sorted(str(pk) for pk in set(selection['ids']) - found)
+    return Response({'results': results, 'summary': summary})
+
+
+BATCH_SIGNING_RESPONSE = openapi.Response(
+    description="Outcome of each item, in request order, and a summary",
+    schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+        'results': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+            'index': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'document': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID, x_nullable=True),
+            'status': openapi.Schema(type=openapi.TYPE_STRING, enum=[
+                'created', 'already_signed', 'duplicate', 'document_not_found', 'hash_mismatch', 'invalid',
+            ]),
+            'id': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID, description="The new or existing signature"),
+            'verified': openapi.Schema(type=openapi.TYPE_BOOLEAN, description="For created signatures"),
+            'errors': openapi.Schema(type=openapi.TYPE_OBJECT, description="For invalid items and hash mismatches"),
+        })),
+        'summary': openapi.Schema(type=openapi.TYPE_OBJECT, additional_properties=openapi.Schema(type=openapi.TYPE_INTEGER)),
+    })
+)
+
+
+@swagger_auto_schema(
+    method='post',
+    operation_id='sign_documents_batch',
+    operation_description=(
+        f"Record up to {SIGNATURE_BATCH_MAX} signatures of the authenticated user at once, e.g. every document "
+        "of a sale bundle. Each item is checked like POST /digital-signatures/ (the hash must match the "
+        "document's current hash, and the signature is verified), but items are handled independently: the "
+        "result of each one is reported and the valid ones are saved together. Signatures the user already "
+        "made are reported as 'already_signed' with their id."
+    ),
+    tags=['Digital Signatures'],
+    request_body=SignatureBatchSerializer,
+    responses={200: BATCH_SIGNING_RESPONSE, 400: RESPONSE_400_BAD_REQUEST, 401: RESPONSE_401_UNAUTHORIZED}
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def digital_signature_batch_create(request):
+    """
+    Create many digital signatures in one request.
+    """
+    serializer = SignatureBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    results, pending = [], []
+    for index, item in enumerate(serializer.validated_data['signatures']):
+        item_serializer = SignatureBatchItemSerializer(data=item)
+        if item_serializer.is_valid():
+            results.append({'index': index, 'document': item_serializer.validated_data['document']})
+            pending.append((results[-1], item_serializer.validated_data))
+        else:
+            results.append({'index': index, 'document': item.get('document'), 'status': 'invalid', 'errors': item_serializer.errors})
+
+    # One query for the current hashes of every document in the batch.
+    document_ids = {item['document'] for _, item in pending}
+    current_hashes = dict(Document.objects.filter(pk__in=document_ids).values_list('pk', 'document_hash'))
+    accepted, seen = [], set()
+    for result, item in pending:
+        current_hash = current_hashes.get(item['document'])
+        key = (item['document'], item['signature_value'])
+        if current_hash is None:
+            result['status'] = 'document_not_found'
+        elif item['document_hash_at_signing'] != current_hash:
+            result['status'] = 'hash_mismatch'
+            result['errors'] = {'document_hash_at_signing': [f"Hash mismatch. Expected {current_hash} for the document."]}
+        elif key in seen:
+            result['status'] = 'duplicate'
+        else:
+            seen.add(key)
+            accepted.append((result, item))
+
+    # And one for the signatures the user already made (unique_together).
+    existing = dict(
+        ((document_id, value), pk) for pk, document_id, value in DigitalSignature.objects.filter(
+            signer=request.user, document_id__in={item['document'] for _, item in accepted},
+            signature_value__in={item['signature_value'] for _, item in accepted},
+        ).values_list('pk', 'document_id', 'signature_value')
+    )
+    new = []
+    for result, item in accepted:
+        pk = existing.get((item['document'], item['signature_value']))
+        if pk is not None:
+            result.update(status='already_signed', id=pk)
+        else:
+            new.append((result, DigitalSignature(signer=request.user, document_id=item['document'], **{
+                field: item[field] for field in ('signature_value', 'signer_public_key', 'document_hash_at_signing')
+            })))
+
+    verdicts = verify_parallel(
+        (signature.signer_public_key, signature.signature_value, signature.document_hash_at_signing)
+        for _, signature in new
+    )
+    for (_, signature), verified in zip(new, verdicts):
+        signature.verified = verified
+    with transaction.atomic():
+        # bulk_create() skips save() and its signals: conflicts with signatures
+        # made meanwhile are ignored here, then looked up, and the audit log,
+        # list ETags and signing progress are updated by hand.
+        DigitalSignature.objects.bulk_create([signature for _, signature in new], ignore_conflicts=True)
+        inserted = set(DigitalSignature.objects.filter(pk__in=[signature.pk for _, signature in new]).values_list('pk', flat=True))
+        created = [signature for _, signature in new if signature.pk in inserted]
+        if created:
+            record_many('create', created)
+            ResourceVersion.bump(DigitalSignature._meta.label_lower)
+            refresh_signing_requirements(SigningRequirement.objects.filter(
+                party=request.user, document_id__in={signature.document_id for signature in created}
+            ))
+    for result, signature in new:
+        if signature.pk in inserted:
+            result.update(status='created', id=signature.pk, verified=signature.verified)
+        else:
+            result.update(status='already_signed', id=DigitalSignature.objects.filter(
+                signer=request.user, document_id=signature.document_id, signature_value=signature.signature_value
+            ).values_list('pk', flat=True).first())
+
+    summary = {'total': len(results)}
+    for result in results:
+        summary[result['status']] = summary.get(result['status'], 0) + 1
+    return Response({'results': results, 'summary': summary})
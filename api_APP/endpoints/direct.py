@@ -0,0 +1,206 @@
+from django.utils import timezone
+
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..cache import get_property_by_ipfs_hash
+from ..downloads import DIRECT_TRANSFER_URL_EXPIRY, download_filename, serve_file
+from ..models import Document, Property
+from ..renderers import FileDownloadRenderer, ORJSONRenderer
+from ..serializers import DirectUploadSessionSerializer
+from ..storage import DirectTransferUnsupported, media_storage
+from .uploads import UPLOAD_SESSION_TTL
+
+
+# --- Common OpenAPI Responses (optional, for consistency) ---
+RESPONSE_400_BAD_REQUEST = openapi.Response(description="Bad Request - Invalid data provided")
+RESPONSE_401_UNAUTHORIZED = openapi.Response(description="Unauthorized - Authentication credentials were not provided or are invalid")
+RESPONSE_404_NOT_FOUND = openapi.Response(description="Resource not found, or it has no file")
+RESPONSE_501_NOT_IMPLEMENTED = openapi.Response(description="Not Implemented - The media storage does not support presigned URLs")
+
+DOWNLOAD_URL_RESPONSE = openapi.Response(
+    description="A presigned URL to GET the file from storage",
+    schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+        'url': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_URI),
+        'expires_in': openapi.Schema(type=openapi.TYPE_INTEGER, description="Seconds the URL stays valid"),
+    })
+)
+
+
+def _error(detail, status_code):
+    # Explicit type: FileDownloadRenderer would label the body with whatever the client accepts.
+    return Response({'detail': detail}, status=status_code, content_type='application/json')
+
+
+def _unsupported(e):
+    return Response({'detail': str(e)}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+
+def _download_url(field_file, stem):
+    filename, _ = download_filename(field_file, stem)
+    url = media_storage.presigned_download(field_file.name, DIRECT_TRANSFER_URL_EXPIRY, filename=filename)
+    return Response({'url': url, 'expires_in': DIRECT_TRANSFER_URL_EXPIRY})
+
+
+# --- Direct-to-Storage Views ---
+
+@swagger_auto_schema(
+    method='post',
+    operation_id='create_direct_upload',
+    operation_description=(
+        "Start an upload that goes straight to S3. PUT the file to 'upload.url' with the listed headers, "
+        "then POST to /uploads/<id>/finalize/ with the remaining Document or Property fields; the file's size "
+        "and sha256 are checked before the row is created."
+    ),
+    tags=['Uploads'],
+    request_body=DirectUploadSessionSerializer,
+    responses={
+        201: openapi.Response(description="The upload session and where to PUT the file"),
+        400: RESPONSE_400_BAD_REQUEST,
+        401: RESPONSE_401_UNAUTHORIZED,
+        501: RESPONSE_501_NOT_IMPLEMENTED,
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def direct_upload_create(request):
+    """
+    Create a direct-to-storage upload session with a presigned PUT URL.
+    """
+    serializer = DirectUploadSessionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    data = serializer.validated_data
+    try:
+        name, url, headers = media_storage.presigned_upload(
+            data['sha256'], data['length'], data.get('content_type', ''), DIRECT_TRANSFER_URL_EXPIRY
+        )
+    except DirectTransferUnsupported as e:
+        return _unsupported(e)
+    session = serializer.save(owner=request.user, parts=[name], expires_at=timezone.now() + UPLOAD_SESSION_TTL)
+    return Response({
+        **DirectUploadSessionSerializer(session).data,
+        'upload': {'method': 'PUT', 'url': url, 'headers': headers, 'expires_in': DIRECT_TRANSFER_URL_EXPIRY},
+        'finalize': request.build_absolute_uri(f'/uploads/{session.pk}/finalize/'),
+    }, status=status.HTTP_201_CREATED)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_id='document_download_url',
+    operation_description="A short-lived URL from which the document file is downloaded straight from S3.",
+    tags=['Documents'],
+    responses={200: DOWNLOAD_URL_RESPONSE, 401: RESPONSE_401_UNAUTHORIZED, 404: RESPONSE_404_NOT_FOUND, 501: RESPONSE_501_NOT_IMPLEMENTED}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def document_download_url(request, pk):
+    """
+    Presigned download URL of a document's file.
+    """
+    document = Document.objects.filter(pk=pk).first()
+    if document is None or not document.document_file:
+        return Response({'detail': 'Document not found.'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        return _download_url(document.document_file, f'{document.document_type}-{document.pk}')
+    except DirectTransferUnsupported as e:
+        return _unsupported(e)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_id='property_document_download_url',
+    operation_description="A short-lived URL from which the proof of ownership document is downloaded straight from S3.",
+    tags=['Properties'],
+    responses={200: DOWNLOAD_URL_RESPONSE, 401: RESPONSE_401_UNAUTHORIZED, 404: RESPONSE_404_NOT_FOUND, 501: RESPONSE_501_NOT_IMPLEMENTED}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def property_document_download_url(request, ipfs):
+    """
+    Presigned download URL of a property's proof of ownership document.
+    """
+    try:
+        property_obj = get_property_by_ipfs_hash(ipfs)
+    except Property.DoesNotExist:
+        return Response({'detail': 'Property not found.'}, status=status.HTTP_404_NOT_FOUND)
+    if not property_obj.proof_of_ownership_document:
+        return Response({'detail': 'This property has no proof of ownership document.'}, status=status.HTTP_404_NOT_FOUND)
+    try:
+        return _download_url(property_obj.proof_of_ownership_document, f'proof-of-ownership-{property_obj.pk}')
+    except DirectTransferUnsupported as e:
+        return _unsupported(e)
+
+
+# --- Download Views ---
+
+FILE_DOWNLOAD_RESPONSES = {
+    200: openapi.Response(description="The file"),
+    206: openapi.Response(description="Partial Content - The requested Range of the file"),
+    302: openapi.Response(description="Found - Download it from the presigned storage URL in Location"),
+    304: openapi.Response(description="Not Modified"),
+    401: RESPONSE_401_UNAUTHORIZED,
+    404: RESPONSE_404_NOT_FOUND,
+    416: openapi.Response(description="Range Not Satisfiable"),
+}
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_id='download_document',
+    operation_description=(
+        "Download the document file. Supports Range, If-Range and If-None-Match; depending on the deployment "
+        "the bytes come from the front proxy, a redirect to S3, or the app server."
+    ),
+    tags=['Documents'],
+    responses=FILE_DOWNLOAD_RESPONSES
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer, FileDownloadRenderer])
+def document_download(request, pk):
+    """
+    Download a document's file.
+    """
+    document = Document.objects.filter(pk=pk).first()
+    if document is None or not document.document_file:
+        return _error('Document not found.', status.HTTP_404_NOT_FOUND)
+    try:
+        return serve_file(request, document.document_file, f'{document.document_type}-{document.pk}')
+    except FileNotFoundError:
+        # The row outlived its file in storage.
+        return _error('Document not found.', status.HTTP_404_NOT_FOUND)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_id='download_property_document',
+    operation_description=(
+        "Download the proof of ownership document. Supports Range, If-Range and If-None-Match; depending on "
+        "the deployment the bytes come from the front proxy, a redirect to S3, or the app server."
+    ),
+    tags=['Properties'],
+    responses=FILE_DOWNLOAD_RESPONSES
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer, FileDownloadRenderer])
+def property_document_download(request, ipfs):
+    """
+    Download a property's proof of ownership document.
+    """
+    try:
+        property_obj = get_property_by_ipfs_hash(ipfs)
+    except Property.DoesNotExist:
+        return _error('Property not found.', status.HTTP_404_NOT_FOUND)
+    if not property_obj.proof_of_ownership_document:
+        return _error('This property has no proof of ownership document.', status.HTTP_404_NOT_FOUND)
+    try:
+        return serve_file(request, property_obj.proof_of_ownership_document, f'proof-of-ownership-{property_obj.pk}')
+    except FileNotFoundError:
+        return _error('This property has no proof of ownership document.', status.HTTP_404_NOT_FOUND)
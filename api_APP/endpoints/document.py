@@ -13,6 +13,9 @@ from rest_framework.decorators import api_view, permission_classes, parser_class
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny # AllowAny for public endpoints
 from rest_framework.parsers import MultiPartParser, FormParser # For file uploads
+from ..parsers import ORJSONParser, MessagePackParser
+from ..schema import UploadAutoSchema
+from ..uploadhandlers import discard_stored_uploads, stream_uploads
 
 
 from rest_framework.authtoken.models import Token
@@ -22,6 +25,8 @@ from django.http import HttpResponseBadRequest, JsonResponse
 from email.mime.multipart import MIMEMultipart
 
 from ..serializers import *
+from ..pagination import KeysetPagination, PAGINATION_PARAMETERS
+from ..conditional import list_validators, not_modified, object_validators, with_validators
 
 
 User = get_user_model()
@@ -38,46 +43,57 @@ RESPONSE_404_NOT_FOUND = openapi.Response(description="Resource not found")
 @swagger_auto_schema(
     method='get',
     operation_id='list_documents',
-    operation_description="Retrieve a list of all documents. Can be filtered by 'property_id'.",
+    operation_description="Retrieve a page of documents ordered by upload date. Can be filtered by 'property_id'.",
     tags=['Documents'],
     manual_parameters=[
         openapi.Parameter('property_id', openapi.IN_QUERY, description="Filter documents by Property UUID", type=openapi.TYPE_STRING),
-    ],
+    ] + PAGINATION_PARAMETERS + SPARSE_FIELDSET_PARAMETERS,
     responses={200: DocumentSerializer(many=True), 401: RESPONSE_401_UNAUTHORIZED}
 )
 @swagger_auto_schema(
     method='post',
+    auto_schema=UploadAutoSchema,
     operation_id='create_document',
-    operation_description="Upload a new document. 'property' (Property UUID) must be provided. 'uploaded_by' is set automatically.",
+    operation_description="Upload a new document. 'property' (Property UUID) must be provided; 'uploaded_by' (UserProfile ID) is optional. 'document_hash' may be omitted: it is computed from the uploaded file, and a supplied value must match it.",
     tags=['Documents'],
-    request_body=DocumentSerializer, # uploaded_by will be ignored from request body and set to request.user
+    request_body=DocumentSerializer,
     responses={
         201: DocumentSerializer,
         400: RESPONSE_400_BAD_REQUEST,
         401: RESPONSE_401_UNAUTHORIZED
     }
 )
+@stream_uploads(Document.document_file.field) # Hash document_file while it is written to storage
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
-@parser_classes([MultiPartParser, FormParser]) # For document_file
+@parser_classes([MultiPartParser, FormParser, ORJSONParser, MessagePackParser]) # Multipart for document_file; JSON/MessagePack for metadata-only updates
 def document_list_create(request):
     """
     List all documents or create a new one.
-    'uploaded_by' is automatically set to the authenticated user on creation.
+    'document_hash' is filled in from the uploaded file's SHA-256.
     """
     if request.method == 'GET':
-        documents = Document.objects.all()
+        validators = list_validators(request, Document, DocumentSerializer)
+        cached = not_modified(request, *validators)
+        if cached:
+            return cached
+        documents = DocumentSerializer.setup_eager_loading(Document.objects.all(), request)
         property_id = request.query_params.get('property_id')
         if property_id:
             documents = documents.filter(property_id=property_id)
+        paginator = KeysetPagination(ordering=('upload_date', 'id'))
+        documents = paginator.paginate_queryset(documents, request)
         serializer = DocumentSerializer(documents, many=True, context={'request': request})
-        return Response(serializer.data)
+        return with_validators(paginator.get_paginated_response(serializer.data), *validators)
 
     elif request.method == 'POST':
         serializer = DocumentSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save(uploaded_by=request.user)
+            # uploaded_by is a UserProfile, which auth users are not linked to;
+            # assigning request.user raised ValueError. Keep the optional profile ID sent by the client.
+            serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
+        discard_stored_uploads(request.FILES)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @swagger_auto_schema(
@@ -85,6 +101,7 @@ def document_list_create(request):
     operation_id='retrieve_document',
     operation_description="Retrieve a specific document by its UUID.",
     tags=['Documents'],
+    manual_parameters=SPARSE_FIELDSET_PARAMETERS,
     responses={
         200: DocumentSerializer,
         401: RESPONSE_401_UNAUTHORIZED,
@@ -93,6 +110,7 @@ def document_list_create(request):
 )
 @swagger_auto_schema(
     method='put',
+    auto_schema=UploadAutoSchema,
     operation_id='update_document',
     operation_description="Update a specific document by its UUID. 'uploaded_by' field is generally not updatable.",
     tags=['Documents'],
@@ -119,13 +137,16 @@ def document_list_create(request):
 )
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
-@parser_classes([MultiPartParser, FormParser]) # For document_file
+@parser_classes([MultiPartParser, FormParser, ORJSONParser, MessagePackParser]) # Multipart for document_file; JSON/MessagePack for metadata-only updates
 def document_detail_update_delete(request, pk): # pk is Document UUID
     """
     Retrieve, update or delete a document instance.
     """
     try:
-        document = Document.objects.get(pk=pk)
+        # uploaded_by is always joined for the permission check below.
+        document = DocumentSerializer.setup_eager_loading(
+            Document.objects.select_related('uploaded_by'), request
+        ).get(pk=pk)
     except Document.DoesNotExist:
         return Response({'detail': 'Document not found.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -133,8 +154,12 @@ def document_detail_update_delete(request, pk): # pk is Document UUID
     can_modify = (request.user == document.uploaded_by or request.user.is_staff)
 
     if request.method == 'GET':
+        validators = object_validators(request, document, DocumentSerializer)
+        cached = not_modified(request, *validators)
+        if cached:
+            return cached
         serializer = DocumentSerializer(document, context={'request': request})
-        return Response(serializer.data)
+        return with_validators(Response(serializer.data), *validators)
 
     elif request.method == 'PUT':
         if not can_modify:
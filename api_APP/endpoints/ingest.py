@@ -0,0 +1,80 @@
+from django.db import IntegrityError
+
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..models import Document
+from ..parsers import Base64FileJSONParser
+from ..serializers import DocumentSerializer
+
+
+# --- Common OpenAPI Responses (optional, for consistency) ---
+RESPONSE_400_BAD_REQUEST = openapi.Response(description="Bad Request - Invalid data or base64 content")
+RESPONSE_401_UNAUTHORIZED = openapi.Response(description="Unauthorized - Authentication credentials were not provided or are invalid")
+RESPONSE_409_CONFLICT = openapi.Response(description="Conflict - The document is already registered")
+
+BASE64_DOCUMENT_REQUEST = openapi.Schema(
+    type=openapi.TYPE_OBJECT,
+    required=['property', 'document_type', 'content'],
+    properties={
+        'property': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+        'document_type': openapi.Schema(type=openapi.TYPE_STRING),
+        'document_hash': openapi.Schema(type=openapi.TYPE_STRING, description="Optional; checked against the SHA-256 of the decoded file"),
+        'uploaded_by': openapi.Schema(type=openapi.TYPE_INTEGER),
+        'file_name': openapi.Schema(type=openapi.TYPE_STRING),
+        'content_type': openapi.Schema(type=openapi.TYPE_STRING, description="Defaults to the data URI's type or a guess from file_name"),
+        'content': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_BASE64, description="The file, base64-encoded or as a data: URI"),
+    }
+)
+
+
+class DocumentBase64Parser(Base64FileJSONParser):
+    file_field = Document.document_file.field
+
+
+# --- Ingestion Views ---
+
+@swagger_auto_schema(
+    method='post',
+    operation_id='ingest_base64_document',
+    operation_description=(
+        "Create a document from JSON carrying the file as base64 in 'content', as sent by integration partners. "
+        "The file is decoded and stored while the request is read."
+    ),
+    tags=['Documents'],
+    request_body=BASE64_DOCUMENT_REQUEST,
+    responses={
+        201: DocumentSerializer,
+        400: RESPONSE_400_BAD_REQUEST,
+        401: RESPONSE_401_UNAUTHORIZED,
+        409: RESPONSE_409_CONFLICT,
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([DocumentBase64Parser])
+def document_ingest_base64(request):
+    """
+    Create a document from a base64-encoded file.
+    """
+    data = dict(request.data)
+    upload = data.pop(DocumentBase64Parser.file_key, None)
+    data.pop(DocumentBase64Parser.file_name_key, None)
+    data.pop(DocumentBase64Parser.content_type_key, None)
+    data['document_file'] = upload
+    serializer = DocumentSerializer(data=data, context={'request': request})
+    if not serializer.is_valid():
+        if upload is not None:
+            upload.discard()
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        serializer.save()
+    except IntegrityError:
+        upload.discard()
+        return Response({'document_hash': ['This document has already been uploaded.']}, status=status.HTTP_409_CONFLICT)
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,48 @@
+from rest_framework.response import Response
+
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+
+from ..ipfs.pinning import queue_stats
+
+
+# --- Common OpenAPI Responses (optional, for consistency) ---
+RESPONSE_401_UNAUTHORIZED = openapi.Response(description="Unauthorized - Authentication credentials were not provided or are invalid")
+RESPONSE_403_FORBIDDEN = openapi.Response(description="Forbidden - You do not have permission to perform this action")
+
+
+# --- IPFS Views ---
+
+@swagger_auto_schema(
+    method='get',
+    operation_id='pin_queue_status',
+    operation_description="Depth of the IPFS pinning queue per status and the age (lag) of the oldest queued job. Admin only.",
+    tags=['IPFS'],
+    responses={
+        200: openapi.Response(
+            description="Queue statistics",
+            schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                'queued': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'running': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'failed': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'done': openapi.Schema(type=openapi.TYPE_INTEGER),
+                'lag_seconds': openapi.Schema(type=openapi.TYPE_NUMBER),
+            })
+        ),
+        401: RESPONSE_401_UNAUTHORIZED,
+        403: RESPONSE_403_FORBIDDEN,
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def pin_queue_status(request):
+    """
+    Report IPFS pinning queue depth and lag.
+    """
+    if not request.user.is_staff:
+        return Response({'detail': 'You do not have permission to view the pin queue.'}, status=status.HTTP_403_FORBIDDEN)
+    return Response(queue_stats())
@@ -22,6 +22,7 @@ from django.http import HttpResponseBadRequest, JsonResponse
 from email.mime.multipart import MIMEMultipart
 
 from ..serializers import *
+from ..pagination import KeysetPagination, PAGINATION_PARAMETERS
 
 
 User = get_user_model()
@@ -38,8 +39,9 @@ RESPONSE_404_NOT_FOUND = openapi.Response(description="Resource not found")
 @swagger_auto_schema(
     method='get',
     operation_id='list_user_profiles',
-    operation_description="Retrieve a list of all user profiles.",
+    operation_description="Retrieve a page of user profiles.",
     tags=['User Profiles'],
+    manual_parameters=PAGINATION_PARAMETERS + SPARSE_FIELDSET_PARAMETERS,
     responses={
         200: UserProfileSerializer(many=True),
         401: RESPONSE_401_UNAUTHORIZED,
@@ -65,9 +67,10 @@ def user_profile_list_create(request):
     For POST, 'user' (ID of an existing Django User) must be provided as it's the PK.
     """
     if request.method == 'GET':
-        profiles = UserProfile.objects.all()
+        paginator = KeysetPagination(ordering=('id',))
+        profiles = paginator.paginate_queryset(UserProfile.objects.all(), request)
         serializer = UserProfileSerializer(profiles, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
     elif request.method == 'POST':
         serializer = UserProfileSerializer(data=request.data, context={'request': request})
@@ -90,6 +93,7 @@ def user_profile_list_create(request):
     operation_id='retrieve_user_profile',
     operation_description="Retrieve a specific user profile by user ID (which is the profile's PK).",
     tags=['User Profiles'],
+    manual_parameters=SPARSE_FIELDSET_PARAMETERS,
     responses={
         200: UserProfileSerializer,
         401: RESPONSE_401_UNAUTHORIZED,
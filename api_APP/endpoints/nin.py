@@ -22,6 +22,7 @@ from django.http import HttpResponseBadRequest, JsonResponse
 from email.mime.multipart import MIMEMultipart
 
 from ..serializers import *
+from ..pagination import KeysetPagination, PAGINATION_PARAMETERS
 
 
 User = get_user_model()
@@ -39,8 +40,9 @@ RESPONSE_404_NOT_FOUND = openapi.Response(description="Resource not found")
 @swagger_auto_schema(
     method='get',
     operation_id='list_nin_info_records',
-    operation_description="Retrieve a list of all National Identification Number (NIN) records. Access might be restricted.",
+    operation_description="Retrieve a page of National Identification Number (NIN) records ordered by name. Access might be restricted.",
     tags=['NIN Information'],
+    manual_parameters=PAGINATION_PARAMETERS + SPARSE_FIELDSET_PARAMETERS,
     responses={
         200: NINInfoSerializer(many=True),
         401: RESPONSE_401_UNAUTHORIZED,
@@ -72,9 +74,10 @@ def nin_info_list_create(request):
         # For example, if only admins can list:
         # if not request.user.is_staff:
         #     return Response({'detail': 'You do not have permission to list NIN records.'}, status=status.HTTP_403_FORBIDDEN)
-        nin_records = NINInfo.objects.all()
+        paginator = KeysetPagination(ordering=('last_name', 'first_name', 'id'))
+        nin_records = paginator.paginate_queryset(NINInfo.objects.all(), request)
         serializer = NINInfoSerializer(nin_records, many=True, context={'request': request})
-        return Response(serializer.data)
+        return paginator.get_paginated_response(serializer.data)
 
     elif request.method == 'POST':
         # Restrict POST to admin users or users with specific permissions
@@ -92,6 +95,7 @@ def nin_info_list_create(request):
     operation_id='retrieve_nin_info_record',
     operation_description="Retrieve a specific NIN record by its internal ID.",
     tags=['NIN Information'],
+    manual_parameters=SPARSE_FIELDSET_PARAMETERS,
     responses={
         200: NINInfoSerializer,
         401: RESPONSE_401_UNAUTHORIZED,
@@ -13,6 +13,9 @@ from rest_framework.decorators import api_view, permission_classes, parser_class
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny # AllowAny for public endpoints
 from rest_framework.parsers import MultiPartParser, FormParser # For file uploads
+from ..parsers import ORJSONParser, MessagePackParser
+from ..schema import UploadAutoSchema
+from ..uploadhandlers import discard_stored_uploads, stream_uploads
 
 
 from rest_framework.authtoken.models import Token
@@ -22,6 +25,11 @@ from django.http import HttpResponseBadRequest, JsonResponse
 from email.mime.multipart import MIMEMultipart
 
 from ..serializers import *
+from ..pagination import KeysetPagination, PAGINATION_PARAMETERS
+from ..fastserializers import paginated_response
+from ..cache import get_fresh_property, get_property_by_ipfs_hash
+from ..conditional import conditional_request, list_validators, not_modified, object_validators, with_validators
+from django.db import IntegrityError, transaction as db_transaction
 
 
 User = get_user_model()
@@ -38,12 +46,14 @@ RESPONSE_404_NOT_FOUND = openapi.Response(description="Resource not found")
 @swagger_auto_schema(
     method='get',
     operation_id='list_properties',
-    operation_description="Retrieve a list of all properties.",
+    operation_description="Retrieve a page of properties ordered by creation time. Follow 'next'/'previous' to move between pages.",
     tags=['Properties'],
+    manual_parameters=PAGINATION_PARAMETERS + SPARSE_FIELDSET_PARAMETERS,
     responses={200: PropertySerializer(many=True), 401: RESPONSE_401_UNAUTHORIZED}
 )
 @swagger_auto_schema(
     method='post',
+    auto_schema=UploadAutoSchema,
     operation_id='create_property',
     operation_description="Create a new property. 'current_owner' should be a valid user ID.",
     tags=['Properties'],
@@ -51,27 +61,42 @@ RESPONSE_404_NOT_FOUND = openapi.Response(description="Resource not found")
     responses={
         201: PropertySerializer,
         400: RESPONSE_400_BAD_REQUEST,
-        401: RESPONSE_401_UNAUTHORIZED
+        401: RESPONSE_401_UNAUTHORIZED,
+        409: openapi.Response(description="Conflict - The proof of ownership document is already registered for another property.")
     }
 )
+@stream_uploads(Property.proof_of_ownership_document.field, cid_fields=['proof_of_ownership_document']) # Hash and CID while writing to storage
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
-@parser_classes([MultiPartParser, FormParser]) # For proof_of_ownership_document
+@parser_classes([MultiPartParser, FormParser, ORJSONParser, MessagePackParser]) # Multipart for proof_of_ownership_document; JSON/MessagePack for metadata-only updates
 def property_list_create(request):
     """
     List all properties or create a new one.
     For POST, 'current_owner' (User ID) must be provided.
     """
     if request.method == 'GET':
-        properties = Property.objects.all()
-        serializer = PropertySerializer(properties, many=True, context={'request': request})
-        return Response(serializer.data)
+        validators = list_validators(request, Property, PropertySerializer)
+        cached = not_modified(request, *validators)
+        if cached:
+            return cached
+        paginator = KeysetPagination(ordering=('created_at', 'id'))
+        return with_validators(
+            paginated_response(PropertySerializer, Property.objects.all(), paginator, request), *validators
+        )
 
     elif request.method == 'POST':
         serializer = PropertySerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            serializer.save() # Assumes current_owner ID is in request.data
+            try:
+                serializer.save() # Assumes current_owner ID is in request.data
+            except IntegrityError:
+                discard_stored_uploads(request.FILES)
+                return Response(
+                    {'proof_of_ownership_document': ['This document is already registered for another property.']},
+                    status=status.HTTP_409_CONFLICT
+                )
             return Response(serializer.data, status=status.HTTP_201_CREATED)
+        discard_stored_uploads(request.FILES)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 @swagger_auto_schema(
@@ -79,6 +104,7 @@ def property_list_create(request):
     operation_id='retrieve_property',
     operation_description="Retrieve a specific property by its UUID.",
     tags=['Properties'],
+    manual_parameters=SPARSE_FIELDSET_PARAMETERS,
     responses={
         200: PropertySerializer,
         401: RESPONSE_401_UNAUTHORIZED,
@@ -87,6 +113,7 @@ def property_list_create(request):
 )
 @swagger_auto_schema(
     method='put',
+    auto_schema=UploadAutoSchema,
     operation_id='update_property',
     operation_description="Update a specific property by its UUID.",
     tags=['Properties'],
@@ -114,43 +141,69 @@ def property_list_create(request):
 )
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated])
-@parser_classes([MultiPartParser, FormParser]) # For proof_of_ownership_document
+@parser_classes([MultiPartParser, FormParser, ORJSONParser, MessagePackParser]) # Multipart for proof_of_ownership_document; JSON/MessagePack for metadata-only updates
 def property_detail_update_delete(request, ipfs): # pk is Property UUID
     """
     Retrieve, update or delete a property instance.
     """
-    try:
-        property_obj = Property.objects.get(ipfs_hash=ipfs)
-    except Property.DoesNotExist:
-        return Response({'detail': 'Property not found.'}, status=status.HTTP_404_NOT_FOUND)
-
-    # Permission check: Only current owner or admin can modify/delete
-    can_modify = (request.user == property_obj.current_owner or request.user.is_staff)
-
     if request.method == 'GET':
+        try:
+            property_obj = get_property_by_ipfs_hash(ipfs)
+            if conditional_request(request):
+                # Revalidation must not answer 304 from a copy another worker made stale.
+                property_obj = get_fresh_property(property_obj)
+        except Property.DoesNotExist:
+            return Response({'detail': 'Property not found.'}, status=status.HTTP_404_NOT_FOUND)
+        validators = object_validators(request, property_obj, PropertySerializer)
+        cached = not_modified(request, *validators)
+        if cached:
+            return cached
         serializer = PropertySerializer(property_obj, context={'request': request})
         print(serializer.data)
-        return Response(serializer.data)
-
-    elif request.method == 'PUT':
-        if not can_modify:
-            return Response({'detail': 'You do not have permission to modify this property.'}, status=status.HTTP_403_FORBIDDEN)
-        
-        serializer = PropertySerializer(property_obj, data=request.data, partial=True, context={'request': request})
-        if serializer.is_valid():
-            serializer.save()
-            print(serializer.data)
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return with_validators(Response(serializer.data), *validators)
 
-    elif request.method == 'DELETE':
-        if not can_modify:
-            return Response({'detail': 'You do not have permission to delete this property.'}, status=status.HTTP_403_FORBIDDEN)
+    # Writes work on the current row, locked, never on the cached copy: saving
+    # a stale copy would overwrite concurrent edits or resurrect a deleted row.
+    with db_transaction.atomic():
         try:
-            property_obj.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except models.ProtectedError as e:
-             return Response(
-                 {'detail': f'Cannot delete property: it is referenced by other objects (e.g., Transactions). {e}'},
-                 status=status.HTTP_409_CONFLICT
-             )
\ No newline at end of file
+            property_obj = Property.objects.select_for_update(of=('self',)).select_related('current_owner').get(ipfs_hash=ipfs)
+        except Property.DoesNotExist:
+            discard_stored_uploads(request.FILES)
+            return Response({'detail': 'Property not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        # Permission check: Only current owner or admin can modify/delete
+        can_modify = (request.user == property_obj.current_owner or request.user.is_staff)
+
+        if request.method == 'PUT':
+            if not can_modify:
+                discard_stored_uploads(request.FILES)
+                return Response({'detail': 'You do not have permission to modify this property.'}, status=status.HTTP_403_FORBIDDEN)
+
+            serializer = PropertySerializer(property_obj, data=request.data, partial=True, context={'request': request})
+            if serializer.is_valid():
+                try:
+                    with db_transaction.atomic():
+                        serializer.save()
+                except IntegrityError:
+                    discard_stored_uploads(request.FILES)
+                    return Response(
+                        {'proof_of_ownership_document': ['This document is already registered for another property.']},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                print(serializer.data)
+                return Response(serializer.data)
+            discard_stored_uploads(request.FILES)
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        elif request.method == 'DELETE':
+            if not can_modify:
+                return Response({'detail': 'You do not have permission to delete this property.'}, status=status.HTTP_403_FORBIDDEN)
+            try:
+                with db_transaction.atomic():
+                    property_obj.delete()
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            except models.ProtectedError as e:
+                 return Response(
+                     {'detail': f'Cannot delete property: it is referenced by other objects (e.g., Transactions). {e}'},
+                     status=status.HTTP_409_CONFLICT
+                 )
\ No newline at end of file
@@ -0,0 +1,173 @@
+from django.db import IntegrityError, transaction as db_transaction
+
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..models import SigningRequirement, Transaction
+from ..serializers import SigningRequirementSerializer
+from ..signing import requirement_status
+
+
+# --- Common OpenAPI Responses (optional, for consistency) ---
+RESPONSE_400_BAD_REQUEST = openapi.Response(description="Bad Request - Invalid data provided")
+RESPONSE_401_UNAUTHORIZED = openapi.Response(description="Unauthorized - Authentication credentials were not provided or are invalid")
+RESPONSE_403_FORBIDDEN = openapi.Response(description="Forbidden - Only the seller, the buyer or an admin may change the requirements")
+RESPONSE_404_NOT_FOUND = openapi.Response(description="Resource not found")
+
+SIGNING_STATUS_RESPONSE = openapi.Response(
+    description="Signatures collected and outstanding, per party",
+    schema=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+        'transaction': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+        'required': openapi.Schema(type=openapi.TYPE_INTEGER),
+        'collected': openapi.Schema(type=openapi.TYPE_INTEGER),
+        'outstanding': openapi.Schema(type=openapi.TYPE_INTEGER),
+        'complete': openapi.Schema(type=openapi.TYPE_BOOLEAN, description="There are requirements and all are fulfilled"),
+        'parties': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+            'party': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'username': openapi.Schema(type=openapi.TYPE_STRING),
+            'required': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'collected': openapi.Schema(type=openapi.TYPE_INTEGER),
+            'outstanding_documents': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                'document': openapi.Schema(type=openapi.TYPE_STRING, format=openapi.FORMAT_UUID),
+                'document_type': openapi.Schema(type=openapi.TYPE_STRING),
+            })),
+        })),
+    })
+)
+
+
+def _can_modify(user, transaction):
+    return user.pk in (transaction.seller_id, transaction.buyer_id) or user.is_staff
+
+
+# --- Signing Requirement Views ---
+
+@swagger_auto_schema(
+    method='get',
+    operation_id='list_signing_requirements',
+    operation_description="Who must sign which documents of the transaction, and whether they have.",
+    tags=['Transactions'],
+    responses={200: SigningRequirementSerializer(many=True), 401: RESPONSE_401_UNAUTHORIZED, 404: RESPONSE_404_NOT_FOUND}
+)
+@swagger_auto_schema(
+    method='post',
+    operation_id='create_signing_requirements',
+    operation_description=(
+        "Require a party (user ID) to sign a document of the transaction's property. Send one object, or a "
+        "list to add several at once. Only the seller, the buyer or an admin may do this."
+    ),
+    tags=['Transactions'],
+    request_body=SigningRequirementSerializer,
+    responses={
+        201: SigningRequirementSerializer(many=True),
+        400: RESPONSE_400_BAD_REQUEST,
+        401: RESPONSE_401_UNAUTHORIZED,
+        403: RESPONSE_403_FORBIDDEN,
+        404: RESPONSE_404_NOT_FOUND,
+        409: openapi.Response(description="Conflict - The requirement was added meanwhile"),
+    }
+)
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def signing_requirement_list_create(request, pk):
+    """
+    List or add the signing requirements of a transaction.
+    """
+    transaction = Transaction.objects.filter(pk=pk).first()
+    if transaction is None:
+        return Response({'detail': 'Transaction not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'GET':
+        requirements = SigningRequirement.objects.filter(transaction=transaction).order_by('created_at', 'id')
+        return Response(SigningRequirementSerializer(requirements, many=True).data)
+
+    if not _can_modify(request.user, transaction):
+        return Response({'detail': 'You do not have permission to modify this transaction.'}, status=status.HTTP_403_FORBIDDEN)
+    many = isinstance(request.data, list)
+    serializer = SigningRequirementSerializer(data=request.data, many=many, context={'transaction': transaction})
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        with db_transaction.atomic():
+            serializer.save(transaction=transaction)
+    except IntegrityError:
+        # Added by a concurrent request between validation and insert.
+        return Response(
+            {'detail': 'This party is already required to sign this document.'}, status=status.HTTP_409_CONFLICT
+        )
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@swagger_auto_schema(
+    method='delete',
+    operation_id='delete_signing_requirement',
+    operation_description="Drop a signing requirement. Only the seller, the buyer or an admin may do this.",
+    tags=['Transactions'],
+    responses={
+        204: openapi.Response(description="Signing requirement deleted successfully"),
+        401: RESPONSE_401_UNAUTHORIZED,
+        403: RESPONSE_403_FORBIDDEN,
+        404: RESPONSE_404_NOT_FOUND,
+    }
+)
+@api_view(['DELETE'])
+@permission_classes([IsAuthenticated])
+def signing_requirement_delete(request, pk, requirement_pk):
+    """
+    Delete a signing requirement of a transaction.
+    """
+    requirement = SigningRequirement.objects.select_related('transaction').filter(
+        pk=requirement_pk, transaction_id=pk
+    ).first()
+    if requirement is None:
+        return Response({'detail': 'Signing requirement not found.'}, status=status.HTTP_404_NOT_FOUND)
+    if not _can_modify(request.user, requirement.transaction):
+        return Response({'detail': 'You do not have permission to modify this transaction.'}, status=status.HTTP_403_FORBIDDEN)
+    requirement.delete()
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_id='transaction_signing_status',
+    operation_description=(
+        "Signatures collected and outstanding for the transaction, computed from the signatures themselves. "
+        "A requirement counts as signed once the party has a verified signature of the document's current "
+        "hash. The transaction's signatures_required and signatures_collected fields hold the same totals."
+    ),
+    tags=['Transactions'],
+    responses={200: SIGNING_STATUS_RESPONSE, 401: RESPONSE_401_UNAUTHORIZED, 404: RESPONSE_404_NOT_FOUND}
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def transaction_signing_status(request, pk):
+    """
+    Signature collection status of a transaction.
+    """
+    rows = requirement_status(pk)
+    if not rows and not Transaction.objects.filter(pk=pk).exists():
+        return Response({'detail': 'Transaction not found.'}, status=status.HTTP_404_NOT_FOUND)
+    parties = {}
+    for document_id, document_type, party_id, username, signed in rows:
+        party = parties.setdefault(party_id, {
+            'party': party_id, 'username': username, 'required': 0, 'collected': 0, 'outstanding_documents': [],
+        })
+        party['required'] += 1
+        if signed:
+            party['collected'] += 1
+        else:
+            party['outstanding_documents'].append({'document': document_id, 'document_type': document_type})
+    collected = sum(party['collected'] for party in parties.values())
+    return Response({
+        'transaction': pk,
+        'required': len(rows),
+        'collected': collected,
+        'outstanding': len(rows) - collected,
+        'complete': bool(rows) and collected == len(rows),
+        'parties': list(parties.values()),
+    })
@@ -22,6 +22,9 @@ from django.http import HttpResponseBadRequest, JsonResponse
 from email.mime.multipart import MIMEMultipart
 
 from ..serializers import *
+from ..pagination import KeysetPagination, PAGINATION_PARAMETERS
+from ..fastserializers import paginated_response
+from ..conditional import list_validators, not_modified, object_validators, with_validators
 
 
 User = get_user_model()
@@ -39,8 +42,9 @@ RESPONSE_404_NOT_FOUND = openapi.Response(description="Resource not found")
 @swagger_auto_schema(
     method='get',
     operation_id='list_transactions',
-    operation_description="Retrieve a list of all transactions.",
+    operation_description="Retrieve a page of transactions ordered by creation time.",
     tags=['Transactions'],
+    manual_parameters=PAGINATION_PARAMETERS + SPARSE_FIELDSET_PARAMETERS,
     responses={200: TransactionSerializer(many=True), 401: RESPONSE_401_UNAUTHORIZED}
 )
 @swagger_auto_schema(
@@ -62,13 +66,19 @@ def transaction_list_create(request):
     List all transactions or create a new one.
     """
     if request.method == 'GET':
+        validators = list_validators(request, Transaction, TransactionSerializer)
+        cached = not_modified(request, *validators)
+        if cached:
+            return cached
         transactions = Transaction.objects.all()
         # Optional: Filter by user (e.g., involved_user_id=request.user.id)
         # involved_user_id = request.query_params.get('involved_user_id')
         # if involved_user_id:
         #    transactions = transactions.filter(Q(seller_id=involved_user_id) | Q(buyer_id=involved_user_id))
-        serializer = TransactionSerializer(transactions, many=True, context={'request': request})
-        return Response(serializer.data)
+        paginator = KeysetPagination(ordering=('created_at', 'id'))
+        return with_validators(
+            paginated_response(TransactionSerializer, transactions, paginator, request), *validators
+        )
 
     elif request.method == 'POST':
         serializer = TransactionSerializer(data=request.data, context={'request': request})
@@ -94,6 +104,7 @@ def transaction_list_create(request):
     operation_id='retrieve_transaction',
     operation_description="Retrieve a specific transaction by its UUID.",
     tags=['Transactions'],
+    manual_parameters=SPARSE_FIELDSET_PARAMETERS,
     responses={
         200: TransactionSerializer,
         401: RESPONSE_401_UNAUTHORIZED,
@@ -133,7 +144,10 @@ def transaction_detail_update_delete(request, pk): # pk is Transaction UUID
     Retrieve, update or delete a transaction instance.
     """
     try:
-        transaction = Transaction.objects.get(pk=pk)
+        # seller and buyer are always joined for the permission check below.
+        transaction = TransactionSerializer.setup_eager_loading(
+            Transaction.objects.select_related('seller', 'buyer'), request
+        ).get(pk=pk)
     except Transaction.DoesNotExist:
         return Response({'detail': 'Transaction not found.'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -143,8 +157,12 @@ def transaction_detail_update_delete(request, pk): # pk is Transaction UUID
                   request.user.is_staff)
 
     if request.method == 'GET':
+        validators = object_validators(request, transaction, TransactionSerializer)
+        cached = not_modified(request, *validators)
+        if cached:
+            return cached
         serializer = TransactionSerializer(transaction, context={'request': request})
-        return Response(serializer.data)
+        return with_validators(Response(serializer.data), *validators)
 
     elif request.method == 'PUT':
         if not can_modify:
@@ -0,0 +1,371 @@
+import base64
+import datetime
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.http import UnreadablePostError
+from django.utils import timezone
+from django.utils.http import http_date
+
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes, parser_classes
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..models import Document, Property, UploadSession
+from ..parsers import MessagePackParser, ORJSONParser
+from ..serializers import DocumentSerializer, PropertySerializer, UploadSessionSerializer
+from ..storage import blob_name
+from ..uploadhandlers import StoredFileWriter, StoredUploadedFile, open_for_writing
+
+
+# --- Common OpenAPI Responses (optional, for consistency) ---
+RESPONSE_400_BAD_REQUEST = openapi.Response(description="Bad Request - Invalid data provided")
+RESPONSE_401_UNAUTHORIZED = openapi.Response(description="Unauthorized - Authentication credentials were not provided or are invalid")
+RESPONSE_404_NOT_FOUND = openapi.Response(description="Upload session not found")
+RESPONSE_409_CONFLICT = openapi.Response(description="Conflict - Upload-Offset does not match the bytes received so far; HEAD the session and resume from its Upload-Offset")
+RESPONSE_410_GONE = openapi.Response(description="Gone - The upload session has expired")
+
+CHUNK_MEDIA_TYPE = 'application/offset+octet-stream'
+# Unfinished sessions (and their chunks) are kept this long; see prune_uploads.
+UPLOAD_SESSION_TTL = datetime.timedelta(hours=getattr(settings, 'UPLOAD_SESSION_TTL_HOURS', 24))
+# Largest body of one PATCH, so a single request never ties up a worker for long.
+UPLOAD_CHUNK_MAX_BYTES = getattr(settings, 'UPLOAD_CHUNK_MAX_BYTES', 16 * 1024 * 1024)
+READ_SIZE = 64 * 1024
+# Status used by tus clients for a failed Upload-Checksum.
+HTTP_460_CHECKSUM_MISMATCH = 460
+
+TARGETS = {
+    'document': (DocumentSerializer, Document.document_file.field),
+    'proof_of_ownership': (PropertySerializer, Property.proof_of_ownership_document.field),
+}
+
+UPLOAD_OFFSET_PARAMETER = openapi.Parameter(
+    'Upload-Offset', openapi.IN_HEADER, required=True, type=openapi.TYPE_INTEGER,
+    description="Offset of the first byte of this chunk; must equal the session's current offset"
+)
+UPLOAD_CHECKSUM_PARAMETER = openapi.Parameter(
+    'Upload-Checksum', openapi.IN_HEADER, type=openapi.TYPE_STRING,
+    description="Optional 'sha256 <base64 digest>' of this chunk"
+)
+
+
+def _with_progress(response, session):
+    response['Upload-Offset'] = str(session.offset)
+    response['Upload-Length'] = str(session.length)
+    response['Upload-Expires'] = http_date(session.expires_at.timestamp())
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def _get_session(request, pk):
+    """The caller's live session, or an error response."""
+    session = UploadSession.objects.filter(pk=pk, owner=request.user).first()
+    if session is None:
+        return None, Response({'detail': 'Upload session not found.'}, status=status.HTTP_404_NOT_FOUND)
+    if session.expires_at < timezone.now():
+        session.discard()
+        return None, Response({'detail': 'This upload session has expired.'}, status=status.HTTP_410_GONE)
+    return session, None
+
+
+def _expected_checksum(request):
+    """The chunk's SHA-256 from ``Upload-Checksum``; ``None`` if not sent."""
+    header = request.headers.get('Upload-Checksum')
+    if not header:
+        return None
+    algorithm, _, value = header.partition(' ')
+    if algorithm.lower() != 'sha256':
+        raise ValueError('Only sha256 checksums are supported.')
+    return base64.b64decode(value.strip(), validate=True)
+
+
+def _receive_chunk(request, session, offset, limit):
+    """
+    Copy up to ``limit`` bytes of the request body into a new part. Bytes that
+    arrived before a dropped connection are kept, so the client resumes after
+    them. Returns ``(part name, size, sha256 digest)``.
+    """
+    name, handle = open_for_writing(
+        default_storage, f'uploads/{session.pk}/{offset:015d}-{uuid.uuid4().hex[:8]}'
+    )
+    digest = hashlib.sha256()
+    received = 0
+    with handle:
+        while received < limit:
+            try:
+                data = request.stream.read(min(READ_SIZE, limit - received)) if request.stream else b''
+            except (UnreadablePostError, OSError):
+                break
+            if not data:
+                break
+            handle.write(data)
+            digest.update(data)
+            received += len(data)
+    return name, received, digest.digest()
+
+
+def _assemble_chunks(session, field):
+    """Copy the received chunks into the file's storage, hashing them (and building the CID of deeds) on the way."""
+    writer = StoredFileWriter(field, session.file_name, with_cid=session.target == 'proof_of_ownership')
+    for part in session.parts:
+        with default_storage.open(part, 'rb') as f:
+            for chunk in f.chunks():
+                writer.write(chunk)
+    return writer.finish(session.file_name, session.content_type, session.length)
+
+
+def _collect_direct_upload(session, field):
+    """
+    The file a client PUT straight to S3, once its size and SHA-256 check
+    out; returns ``(upload, error response)``.
+    """
+    storage = field.storage
+    if not session.complete:
+        verified = storage.verify_incoming(session.parts[0], session.sha256, session.length)
+        if verified is None:
+            return None, Response({'detail': 'The file has not been uploaded yet.'}, status=status.HTTP_409_CONFLICT)
+        if not verified:
+            session.discard()
+            return None, Response(
+                {'detail': 'The uploaded file does not match the declared length and sha256. Start a new upload.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        storage.commit_incoming(session.parts[0], session.sha256, session.length, session.content_type)
+        session.offset, session.parts = session.length, []
+        session.save(update_fields=['offset', 'parts'])
+    elif not storage.claim(session.sha256):
+        # Verified by an earlier finalize, then left unused until collected.
+        session.discard()
+        return None, Response({'detail': 'This upload session has expired.'}, status=status.HTTP_410_GONE)
+    # No CID yet: the pin worker fills in ipfs_hash when it adds the file.
+    upload = StoredUploadedFile(
+        storage, blob_name(session.sha256), session.file_name, session.content_type, session.length, None,
+        sha256=session.sha256,
+    )
+    return upload, None
+
+
+# --- Resumable Upload Views ---
+
+@swagger_auto_schema(
+    method='post',
+    operation_id='create_upload_session',
+    operation_description=(
+        "Start a resumable upload of a large file. Send the bytes with PATCH to the returned session "
+        "(in chunks, resuming from its Upload-Offset after a failure), then POST to its finalize URL."
+    ),
+    tags=['Uploads'],
+    request_body=UploadSessionSerializer,
+    responses={
+        201: UploadSessionSerializer,
+        400: RESPONSE_400_BAD_REQUEST,
+        401: RESPONSE_401_UNAUTHORIZED,
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def upload_session_create(request):
+    """
+    Create an upload session.
+    """
+    serializer = UploadSessionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    session = serializer.save(owner=request.user, expires_at=timezone.now() + UPLOAD_SESSION_TTL)
+    response = Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+    response['Location'] = request.build_absolute_uri(f'/uploads/{session.pk}/')
+    return _with_progress(response, session)
+
+
+@swagger_auto_schema(
+    method='get',
+    operation_id='retrieve_upload_session',
+    operation_description="Progress of an upload session; also available as Upload-Offset/Upload-Length headers (HEAD works too).",
+    tags=['Uploads'],
+    responses={200: UploadSessionSerializer, 401: RESPONSE_401_UNAUTHORIZED, 404: RESPONSE_404_NOT_FOUND, 410: RESPONSE_410_GONE}
+)
+@swagger_auto_schema(
+    method='patch',
+    operation_id='upload_chunk',
+    operation_description=(
+        f"Append a chunk (Content-Type: {CHUNK_MEDIA_TYPE}) at Upload-Offset. "
+        "The response's Upload-Offset is where the next chunk starts."
+    ),
+    tags=['Uploads'],
+    manual_parameters=[UPLOAD_OFFSET_PARAMETER, UPLOAD_CHECKSUM_PARAMETER],
+    responses={
+        204: openapi.Response(description="Chunk stored"),
+        400: RESPONSE_400_BAD_REQUEST,
+        401: RESPONSE_401_UNAUTHORIZED,
+        404: RESPONSE_404_NOT_FOUND,
+        409: RESPONSE_409_CONFLICT,
+        410: RESPONSE_410_GONE,
+        411: openapi.Response(description="Length Required - Send each chunk with a Content-Length, not chunked"),
+        413: openapi.Response(description="Payload Too Large - Send smaller chunks"),
+        415: openapi.Response(description=f"Unsupported Media Type - Chunks must be sent as {CHUNK_MEDIA_TYPE}"),
+        460: openapi.Response(description="Checksum Mismatch - The chunk was not stored; send it again"),
+    }
+)
+@swagger_auto_schema(
+    method='delete',
+    operation_id='abort_upload_session',
+    operation_description="Abort an upload and delete the chunks received so far.",
+    tags=['Uploads'],
+    responses={204: openapi.Response(description="Upload aborted"), 401: RESPONSE_401_UNAUTHORIZED, 404: RESPONSE_404_NOT_FOUND}
+)
+@api_view(['GET', 'HEAD', 'PATCH', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_session_detail(request, pk):
+    """
+    Report progress of, append a chunk to, or abort an upload session.
+    """
+    session, error = _get_session(request, pk)
+    if error:
+        return error
+
+    if request.method in ('GET', 'HEAD'):
+        return _with_progress(Response(UploadSessionSerializer(session).data), session)
+
+    elif request.method == 'DELETE':
+        if session.finalizing:
+            return Response({'detail': 'This upload is being finalized.'}, status=status.HTTP_409_CONFLICT)
+        session.discard()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    # PATCH: the body is read straight from the request stream, never parsed.
+    if session.sha256 or session.finalizing:
+        return Response({'detail': 'This file is uploaded straight to storage.'}, status=status.HTTP_409_CONFLICT)
+    if request.content_type.split(';')[0].strip() != CHUNK_MEDIA_TYPE:
+        return Response(
+            {'detail': f'Chunks must be sent as {CHUNK_MEDIA_TYPE}.'}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        expected = _expected_checksum(request)
+    except (KeyError, ValueError) as e:
+        return Response({'detail': f'Invalid Upload-Offset or Upload-Checksum header: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+    if offset != session.offset:
+        return _with_progress(Response(
+            {'detail': f'Upload-Offset must be {session.offset}.'}, status=status.HTTP_409_CONFLICT
+        ), session)
+    if not request.META.get('CONTENT_LENGTH'):
+        # Chunked bodies are not passed on by WSGI; the chunk would read as empty.
+        return Response({'detail': 'Chunks must be sent with a Content-Length.'}, status=status.HTTP_411_LENGTH_REQUIRED)
+    try:
+        declared = int(request.META['CONTENT_LENGTH'])
+    except ValueError:
+        declared = -1
+    if declared < 0:
+        return Response({'detail': 'Invalid Content-Length header.'}, status=status.HTTP_400_BAD_REQUEST)
+    if declared > UPLOAD_CHUNK_MAX_BYTES:
+        return Response(
+            {'detail': f'Chunks may be at most {UPLOAD_CHUNK_MAX_BYTES} bytes.'},
+            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+    if offset + declared > session.length:
+        return Response({'detail': 'The chunk runs past Upload-Length.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    part, received, digest = _receive_chunk(request, session, offset, declared)
+    if expected is not None and (received != declared or digest != expected):
+        default_storage.delete(part)
+        return _with_progress(Response(
+            {'detail': 'Upload-Checksum does not match the chunk.'}, status=HTTP_460_CHECKSUM_MISMATCH
+        ), session)
+    if not received:
+        default_storage.delete(part)
+        return _with_progress(Response(status=status.HTTP_204_NO_CONTENT), session)
+
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session.pk)
+        if session.offset != offset:
+            # A retried request for the same offset got there first.
+            default_storage.delete(part)
+            return _with_progress(Response(
+                {'detail': f'Upload-Offset must be {session.offset}.'}, status=status.HTTP_409_CONFLICT
+            ), session)
+        session.parts.append(part)
+        session.offset += received
+        session.save(update_fields=['parts', 'offset'])
+    return _with_progress(Response(status=status.HTTP_204_NO_CONTENT), session)
+
+
+@swagger_auto_schema(
+    method='post',
+    operation_id='finalize_upload_session',
+    operation_description=(
+        "Turn a complete upload into its target. For a 'document' session send the other Document fields "
+        "(property, document_type, optional document_hash); for a 'proof_of_ownership' session send the "
+        "fields of a new Property. The response is the created Document or Property."
+    ),
+    tags=['Uploads'],
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT, description="Fields of the Document or Property, without the file"
+    ),
+    responses={
+        201: openapi.Response(description="The created Document or Property"),
+        400: RESPONSE_400_BAD_REQUEST,
+        401: RESPONSE_401_UNAUTHORIZED,
+        404: RESPONSE_404_NOT_FOUND,
+        409: openapi.Response(description="Conflict - The upload is incomplete or already being finalized, or the document is already registered"),
+        410: RESPONSE_410_GONE,
+    }
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@parser_classes([ORJSONParser, MessagePackParser, FormParser, MultiPartParser])
+def upload_session_finalize(request, pk):
+    """
+    Attach a completely uploaded file to a new Document or Property.
+    """
+    session, error = _get_session(request, pk)
+    if error:
+        return error
+    # Claim the session, so a concurrent finalize cannot read the chunks
+    # while this one assembles and then deletes them.
+    if not UploadSession.objects.filter(pk=session.pk, finalizing=False).update(finalizing=True):
+        return Response({'detail': 'This upload is already being finalized.'}, status=status.HTTP_409_CONFLICT)
+    try:
+        return _finalize(request, session)
+    finally:
+        # Still there unless it was used up or discarded: let the client retry.
+        UploadSession.objects.filter(pk=session.pk).update(finalizing=False)
+
+
+def _finalize(request, session):
+    serializer_class, field = TARGETS[session.target]
+    if session.sha256:
+        upload, error = _collect_direct_upload(session, field)
+        if error:
+            return error
+    elif not session.complete:
+        return _with_progress(Response(
+            {'detail': f'Only {session.offset} of {session.length} bytes have been received.'},
+            status=status.HTTP_409_CONFLICT
+        ), session)
+    else:
+        upload = _assemble_chunks(session, field)
+
+    data = request.data.dict() if hasattr(request.data, 'dict') else dict(request.data)
+    data[field.name] = upload
+    serializer = serializer_class(data=data, context={'request': request})
+    if not serializer.is_valid():
+        upload.discard()
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        serializer.save()
+    except IntegrityError:
+        upload.discard()
+        return Response(
+            {field.name: ['This document is already registered for another property.']},
+            status=status.HTTP_409_CONFLICT
+        )
+    session.discard()
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
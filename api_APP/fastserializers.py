@@ -0,0 +1,220 @@
+"""
+Compiled read-only serializers for hot list endpoints.
+
+``CompiledSerializer`` inspects a DRF serializer once per request (after
+``?fields=``/``?expand=`` have been applied), turns it into a flat list of
+database columns plus a per-key converter, and renders rows fetched with
+``values_list()``. No model instances or per-field ``get_attribute`` calls
+are involved, and the output is identical to ``serializer.data``.
+
+Serializers with fields that cannot be computed from columns alone (method
+fields, dotted sources, ...) raise ``NotCompilable``; callers fall back to
+the regular DRF serializer.
+"""
+
+import decimal
+
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+from rest_framework.settings import api_settings
+
+
+class NotCompilable(Exception):
+    """The serializer uses a field the compiled path cannot reproduce."""
+
+
+def _datetime_converter(field):
+    if getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() != drf_fields.ISO_8601:
+        return field.to_representation
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if tz is None:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        text = value.astimezone(tz).isoformat()
+        if text.endswith('+00:00'):
+            text = text[:-6] + 'Z'
+        return text
+    return convert
+
+
+def _date_converter(field):
+    if getattr(field, 'format', api_settings.DATE_FORMAT).lower() != drf_fields.ISO_8601:
+        return field.to_representation
+    return lambda value: value.isoformat()
+
+
+def _decimal_converter(field):
+    coerce = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce or field.localize or field.normalize_output:
+        return field.to_representation
+    places = field.decimal_places
+
+    def convert(value):
+        # Database backends already return Decimals quantized to the column scale.
+        if isinstance(value, decimal.Decimal) and places is not None and value.as_tuple().exponent == -places:
+            return '{:f}'.format(value)
+        return field.to_representation(value)
+    return convert
+
+
+def _file_converter(field, model_field, request):
+    storage = model_field.storage
+    if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return lambda name: name or None
+
+    def convert(name):
+        if not name:
+            return None
+        url = storage.url(name)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def _choice_converter(field):
+    choices = field.choice_strings_to_values
+    return lambda value: choices.get(str(value), value) if value != '' else value
+
+
+def _identity(value):
+    return value
+
+
+def _converter(field, model_field, request):
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        if field.pk_field is not None:
+            return field.pk_field.to_representation
+        return _identity
+    if isinstance(field, relations.RelatedField):
+        raise NotCompilable(f'related field {field.field_name!r}')
+    if isinstance(field, drf_fields.FileField):
+        return _file_converter(field, model_field, request)
+    if isinstance(field, drf_fields.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, drf_fields.DateField):
+        return _date_converter(field)
+    if isinstance(field, drf_fields.DecimalField):
+        return _decimal_converter(field)
+    if isinstance(field, drf_fields.UUIDField):
+        if field.uuid_format == 'hex_verbose':
+            return str
+        return field.to_representation
+    if isinstance(field, drf_fields.ChoiceField):
+        return _choice_converter(field)
+    if type(field) in (drf_fields.CharField, drf_fields.EmailField, drf_fields.RegexField,
+                       drf_fields.SlugField, drf_fields.URLField):
+        return _identity  # database strings come back as str already
+    if type(field) is drf_fields.IntegerField:
+        return int
+    if type(field) is drf_fields.BooleanField:
+        return field.to_representation
+    if isinstance(field, drf_fields.ModelField) or type(field) in (drf_fields.JSONField, drf_fields.FloatField):
+        return field.to_representation
+    raise NotCompilable(f'{type(field).__name__} {field.field_name!r}')
+
+
+class CompiledSerializer:
+    """
+    Render rows for ``serializer_class`` straight from database columns.
+
+        compiled = CompiledSerializer(PropertySerializer, context={'request': request})
+        rows = compiled.queryset(Property.objects.all())
+        data = compiled.render(rows)
+    """
+
+    def __init__(self, serializer_class, context=None):
+        self.context = context or {}
+        self.request = self.context.get('request')
+        self.columns = []
+        self.annotations = {}
+        if not issubclass(serializer_class, serializers.ModelSerializer):
+            raise NotCompilable(f'{serializer_class.__name__} is not a ModelSerializer')
+        serializer = serializer_class(context=self.context)
+        self.plan = self._compile(serializer, serializer_class.Meta.model, '')
+
+    def _column(self, name):
+        if name not in self.columns:
+            self.columns.append(name)
+        return self.columns.index(name)
+
+    def _compile(self, serializer, model, prefix):
+        plan = []
+        for key, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            source = field.source
+            if source == '*' or '.' in source:
+                raise NotCompilable(f'source {source!r} of {key!r}')
+            if isinstance(field, serializers.ListSerializer):
+                raise NotCompilable(f'many=True field {key!r}')
+            annotation = getattr(field, 'annotation', None)
+            if annotation is not None:
+                # Computed by the query (e.g. PreviewURLsField).
+                if prefix:
+                    raise NotCompilable(f'annotated field {key!r} of a nested serializer')
+                self.annotations[source] = annotation()
+                plan.append((key, self._column(source), field.to_representation))
+                continue
+            try:
+                model_field = model._meta.get_field(source)
+            except Exception:
+                raise NotCompilable(f'{key!r} is not a model field')
+            if isinstance(field, serializers.BaseSerializer):
+                # The FK column doubles as the "is the relation null?" check.
+                nested = self._compile(field, model_field.related_model, prefix + source + '__')
+                plan.append((key, self._column(prefix + source), nested))
+            else:
+                plan.append((key, self._column(prefix + source), _converter(field, model_field, self.request)))
+        return plan
+
+    def queryset(self, queryset, extra=()):
+        """
+        ``values_list()`` over the compiled columns (plus ``extra`` columns,
+        e.g. pagination keys), with attribute access by column name.
+        """
+        columns = list(self.columns)
+        for name in extra:
+            name = name.lstrip('-')
+            if name not in columns:
+                columns.append(name)
+        self.row_columns = columns
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset.values_list(*columns, named=True)
+
+    def _render_row(self, plan, row):
+        out = {}
+        for key, index, conv in plan:
+            value = row[index]
+            if value is None:
+                out[key] = None
+            elif type(conv) is list:
+                out[key] = self._render_row(conv, row)
+            else:
+                out[key] = conv(value)
+        return out
+
+    def render(self, rows):
+        plan = self.plan
+        render_row = self._render_row
+        return [render_row(plan, row) for row in rows]
+
+    def render_one(self, row):
+        return self._render_row(self.plan, row)
+
+
+def paginated_response(serializer_class, queryset, paginator, request):
+    """
+    Paginate ``queryset`` and render the page with the compiled serializer,
+    falling back to ``serializer_class`` itself when it cannot be compiled.
+    """
+    context = {'request': request}
+    try:
+        compiled = CompiledSerializer(serializer_class, context=context)
+    except NotCompilable:
+        page = paginator.paginate_queryset(serializer_class.setup_eager_loading(queryset, request), request)
+        return paginator.get_paginated_response(serializer_class(page, many=True, context=context).data)
+    page = paginator.paginate_queryset(compiled.queryset(queryset, extra=paginator.ordering), request)
+    return paginator.get_paginated_response(compiled.render(page))
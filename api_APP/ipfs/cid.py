@@ -0,0 +1,268 @@
+"""
+Pure-Python UnixFS content addressing.
+
+``CIDBuilder`` is fed a file's bytes in order and produces the same CID as
+``ipfs add`` with its defaults (256 KiB fixed-size chunker, balanced DAG of at
+most 174 links per node). CIDv0 uses dag-pb leaves; CIDv1 uses raw leaves,
+matching ``ipfs add --cid-version=1``. Only the CIDs of the nodes are kept,
+never the file content, so memory stays bounded by one chunk plus one
+pending link list per tree level.
+"""
+
+import base64
+import hashlib
+
+CHUNK_SIZE = 256 * 1024
+MAX_LINKS = 174
+
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+MULTIHASH_SHA2_256 = 0x12
+
+UNIXFS_FILE = 2
+
+_B58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+def varint(n):
+    out = bytearray()
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field_bytes(number, data):
+    return varint(number << 3 | 2) + varint(len(data)) + data
+
+
+def _field_varint(number, value):
+    return varint(number << 3) + varint(value)
+
+
+def base58btc(data):
+    n = int.from_bytes(data, 'big')
+    out = []
+    while n:
+        n, rem = divmod(n, 58)
+        out.append(_B58_ALPHABET[rem])
+    pad = len(data) - len(data.lstrip(b'\0'))
+    return '1' * pad + ''.join(reversed(out))
+
+
+def multihash(data):
+    return bytes([MULTIHASH_SHA2_256, 32]) + hashlib.sha256(data).digest()
+
+
+def cid_bytes(version, codec, mh):
+    if version == 0:
+        return mh
+    return varint(1) + varint(codec) + mh
+
+
+def cid_to_string(cid):
+    """
+    Render binary CID bytes in the default text form for their version.
+    """
+    if cid[0] == MULTIHASH_SHA2_256:
+        return base58btc(cid)
+    return 'b' + base64.b32encode(cid).decode().lower().rstrip('=')
+
+
+def unixfs_file(data=b'', filesize=0, blocksizes=()):
+    out = _field_varint(1, UNIXFS_FILE)
+    if data:
+        out += _field_bytes(2, data)
+    out += _field_varint(3, filesize)
+    for size in blocksizes:
+        out += _field_varint(4, size)
+    return out
+
+
+def dag_pb_node(links=(), data=None):
+    """
+    Encode a dag-pb node. Links are ``(cid, tsize)`` pairs and are written
+    before the data field, as the canonical encoding requires.
+    """
+    out = b''
+    for cid, tsize in links:
+        link = _field_bytes(1, cid) + _field_bytes(2, b'') + _field_varint(3, tsize)
+        out += _field_bytes(2, link)
+    if data is not None:
+        out += _field_bytes(1, data)
+    return out
+
+
+class CIDBuilder:
+    """
+    Incrementally compute the UnixFS CID of a file.
+
+        builder = CIDBuilder()
+        for chunk in upload.chunks():
+            builder.update(chunk)
+        builder.cid()
+    """
+
+    def __init__(self, version=0, chunk_size=CHUNK_SIZE, max_links=MAX_LINKS, raw_leaves=None):
+        if version not in (0, 1):
+            raise ValueError('CID version must be 0 or 1')
+        self.version = version
+        self.chunk_size = chunk_size
+        self.max_links = max_links
+        self.raw_leaves = (version == 1) if raw_leaves is None else raw_leaves
+        if self.raw_leaves and version == 0:
+            raise ValueError('raw leaves require CIDv1')
+        self.size = 0
+        self._buffer = bytearray()
+        # levels[i] holds (cid, tsize, filesize) of finished nodes at height i
+        self._levels = [[]]
+        self._chunks = 0
+        self._result = None
+
+    def update(self, data):
+        if self._result is not None:
+            raise ValueError('update() called after cid()')
+        self.size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self.chunk_size:
+            chunk = bytes(self._buffer[:self.chunk_size])
+            del self._buffer[:self.chunk_size]
+            self._add_leaf(chunk)
+
+    def _add_leaf(self, chunk):
+        self._chunks += 1
+        if self.raw_leaves:
+            node = (cid_bytes(1, CODEC_RAW, multihash(chunk)), len(chunk), len(chunk))
+        else:
+            block = dag_pb_node(data=unixfs_file(chunk, len(chunk)))
+            node = (cid_bytes(self.version, CODEC_DAG_PB, multihash(block)), len(block), len(chunk))
+        self._push(0, node)
+
+    def _push(self, level, node):
+        self._levels[level].append(node)
+        if len(self._levels[level]) == self.max_links:
+            self._collapse(level)
+
+    def _collapse(self, level):
+        children = self._levels[level]
+        self._levels[level] = []
+        data = unixfs_file(filesize=sum(c[2] for c in children), blocksizes=[c[2] for c in children])
+        block = dag_pb_node([(c[0], c[1]) for c in children], data)
+        node = (
+            cid_bytes(self.version, CODEC_DAG_PB, multihash(block)),
+            len(block) + sum(c[1] for c in children),
+            sum(c[2] for c in children),
+        )
+        if level + 1 == len(self._levels):
+            self._levels.append([])
+        self._push(level + 1, node)
+
+    def cid_bytes(self):
+        if self._result is None:
+            if self._buffer or self._chunks == 0:
+                self._add_leaf(bytes(self._buffer))
+                self._buffer = bytearray()
+            # Close every partially filled level until a single root is left.
+            level = 0
+            while True:
+                higher = any(self._levels[level + 1:])
+                if not higher and len(self._levels[level]) == 1:
+                    self._result = self._levels[level][0][0]
+                    break
+                if self._levels[level]:
+                    self._collapse(level)
+                level += 1
+        return self._result
+
+    def cid(self):
+        """
+        Finish the DAG and return the root CID as a string.
+        """
+        return cid_to_string(self.cid_bytes())
+
+
+def compute_cid(file, version=0, chunk_size=CHUNK_SIZE):
+    """
+    Compute the CID of a Django ``File`` or any binary file object.
+    """
+    builder = CIDBuilder(version=version, chunk_size=chunk_size)
+    if hasattr(file, 'chunks'):
+        for chunk in file.chunks(chunk_size):
+            builder.update(chunk)
+    else:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            builder.update(chunk)
+    return builder.cid()
+
+
+def compute_bytes_cid(data, version=0):
+    builder = CIDBuilder(version=version)
+    builder.update(data)
+    return builder.cid()
+
+
+class CIDHashingFile:
+    """
+    Read-through proxy that feeds every byte a storage backend reads into a
+    ``CIDBuilder``, so the CID is known as soon as the file has been written.
+
+    Storage backends are expected to read the content front to back; if one
+    seeks elsewhere, ``cid()`` falls back to a separate pass over the source.
+    """
+
+    def __init__(self, file, version=0):
+        self.file = file
+        self.name = getattr(file, 'name', None)
+        self.version = version
+        self._builder = CIDBuilder(version=version)
+        self._sequential = True
+
+    def __getattr__(self, attr):
+        return getattr(self.file, attr)
+
+    def __iter__(self):
+        return iter(self.chunks())
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def size(self):
+        return self.file.size
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        if self._sequential:
+            self._builder.update(data)
+        return data
+
+    def seek(self, offset, whence=0):
+        result = self.file.seek(offset, whence)
+        if (offset, whence) == (0, 0):
+            self._builder = CIDBuilder(version=self.version)
+            self._sequential = True
+        elif self.file.tell() != self._builder.size:
+            self._sequential = False
+        return result
+
+    def chunks(self, chunk_size=None):
+        chunk_size = chunk_size or CHUNK_SIZE
+        self.seek(0)
+        while True:
+            data = self.read(chunk_size)
+            if not data:
+                break
+            yield data
+
+    def multiple_chunks(self, chunk_size=None):
+        return self.size > (chunk_size or CHUNK_SIZE)
+
+    def cid(self):
+        if self._sequential and self._builder.size == self.file.size:
+            return self._builder.cid()
+        self.file.seek(0)
+        return compute_cid(self.file, version=self.version)
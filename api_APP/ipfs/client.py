@@ -0,0 +1,166 @@
+"""
+Pluggable IPFS clients.
+
+``get_ipfs_client()`` returns the client configured by ``settings.IPFS_CLIENT``
+(a dotted path, like ``DEFAULT_FILE_STORAGE``). Every client streams the file
+straight from a Django ``File``/storage object in chunks, so it works the same
+whether media lives on local disk or in S3.
+"""
+
+import json
+import subprocess
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+class IPFSError(Exception):
+    """Raised when the IPFS daemon could not add a file."""
+
+
+class BaseIPFSClient:
+    """
+    Interface shared by all IPFS clients.
+    """
+    chunk_size = DEFAULT_CHUNK_SIZE
+
+    def add(self, file, name=None):
+        """
+        Add the content of ``file`` (a Django ``File``) to IPFS, pin it and
+        return its CID.
+        """
+        raise NotImplementedError('subclasses of BaseIPFSClient must provide an add() method')
+
+    def close(self):
+        pass
+
+    def _iter_chunks(self, file):
+        if hasattr(file, 'chunks'):
+            yield from file.chunks(self.chunk_size)
+            return
+        while True:
+            chunk = file.read(self.chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class HTTPIPFSClient(BaseIPFSClient):
+    """
+    Talks to the daemon's HTTP RPC API over a pooled keep-alive session.
+    """
+
+    def __init__(self, api_url=None, timeout=None, pool_size=None, chunk_size=None):
+        self.api_url = (api_url or getattr(settings, 'IPFS_API_URL', 'http://127.0.0.1:5001')).rstrip('/')
+        self.timeout = timeout or getattr(settings, 'IPFS_PIN_TIMEOUT', 120)
+        self.chunk_size = chunk_size or getattr(settings, 'IPFS_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        pool_size = pool_size or getattr(settings, 'IPFS_HTTP_POOL_SIZE', 4)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _multipart(self, file, name, boundary):
+        """
+        Yield a multipart/form-data body one chunk at a time, so the upload
+        never holds more than ``chunk_size`` bytes of the file in memory.
+        """
+        filename = (name or 'file').rsplit('/', 1)[-1].replace('"', '')
+        yield (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode()
+        yield from self._iter_chunks(file)
+        yield f'\r\n--{boundary}--\r\n'.encode()
+
+    def add(self, file, name=None):
+        boundary = uuid.uuid4().hex
+        try:
+            response = self.session.post(
+                f'{self.api_url}/api/v0/add',
+                params={'pin': 'true', 'quieter': 'true'},
+                data=self._multipart(file, name or getattr(file, 'name', None), boundary),
+                headers={'Content-Type': f'multipart/form-data; boundary={boundary}'},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            raise IPFSError(str(e))
+        if response.status_code != 200:
+            raise IPFSError(f'IPFS daemon returned {response.status_code}: {response.text[:200]}')
+
+        # The daemon answers with one JSON object per line; the last one is the root.
+        lines = [line for line in response.text.splitlines() if line.strip()]
+        try:
+            ipfs_hash = json.loads(lines[-1])['Hash']
+        except (IndexError, KeyError, ValueError):
+            raise IPFSError(f'Unexpected response from IPFS daemon: {response.text[:200]}')
+        return ipfs_hash
+
+    def close(self):
+        self.session.close()
+
+
+class CLIIPFSClient(BaseIPFSClient):
+    """
+    Fallback client for hosts without the HTTP API; pipes the file to
+    ``ipfs add`` on stdin instead of passing a local path.
+    """
+
+    def __init__(self, binary='ipfs', timeout=None):
+        self.binary = binary
+        self.timeout = timeout or getattr(settings, 'IPFS_PIN_TIMEOUT', 120)
+
+    def add(self, file, name=None):
+        try:
+            process = subprocess.Popen(
+                [self.binary, 'add', '--quieter'],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+        except OSError as e:
+            raise IPFSError(str(e))
+        try:
+            for chunk in self._iter_chunks(file):
+                process.stdin.write(chunk)
+            process.stdin.close()
+            stdout, stderr = process.communicate(timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            process.kill()
+            process.communicate()
+            raise IPFSError(str(e))
+        if process.returncode != 0:
+            raise IPFSError(stderr.decode(errors='replace').strip() or f'ipfs exited with {process.returncode}')
+        ipfs_hash = stdout.decode().strip()
+        if not ipfs_hash:
+            raise IPFSError('ipfs add returned no hash')
+        return ipfs_hash
+
+
+_client = None
+
+
+def get_ipfs_client():
+    """
+    Return the process-wide client instance, creating it on first use.
+    """
+    global _client
+    if _client is None:
+        client_class = import_string(getattr(settings, 'IPFS_CLIENT', 'api_APP.ipfs.client.HTTPIPFSClient'))
+        _client = client_class()
+    return _client
+
+
+def reset_ipfs_client():
+    """
+    Drop the cached client (used after fork and when settings change).
+    """
+    global _client
+    if _client is not None:
+        _client.close()
+    _client = None
@@ -0,0 +1,114 @@
+"""
+In-process stand-in for the IPFS daemon's HTTP API, for tests and local work.
+
+    with FakeIPFSDaemon() as daemon:
+        client = HTTPIPFSClient(api_url=daemon.url)
+        client.add(file)
+
+Only ``/api/v0/add`` is implemented. The daemon records every added blob and
+counts TCP connections so tests can assert that the client keeps them alive.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .cid import compute_bytes_cid
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            parts = []
+            while True:
+                size = int(self.rfile.readline().split(b';', 1)[0].strip(), 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                parts.append(self.rfile.read(size))
+                self.rfile.readline()
+            return b''.join(parts)
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _send_json(self, code, payload):
+        body = (json.dumps(payload) + '\n').encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0]
+        body = self._read_body()
+        if path != '/api/v0/add':
+            self._send_json(404, {'Message': f'unknown command {path}'})
+            return
+        if self.server.fail_next:
+            self.server.fail_next -= 1
+            self._send_json(500, {'Message': 'simulated failure'})
+            return
+
+        content_type = self.headers.get('Content-Type', '')
+        boundary = content_type.split('boundary=', 1)[-1].encode()
+        try:
+            part = body.split(b'--' + boundary, 2)[1]
+            headers, data = part.split(b'\r\n\r\n', 1)
+            data = data[:-2]  # trailing CRLF before the closing boundary
+            name = headers.split(b'filename="', 1)[1].split(b'"', 1)[0].decode()
+        except IndexError:
+            self._send_json(400, {'Message': 'malformed multipart body'})
+            return
+
+        ipfs_hash = self.server.hash_content(data)
+        with self.server.lock:
+            self.server.blobs[ipfs_hash] = data
+        self._send_json(200, {'Name': name, 'Hash': ipfs_hash, 'Size': str(len(data))})
+
+
+class FakeIPFSDaemon(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0):
+        super().__init__((host, port), _Handler)
+        self.lock = threading.Lock()
+        self.blobs = {}
+        self.connections = 0
+        self.fail_next = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @staticmethod
+    def hash_content(data):
+        return compute_bytes_cid(data)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
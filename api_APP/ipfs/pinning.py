@@ -0,0 +1,192 @@
+"""
+Database-backed IPFS pinning queue.
+
+``Property.save()`` only records a ``PinJob``; the functions below are run by
+``python manage.py pin_worker`` processes, which claim jobs, stream the file to
+IPFS through the configured client (see ``client.py``), write ``ipfs_hash``
+back and retry failures with exponential backoff.
+"""
+
+import logging
+import os
+import random
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from ..models import PinJob, Property, ResourceVersion
+from .client import IPFSError, get_ipfs_client, reset_ipfs_client
+
+logger = logging.getLogger(__name__)
+
+PIN_MAX_ATTEMPTS = getattr(settings, 'IPFS_PIN_MAX_ATTEMPTS', 8)
+PIN_BACKOFF_BASE = getattr(settings, 'IPFS_PIN_BACKOFF_BASE', 5)
+PIN_BACKOFF_MAX = getattr(settings, 'IPFS_PIN_BACKOFF_MAX', 3600)
+PIN_LEASE = getattr(settings, 'IPFS_PIN_LEASE', 600)
+
+
+def worker_name(index=0):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def pin_file(file_name):
+    """
+    Stream a stored file to IPFS and return its hash.
+    """
+    try:
+        file = default_storage.open(file_name, 'rb')
+    except OSError as e:
+        raise IPFSError(str(e))
+    with file:
+        return get_ipfs_client().add(file, name=file_name)
+
+
+def backoff_delay(attempts):
+    """
+    Seconds to wait before the next attempt, with full jitter.
+    """
+    ceiling = min(PIN_BACKOFF_MAX, PIN_BACKOFF_BASE * (2 ** max(attempts - 1, 0)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def claim_jobs(worker, limit=1):
+    """
+    Claim up to ``limit`` runnable jobs for ``worker``.
+
+    A job is claimed with a conditional UPDATE on its status, so two workers
+    racing for the same row cannot both win, on any database backend. Jobs
+    whose lease expired (their worker died) become runnable again.
+    """
+    now = timezone.now()
+    PinJob.objects.filter(
+        status='running', locked_at__lt=now - timedelta(seconds=PIN_LEASE)
+    ).update(status='queued', locked_at=None, locked_by='')
+
+    candidates = PinJob.objects.filter(
+        status='queued', available_at__lte=now
+    ).order_by('available_at', 'id').values_list('id', flat=True)[:limit * 2]
+
+    claimed = []
+    for job_id in candidates:
+        won = PinJob.objects.filter(id=job_id, status='queued').update(
+            status='running', locked_at=now, locked_by=worker
+        )
+        if won:
+            claimed.append(job_id)
+        if len(claimed) >= limit:
+            break
+    return list(PinJob.objects.filter(id__in=claimed).order_by('available_at', 'id'))
+
+
+def record_failure(job, error, now=None):
+    """
+    Count a failed attempt: requeue the job with backoff, or give up after
+    ``PIN_MAX_ATTEMPTS``.
+    """
+    now = now or timezone.now()
+    attempts = job.attempts + 1
+    if attempts >= PIN_MAX_ATTEMPTS:
+        PinJob.objects.filter(id=job.id).update(
+            status='failed', attempts=attempts, last_error=str(error),
+            locked_at=None, locked_by='', finished_at=now
+        )
+        logger.error("Giving up pinning %s after %d attempts: %s", job.file_name, attempts, error)
+    else:
+        PinJob.objects.filter(id=job.id).update(
+            status='queued', attempts=attempts, last_error=str(error),
+            locked_at=None, locked_by='',
+            available_at=now + timedelta(seconds=backoff_delay(attempts))
+        )
+        logger.warning("Pinning %s failed (attempt %d): %s", job.file_name, attempts, error)
+
+
+def process_job(job):
+    """
+    Pin one claimed job and record the outcome.
+
+    Any error counts as a failed attempt, so a job never stays ``running``
+    until its lease expires and a bad job cannot kill the worker.
+    """
+    now = timezone.now()
+    try:
+        ipfs_hash = pin_file(job.file_name)
+    except IPFSError as e:
+        record_failure(job, e, now)
+        return False
+    except Exception as e:
+        logger.exception("Unexpected error pinning %s", job.file_name)
+        record_failure(job, f"{type(e).__name__}: {e}", now)
+        return False
+
+    # Only touch the property if it still points at the same file.
+    current = Property.objects.filter(
+        id=job.property_id, proof_of_ownership_document=job.file_name
+    ).values_list('ipfs_hash', flat=True).first()
+    note = ''
+    if current is None:
+        filled = Property.objects.filter(
+            id=job.property_id, proof_of_ownership_document=job.file_name, ipfs_hash__isnull=True
+        ).update(ipfs_hash=ipfs_hash, updated_at=now)
+        if filled:
+            # .update() sends no signals; keep list ETags honest.
+            ResourceVersion.bump(Property._meta.label_lower)
+    elif current != ipfs_hash:
+        # The hash computed at upload time is what clients already use.
+        note = f"daemon returned {ipfs_hash}, expected {current}"
+        logger.warning("CID mismatch pinning %s: %s", job.file_name, note)
+    PinJob.objects.filter(id=job.id).update(
+        status='done', attempts=job.attempts + 1, last_error=note,
+        locked_at=None, locked_by='', finished_at=now
+    )
+    return True
+
+
+def run_worker(index=0, batch_size=1, poll_interval=2.0, stop_event=None, once=False):
+    """
+    Main loop of a pin worker process.
+    """
+    worker = worker_name(index)
+    # Never reuse a pooled HTTP session inherited from the parent process.
+    reset_ipfs_client()
+    logger.info("Pin worker %s started", worker)
+    while stop_event is None or not stop_event.is_set():
+        jobs = claim_jobs(worker, limit=batch_size)
+        for job in jobs:
+            try:
+                process_job(job)
+            except Exception:
+                # Recording the outcome failed (e.g. the database went away);
+                # the lease expires and another worker retries the job.
+                logger.exception("Could not record the outcome of pinning %s", job.file_name)
+        if once:
+            break
+        if not jobs:
+            if stop_event is not None:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+    connections.close_all()
+
+
+def queue_stats():
+    """
+    Queue depth per status and the age in seconds of the oldest runnable job.
+    """
+    counts = dict(
+        PinJob.objects.values_list('status').annotate(n=Count('id')).order_by()
+    )
+    oldest = PinJob.objects.filter(status='queued').aggregate(oldest=Min('created_at'))['oldest']
+    lag = (timezone.now() - oldest).total_seconds() if oldest else 0.0
+    return {
+        'queued': counts.get('queued', 0),
+        'running': counts.get('running', 0),
+        'failed': counts.get('failed', 0),
+        'done': counts.get('done', 0),
+        'lag_seconds': round(lag, 3),
+    }
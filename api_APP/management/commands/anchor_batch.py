@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api_APP.anchoring import ANCHOR_BATCH_MAX_LEAVES, anchor_pending, publish_pending
+
+
+class Command(BaseCommand):
+    help = "Anchor documents and signatures not anchored yet under one Merkle root, and publish unpublished roots."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-leaves', type=int, default=ANCHOR_BATCH_MAX_LEAVES,
+            help="Most rows in the new batch; the rest wait for the next run."
+        )
+
+    def handle(self, *args, **options):
+        batch = anchor_pending(options['max_leaves'])
+        if batch is None:
+            self.stdout.write("Nothing to anchor.")
+        else:
+            self.stdout.write(f"Anchored {batch.leaf_count} row(s) under root {batch.merkle_root}.")
+        published = publish_pending()
+        if published:
+            self.stdout.write(f"Published {published} root(s).")
@@ -0,0 +1,50 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api_APP.base64stream import Base64Error, decode_file, encode_file
+
+
+def _target(path, mode, output_dir):
+    directory, name = os.path.split(path)
+    if mode == 'encode':
+        name += '.b64'
+    else:
+        stem, extension = os.path.splitext(name)
+        name = stem if extension.lower() in ('.b64', '.base64', '.txt') else name + '.bin'
+    return os.path.join(output_dir or directory, name)
+
+
+class Command(BaseCommand):
+    help = "Encode files as base64, or decode base64 files, spreading the files over a pool of processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('mode', choices=['encode', 'decode'])
+        parser.add_argument('paths', nargs='+', help="Files to convert.")
+        parser.add_argument(
+            '--output-dir', help="Where to write the results (default: next to each input). "
+            "Encoding adds '.b64'; decoding strips '.b64', '.base64' or '.txt', or else adds '.bin'."
+        )
+        parser.add_argument('--processes', type=int, default=None, help="Number of processes (default: one per CPU).")
+
+    def handle(self, *args, **options):
+        convert = encode_file if options['mode'] == 'encode' else decode_file
+        if options['output_dir']:
+            os.makedirs(options['output_dir'], exist_ok=True)
+        failed = 0
+        with ProcessPoolExecutor(options['processes']) as pool:
+            futures = {
+                pool.submit(convert, path, _target(path, options['mode'], options['output_dir'])): path
+                for path in options['paths']
+            }
+            for future in as_completed(futures):
+                try:
+                    size = future.result()
+                except (OSError, Base64Error) as e:
+                    failed += 1
+                    self.stderr.write(f"{futures[future]}: {e}")
+                else:
+                    self.stdout.write(f"{futures[future]}: {size} bytes written")
+        if failed:
+            raise CommandError(f"{failed} of {len(futures)} file(s) could not be converted.")
@@ -0,0 +1,90 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api_APP.fastserializers import CompiledSerializer
+from api_APP.models import Property, Transaction, UserProfile
+from api_APP.serializers import PropertySerializer, TransactionSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Compare DRF and compiled serializers on the property and transaction list payloads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Create this many temporary properties/transactions (rolled back afterwards).")
+        parser.add_argument('--repeat', type=int, default=5, help="Timing runs per case; the best one is reported.")
+        parser.add_argument('--expand', default='property_details.current_owner_details,seller_details,buyer_details',
+                            help="?expand= value used for the nested cases.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.seed(options['seed'])
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, count):
+        User = get_user_model()
+        seller = User.objects.create_user(username='bench-seller')
+        buyer = User.objects.create_user(username='bench-buyer')
+        for i in range(count):
+            owner = UserProfile.objects.create(
+                fullname=f'Bench Owner {i}', residential_address='Warri', id_number=f'BENCH-{i}', password='x'
+            )
+            prop = Property.objects.create(
+                full_address=f'{i} Benchmark Road', property_type='land', unique_property_identifier=f'BENCH-{i}',
+                current_owner=owner, gps_latitude=Decimal('5.517000'), gps_longitude=Decimal('5.750000'),
+            )
+            Transaction.objects.create(property=prop, seller=seller, buyer=buyer, transaction_price=Decimal('2500000.00'))
+
+    def best_of(self, repeat, func):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def run(self, options):
+        factory = APIRequestFactory()
+        renderer = JSONRenderer()
+        cases = [
+            (PropertySerializer, Property, ''),
+            (PropertySerializer, Property, 'current_owner_details'),
+            (TransactionSerializer, Transaction, ''),
+            (TransactionSerializer, Transaction, options['expand']),
+        ]
+        self.stdout.write(f"{'serializer':<24}{'expand':<20}{'rows':>7}{'drf ms':>10}{'fast ms':>10}{'speedup':>9}  identical")
+        for serializer_class, model, expand in cases:
+            request = Request(factory.get('/', {'expand': expand} if expand else {}))
+            context = {'request': request}
+
+            def drf():
+                queryset = serializer_class.setup_eager_loading(model.objects.order_by('created_at', 'id'), request)
+                return renderer.render(serializer_class(queryset, many=True, context=context).data)
+
+            def fast():
+                compiled = CompiledSerializer(serializer_class, context=context)
+                return renderer.render(compiled.render(compiled.queryset(model.objects.order_by('created_at', 'id'))))
+
+            drf_time, drf_body = self.best_of(options['repeat'], drf)
+            fast_time, fast_body = self.best_of(options['repeat'], fast)
+            self.stdout.write(
+                f"{serializer_class.__name__:<24}{(expand[:18] or '-'):<20}{model.objects.count():>7}"
+                f"{drf_time * 1000:>10.1f}{fast_time * 1000:>10.1f}{drf_time / fast_time:>8.1f}x  {drf_body == fast_body}"
+            )
@@ -0,0 +1,52 @@
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+
+from api_APP.models import ContentBlob
+from api_APP.storage import BLOB_PREFIX, INCOMING_PREFIX, blob_name, media_storage
+
+
+class Command(BaseCommand):
+    help = "Delete stored blobs that no property or document has referenced for the grace period."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-minutes', type=int, default=getattr(settings, 'CONTENT_STORE_GC_GRACE_MINUTES', 60),
+            help="Keep unreferenced blobs (and unfinished uploads) at least this long."
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(minutes=options['grace_minutes'])
+        storage = media_storage.inner
+        deleted = 0
+        candidates = ContentBlob.objects.filter(refcount=0, touched_at__lt=cutoff).values_list('sha256', flat=True)
+        for sha256 in list(candidates):
+            with transaction.atomic():
+                # Uploads of the same content touch the row first, so they wait
+                # for this lock and then store the blob again.
+                blob = ContentBlob.objects.select_for_update().filter(
+                    sha256=sha256, refcount=0, touched_at__lt=cutoff
+                ).first()
+                if blob is None:
+                    continue
+                storage.delete(blob_name(sha256))
+                for name in blob.previews.values():
+                    storage.delete(name)
+                blob.delete()
+            deleted += 1
+
+        incoming = f'{BLOB_PREFIX}/{INCOMING_PREFIX}'
+        abandoned = 0
+        try:
+            names = storage.listdir(incoming)[1]
+        except FileNotFoundError:
+            names = []
+        for name in names:
+            path = f'{incoming}/{name}'
+            if storage.get_modified_time(path) < cutoff:
+                storage.delete(path)
+                abandoned += 1
+        self.stdout.write(f"Deleted {deleted} blob(s) and {abandoned} abandoned upload(s).")
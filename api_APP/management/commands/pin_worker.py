@@ -0,0 +1,55 @@
+import json
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api_APP.ipfs.pinning import queue_stats, run_worker
+
+
+class Command(BaseCommand):
+    help = "Run a pool of worker processes that pin queued property documents to IPFS."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=2, help="Number of worker processes.")
+        parser.add_argument('--batch-size', type=int, default=1, help="Jobs claimed per poll by each worker.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Process one batch per worker and exit.")
+        parser.add_argument('--stats', action='store_true', help="Print queue depth and lag as JSON and exit.")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self.stdout.write(json.dumps(queue_stats()))
+            return
+
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        ctx = multiprocessing.get_context('fork')
+        stop_event = ctx.Event()
+
+        def shutdown(signum, frame):
+            stop_event.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+
+        workers = [
+            ctx.Process(
+                target=run_worker,
+                kwargs={
+                    'index': i,
+                    'batch_size': options['batch_size'],
+                    'poll_interval': options['poll_interval'],
+                    'stop_event': stop_event,
+                    'once': options['once'],
+                },
+                daemon=False,
+            )
+            for i in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} pin workers.")
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,47 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api_APP.previews import render_pending
+
+
+class Command(BaseCommand):
+    help = "Render preview images of uploaded property and document images in a pool of processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None, help="Number of rendering processes (default: one per CPU).")
+        parser.add_argument('--batch-size', type=int, default=32, help="Images queued for the pool per poll.")
+        parser.add_argument('--poll-interval', type=float, default=5.0, help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true', help="Render everything queued and exit.")
+
+    def start_pool(self, processes):
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        return ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('fork'))
+
+    def handle(self, *args, **options):
+        rendered = 0
+        pool = self.start_pool(options['processes'])
+        try:
+            while True:
+                try:
+                    count = render_pending(pool, limit=options['batch_size'])
+                except BrokenProcessPool:
+                    # A process died (e.g. killed for memory); its images were requeued.
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self.start_pool(options['processes'])
+                    continue
+                rendered += count
+                if not count:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            pool.shutdown()
+        self.stdout.write(f"Rendered previews of {rendered} image(s).")
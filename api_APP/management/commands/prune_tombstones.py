@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api_APP.endpoints.changes import TOMBSTONE_RETENTION
+from api_APP.models import ChangeTombstone
+
+
+class Command(BaseCommand):
+    help = "Delete change-feed tombstones older than CHANGE_TOMBSTONE_RETENTION_DAYS."
+
+    def handle(self, *args, **options):
+        deleted, _ = ChangeTombstone.objects.filter(deleted_at__lt=timezone.now() - TOMBSTONE_RETENTION).delete()
+        self.stdout.write(f"Deleted {deleted} tombstone(s).")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api_APP.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Delete expired resumable upload sessions and the chunks they received."
+
+    def handle(self, *args, **options):
+        expired = UploadSession.objects.filter(expires_at__lt=timezone.now())
+        count = 0
+        for session in expired.iterator():
+            session.discard()
+            count += 1
+        self.stdout.write(f"Deleted {count} expired upload session(s).")
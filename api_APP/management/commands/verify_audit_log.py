@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api_APP.audit import (
+    AUDIT_CHECKPOINT_INTERVAL, AUDIT_VERIFY_CHUNK_SIZE, AuditChainError, resume_point, verify_chain,
+)
+from api_APP.models import AuditCheckpoint
+
+
+class Command(BaseCommand):
+    help = "Verify the audit log's hash chain from the last checkpoint, recording new checkpoints as it goes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Re-hash the whole log, ignoring checkpoints.")
+        parser.add_argument('--chunk-size', type=int, default=AUDIT_VERIFY_CHUNK_SIZE, help="Events fetched per query.")
+        parser.add_argument(
+            '--checkpoint-every', type=int, default=AUDIT_CHECKPOINT_INTERVAL,
+            help="Record a checkpoint after this many verified events (and at the end)."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start, prev_hash = resume_point(options['full'])
+        except AuditChainError as e:
+            raise CommandError(f"Audit log verification failed: {e}")
+        checkpointed = last = start
+        try:
+            for last, prev_hash in verify_chain(start, prev_hash, options['chunk_size']):
+                if last - checkpointed >= options['checkpoint_every']:
+                    self._checkpoint(last, prev_hash)
+                    checkpointed = last
+        except AuditChainError as e:
+            raise CommandError(
+                f"Audit log verification failed: {e} (events up to #{last} are intact)"
+            )
+        if last > checkpointed:
+            self._checkpoint(last, prev_hash)
+        if last == start:
+            self.stdout.write(f"No new events since #{start}.")
+        else:
+            self.stdout.write(f"Verified {last - start} event(s), #{start + 1} to #{last}.")
+
+    def _checkpoint(self, sequence, entry_hash):
+        AuditCheckpoint.objects.get_or_create(sequence=sequence, defaults={'entry_hash': entry_hash})
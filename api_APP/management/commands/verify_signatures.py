@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api_APP import audit, signing
+from api_APP.models import DigitalSignature, ResourceVersion, SigningRequirement
+from api_APP.signatures import verify_parallel
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify stored digital signatures and update their 'verified' field, e.g. to backfill signatures "
+        "recorded before verification existed. Only unverified ones are checked unless --all is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Re-verify every signature, not just unverified ones.")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Signatures read and verified per query.")
+
+    def handle(self, *args, **options):
+        signatures = DigitalSignature.objects.order_by('pk')
+        if not options['all']:
+            signatures = signatures.filter(verified=False)
+        checked = changed = 0
+        last = None
+        while True:
+            chunk = signatures if last is None else signatures.filter(pk__gt=last)
+            rows = list(chunk.values_list(
+                'pk', 'document_id', 'signer_id', 'signer_public_key', 'signature_value', 'document_hash_at_signing',
+                'verified',
+            )[:options['chunk_size']])
+            if not rows:
+                break
+            last = rows[-1][0]
+            checked += len(rows)
+            verdicts = verify_parallel(row[3:6] for row in rows)
+            flipped = {True: [], False: []}
+            pairs = set()
+            for row, verified in zip(rows, verdicts):
+                if verified != row[6]:
+                    flipped[verified].append(row[0])
+                    pairs.add((row[1], row[2]))
+            with transaction.atomic():
+                for verified, pks in flipped.items():
+                    if pks:
+                        DigitalSignature.objects.filter(pk__in=pks).update(verified=verified)
+                # .update() skips the audit_save signal: log the new state by hand.
+                updated = list(DigitalSignature.objects.filter(pk__in=flipped[True] + flipped[False]).order_by('pk'))
+                audit.record_many('update', updated)
+                changed += len(updated)
+            # .update() sends no signals: move the signing counters ourselves.
+            for document_id, party_id in pairs:
+                signing.refresh(SigningRequirement.objects.filter(document_id=document_id, party_id=party_id))
+        if changed:
+            ResourceVersion.bump(DigitalSignature._meta.label_lower)
+        self.stdout.write(f"Checked {checked} signature(s), updated {changed}.")
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0003_userprofile_password'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PinJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(help_text='Storage name of the file at the time it was queued.', max_length=255)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', help_text='Current state of the job.', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0, help_text='Number of times a worker has tried to pin this file.')),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Earliest time a worker may pick up the job (used for retry backoff).')),
+                ('locked_at', models.DateTimeField(blank=True, help_text='When a worker claimed the job.', null=True)),
+                ('locked_by', models.CharField(blank=True, default='', help_text='Identifier of the worker holding the job.', max_length=100)),
+                ('last_error', models.TextField(blank=True, default='', help_text='Error reported by the last failed attempt.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('property', models.ForeignKey(help_text='The property whose document should be pinned.', on_delete=django.db.models.deletion.CASCADE, related_name='pin_jobs', to='api_APP.property')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'available_at'], name='pinjob_status_available_idx')],
+            },
+        ),
+    ]
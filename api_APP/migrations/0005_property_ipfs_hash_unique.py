@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:39
+
+from django.db import migrations, models
+
+
+def clear_duplicate_hashes(apps, schema_editor):
+    """
+    Blank hashes become NULL, and only the oldest property keeps a hash that
+    is shared; the pin worker refills the others once they are re-uploaded.
+    """
+    Property = apps.get_model('api_APP', 'Property')
+    Property.objects.filter(ipfs_hash='').update(ipfs_hash=None)
+    seen = set()
+    for pk, ipfs_hash in Property.objects.exclude(ipfs_hash=None).order_by('created_at').values_list('pk', 'ipfs_hash'):
+        if ipfs_hash in seen:
+            Property.objects.filter(pk=pk).update(ipfs_hash=None)
+        seen.add(ipfs_hash)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0004_pinjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_duplicate_hashes, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='property',
+            name='ipfs_hash',
+            field=models.CharField(blank=True, help_text='InterPlanetary File System Block ID', max_length=255, null=True, unique=True),
+        ),
+    ]
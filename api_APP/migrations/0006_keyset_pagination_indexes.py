@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 02:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0005_property_ipfs_hash_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='digitalsignature',
+            index=models.Index(fields=['signed_at', 'id'], name='signature_signed_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['upload_date', 'id'], name='document_uploaded_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nininfo',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='nininfo_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['created_at', 'id'], name='property_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['created_at', 'id'], name='transaction_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:06
+
+import api_APP.storage
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0008_conditional_get'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='document',
+            name='document_file',
+            field=models.FileField(help_text='The actual legal document file (e.g., PDF).', storage=api_APP.storage.content_addressed_storage, upload_to='legal_documents/'),
+        ),
+        migrations.AlterField(
+            model_name='property',
+            name='proof_of_ownership_document',
+            field=models.FileField(blank=True, help_text='Scanned copy or reference to the current title deed/certificate of occupancy.', null=True, storage=api_APP.storage.content_addressed_storage, upload_to='property_documents/proof_of_ownership/'),
+        ),
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField()),
+                ('content_type', models.CharField(blank=True, max_length=100)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('touched_at', models.DateTimeField(default=django.utils.timezone.now, help_text='Last upload or release of the blob; gc_blobs waits a grace period after it.')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['refcount', 'touched_at'], name='blob_gc_idx')],
+            },
+        ),
+    ]
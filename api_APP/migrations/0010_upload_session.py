@@ -0,0 +1,32 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api_APP', '0009_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('target', models.CharField(choices=[('document', 'Document file'), ('proof_of_ownership', 'Property proof of ownership document')], help_text='What the finished file becomes.', max_length=32)),
+                ('file_name', models.CharField(help_text='Original name of the file.', max_length=255)),
+                ('content_type', models.CharField(blank=True, default='', max_length=100)),
+                ('length', models.PositiveBigIntegerField(help_text='Total size of the file in bytes.')),
+                ('offset', models.PositiveBigIntegerField(default=0, help_text='Bytes received so far.')),
+                ('parts', models.JSONField(blank=True, default=list, help_text='Storage names of the received chunks, in order.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(help_text='Unfinished uploads are removed after this time.')),
+                ('owner', models.ForeignKey(help_text='User who started the upload; only they can continue it.', on_delete=django.db.models.deletion.CASCADE, related_name='upload_sessions', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0010_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='sha256',
+            field=models.CharField(blank=True, default='', help_text='For direct-to-storage uploads: SHA-256 the uploaded file must have.', max_length=64),
+        ),
+    ]
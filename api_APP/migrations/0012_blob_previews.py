@@ -0,0 +1,33 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:20
+
+from django.db import migrations, models
+
+
+def queue_existing_images(apps, schema_editor):
+    ContentBlob = apps.get_model('api_APP', 'ContentBlob')
+    ContentBlob.objects.filter(content_type__startswith='image/').update(preview_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0011_direct_upload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentblob',
+            name='preview_status',
+            field=models.CharField(blank=True, choices=[('', 'None'), ('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], default='', help_text='Images are queued for preview_worker when stored.', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='contentblob',
+            name='previews',
+            field=models.JSONField(blank=True, default=dict, help_text='Storage names of the downsized renditions, keyed by width in pixels.'),
+        ),
+        migrations.AddIndex(
+            model_name='contentblob',
+            index=models.Index(condition=models.Q(('preview_status', 'pending')), fields=['created_at'], name='blob_preview_queue_idx'),
+        ),
+        migrations.RunPython(queue_existing_images, migrations.RunPython.noop),
+    ]
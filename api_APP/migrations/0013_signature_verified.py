@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0012_blob_previews'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='digitalsignature',
+            name='verified',
+            field=models.BooleanField(default=False, help_text='Whether signature_value is a valid signature of document_hash_at_signing under signer_public_key.'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0013_signature_verified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnchorBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('merkle_root', models.CharField(help_text="Hex SHA-256 root of the batch's Merkle tree.", max_length=64, unique=True)),
+                ('leaf_count', models.PositiveIntegerField(help_text='Number of leaves in the tree.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('blockchain_transaction_hash', models.CharField(blank=True, help_text='The transaction that recorded the root on chain, once published.', max_length=255, null=True, unique=True)),
+                ('anchored_at', models.DateTimeField(blank=True, help_text='When the root was published.', null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'anchor batches',
+            },
+        ),
+        migrations.CreateModel(
+            name='AnchorProof',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('document', 'Document'), ('signature', 'Digital signature')], max_length=10)),
+                ('object_id', models.UUIDField(help_text='Primary key of the anchored Document or DigitalSignature.')),
+                ('leaf', models.CharField(help_text='Hex leaf hash of the row as it was anchored.', max_length=64)),
+                ('leaf_index', models.PositiveIntegerField()),
+                ('siblings', models.BinaryField(help_text='Concatenated 32-byte sibling hashes, leaf level first.')),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='proofs', to='api_APP.anchorbatch')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='anchorproof',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='anchor_proof_object_uniq'),
+        ),
+    ]
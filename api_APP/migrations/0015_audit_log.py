@@ -0,0 +1,39 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0014_anchoring'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField(unique=True)),
+                ('entry_hash', models.CharField(max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField(help_text='Position in the chain, from 1 without gaps.', unique=True)),
+                ('created_at', models.DateTimeField()),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                ('model', models.CharField(help_text="Model label, e.g. 'api_APP.transaction'.", max_length=100)),
+                ('object_id', models.CharField(max_length=64)),
+                ('data', models.JSONField(help_text='Field values of the row after the change (before it, for deletions).')),
+                ('prev_hash', models.CharField(help_text='entry_hash of the previous event.', max_length=64)),
+                ('entry_hash', models.CharField(max_length=64)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'object_id'], name='audit_event_object_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.16 on 2026-10-18 03:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api_APP', '0015_audit_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='signatures_collected',
+            field=models.PositiveIntegerField(default=0, help_text="Number of those fulfilled by a verified signature of the document's current hash."),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='signatures_required',
+            field=models.PositiveIntegerField(default=0, help_text='Number of signing requirements of the transaction.'),
+        ),
+        migrations.CreateModel(
+            name='SigningRequirement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fulfilled', models.BooleanField(default=False, help_text="The party has a verified signature of the document's current hash.")),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('document', models.ForeignKey(help_text="The document to be signed; it belongs to the transaction's property.", on_delete=django.db.models.deletion.CASCADE, related_name='signing_requirements', to='api_APP.document')),
+                ('party', models.ForeignKey(help_text='The user who must sign it.', on_delete=django.db.models.deletion.PROTECT, related_name='signing_requirements', to=settings.AUTH_USER_MODEL)),
+                ('transaction', models.ForeignKey(help_text='The transaction that needs the signature.', on_delete=django.db.models.deletion.CASCADE, related_name='signing_requirements', to='api_APP.transaction')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['document', 'party'], name='signing_requirement_signer_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='signingrequirement',
+            constraint=models.UniqueConstraint(fields=('transaction', 'document', 'party'), name='signing_requirement_uniq'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0016_signing_requirements'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='anchorproof',
+            name='anchor_proof_object_uniq',
+        ),
+        migrations.AddConstraint(
+            model_name='anchorproof',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id', 'leaf'), name='anchor_proof_leaf_uniq'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0017_anchor_proof_per_leaf'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='finalizing',
+            field=models.BooleanField(default=False, help_text='A finalize request is assembling the file; other changes must wait.'),
+        ),
+    ]
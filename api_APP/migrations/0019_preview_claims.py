@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0018_upload_session_finalizing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentblob',
+            name='preview_attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Times a preview_worker claimed the blob for rendering.'),
+        ),
+        migrations.AddField(
+            model_name='contentblob',
+            name='preview_claimed_at',
+            field=models.DateTimeField(blank=True, help_text='When a preview_worker claimed it; the claim lapses after PREVIEW_LEASE seconds.', null=True),
+        ),
+        migrations.AlterField(
+            model_name='contentblob',
+            name='preview_status',
+            field=models.CharField(blank=True, choices=[('', 'None'), ('pending', 'Pending'), ('rendering', 'Rendering'), ('done', 'Done'), ('failed', 'Failed')], default='', help_text='Images are queued for preview_worker when stored.', max_length=10),
+        ),
+    ]
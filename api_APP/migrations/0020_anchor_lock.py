@@ -0,0 +1,20 @@
+# Generated by Django 4.2.16 on 2026-10-18 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_APP', '0019_preview_claims'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnchorLock',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('locked_at', models.DateTimeField(blank=True, help_text='Start of the latest batch written under the lock.', null=True)),
+            ],
+        ),
+    ]
@@ -6,8 +6,10 @@ from django.conf import settings
 from django.utils import timezone
 import uuid
 from django.core.validators import RegexValidator
-import subprocess
 from django.contrib.auth.models import User
+
+from .storage import content_addressed_storage
+
 # If you're using a custom User model, you might extend AbstractUser directly.
 # For simplicity and common practice, we'll assume Django's built-in User
 # and create a UserProfile to extend it.
@@ -82,7 +84,7 @@ class Property(models.Model):
     )
     # Reference to proof of ownership document (e.g., scanned title deed)
     proof_of_ownership_document = models.FileField(
-        upload_to='property_documents/proof_of_ownership/', null=True, blank=True,
+        upload_to='property_documents/proof_of_ownership/', storage=content_addressed_storage, null=True, blank=True,
         help_text="Scanned copy or reference to the current title deed/certificate of occupancy."
     )
     # Geospatial data (optional)
@@ -100,36 +102,277 @@ class Property(models.Model):
         help_text="Cryptographic hash of the property's survey plan."
     )
     ipfs_hash = models.CharField(
-        max_length=255, null=True, blank=True,
+        max_length=255, unique=True, null=True, blank=True,
         help_text="InterPlanetary File System Block ID"
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination order of the list endpoint
+            models.Index(fields=['created_at', 'id'], name='property_created_id_idx'),
+            # High-water mark of the change feed
+            models.Index(fields=['updated_at', 'id'], name='property_updated_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.unique_property_identifier} - {self.full_address[:50]}..."
     def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)  # Save the file first so it exists on disk
+        document = self.proof_of_ownership_document
+        newly_uploaded = bool(document) and not document._committed
+        if newly_uploaded:
+            # Write the file ourselves so its CID is computed while it streams
+            # into storage; the property is reachable by ipfs_hash right away.
+            self.ipfs_hash = self._store_document_with_cid(document)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'proof_of_ownership_document', 'ipfs_hash'}
+
+        super().save(*args, **kwargs)
+
+        if document and (newly_uploaded or not self.ipfs_hash) and getattr(settings, 'IPFS_PINNING_ENABLED', True):
+            # Pinning happens out of band (see api_APP/ipfs/pinning.py).
+            PinJob.enqueue(self)
+
+    def _store_document_with_cid(self, document):
+        from .ipfs.cid import CIDHashingFile
+        from .uploadhandlers import adopt_stored_upload
+
+        stored = adopt_stored_upload(document)
+        if stored is not None:
+            # Already in storage: hashed by the upload handler, or uploaded
+            # straight to S3 (no CID yet; the pin worker fills it in).
+            return stored.ipfs_cid
+        content = document.file
+        precomputed = getattr(content, 'ipfs_cid', None)
+        if precomputed:
+            document.save(document.name, content, save=False)
+            return precomputed
+        hashing = CIDHashingFile(content, version=getattr(settings, 'IPFS_CID_VERSION', 0))
+        document.save(document.name, hashing, save=False)
+        return hashing.cid()
+
+
+class PinJob(models.Model):
+    """
+    Durable queue entry asking a pin worker to add a property's proof of
+    ownership document to IPFS and write the resulting hash back.
+    """
+    STATUSES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name='pin_jobs',
+        help_text="The property whose document should be pinned."
+    )
+    file_name = models.CharField(
+        max_length=255,
+        help_text="Storage name of the file at the time it was queued."
+    )
+    status = models.CharField(
+        max_length=20, choices=STATUSES, default='queued',
+        help_text="Current state of the job."
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of times a worker has tried to pin this file."
+    )
+    available_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Earliest time a worker may pick up the job (used for retry backoff)."
+    )
+    locked_at = models.DateTimeField(
+        null=True, blank=True,
+        help_text="When a worker claimed the job."
+    )
+    locked_by = models.CharField(
+        max_length=100, blank=True, default='',
+        help_text="Identifier of the worker holding the job."
+    )
+    last_error = models.TextField(
+        blank=True, default='',
+        help_text="Error reported by the last failed attempt."
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='pinjob_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"Pin {self.file_name} ({self.status})"
+
+    @classmethod
+    def enqueue(cls, property_obj):
+        """
+        Queue the property's current document unless it is already waiting.
+        """
+        file_name = property_obj.proof_of_ownership_document.name
+        pending = cls.objects.filter(
+            property=property_obj, file_name=file_name, status__in=['queued', 'running']
+        )
+        if pending.exists():
+            return None
+        return cls.objects.create(property=property_obj, file_name=file_name)
+
+
+class ChangeTombstone(models.Model):
+    """
+    Record of a deleted row, kept so change-feed clients can drop their copy.
+    Written by ``signals.py``; old entries are removed by ``prune_tombstones``.
+    """
+    resource = models.CharField(
+        max_length=32,
+        help_text="Change feed the row belonged to, e.g. 'properties'."
+    )
+    object_id = models.UUIDField(help_text="Primary key of the deleted row.")
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['resource', 'deleted_at', 'id'], name='tombstone_resource_idx'),
+        ]
 
-        if self.proof_of_ownership_document and not self.ipfs_hash:
-            try:
-                # Run IPFS add command
-                result = subprocess.run(
-                    ["ipfs", "add", self.proof_of_ownership_document.path],
-                    capture_output=True, text=True, check=True
-                )
+    def __str__(self):
+        return f"{self.resource} {self.object_id} deleted at {self.deleted_at}"
+
+
+class ResourceVersion(models.Model):
+    """
+    Change counter per model, behind the ETags of list responses. Bumped by
+    ``signals.py`` whenever a row of the model is saved or deleted.
+    """
+    resource = models.CharField(
+        max_length=100, primary_key=True,
+        help_text="Model label, e.g. 'api_app.property'."
+    )
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.resource} v{self.version}"
+
+    @classmethod
+    def bump(cls, resource):
+        now = timezone.now()
+        bumped = cls.objects.filter(resource=resource).update(version=models.F('version') + 1, updated_at=now)
+        if not bumped:
+            _, created = cls.objects.get_or_create(resource=resource, defaults={'version': 1, 'updated_at': now})
+            if not created:
+                # Another request created the row first.
+                cls.objects.filter(resource=resource).update(version=models.F('version') + 1, updated_at=now)
+
+
+class ContentBlob(models.Model):
+    """
+    A file stored once by ``ContentAddressedStorage``, with the number of
+    model fields referencing it. Counts are kept by ``signals.py``; blobs
+    left unreferenced are removed by ``gc_blobs``.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    touched_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Last upload or release of the blob; gc_blobs waits a grace period after it."
+    )
+    PREVIEW_STATUS_CHOICES = [
+        ('', 'None'),
+        ('pending', 'Pending'),
+        ('rendering', 'Rendering'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    preview_status = models.CharField(
+        max_length=10, choices=PREVIEW_STATUS_CHOICES, blank=True, default='',
+        help_text="Images are queued for preview_worker when stored."
+    )
+    previews = models.JSONField(
+        default=dict, blank=True,
+        help_text="Storage names of the downsized renditions, keyed by width in pixels."
+    )
+    preview_attempts = models.PositiveSmallIntegerField(
+        default=0, help_text="Times a preview_worker claimed the blob for rendering."
+    )
+    preview_claimed_at = models.DateTimeField(
+        null=True, blank=True, help_text="When a preview_worker claimed it; the claim lapses after PREVIEW_LEASE seconds."
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['refcount', 'touched_at'], name='blob_gc_idx'),
+            models.Index(
+                fields=['created_at'], name='blob_preview_queue_idx', condition=models.Q(preview_status='pending')
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.sha256} ({self.refcount} reference(s))"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload: the client sends the file in chunks (``PATCH`` with
+    ``Upload-Offset``), each stored as a separate part, and finalizes it into
+    a ``Document`` or a ``Property`` with its proof of ownership document.
+
+    Direct uploads (``sha256`` set) have a single part the client PUTs to S3
+    with a presigned URL; ``offset`` reaches ``length`` once it is verified.
+    """
+    TARGETS = [
+        ('document', 'Document file'),
+        ('proof_of_ownership', 'Property proof of ownership document'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='upload_sessions',
+        help_text="User who started the upload; only they can continue it."
+    )
+    target = models.CharField(
+        max_length=32, choices=TARGETS,
+        help_text="What the finished file becomes."
+    )
+    file_name = models.CharField(max_length=255, help_text="Original name of the file.")
+    content_type = models.CharField(max_length=100, blank=True, default='')
+    length = models.PositiveBigIntegerField(help_text="Total size of the file in bytes.")
+    offset = models.PositiveBigIntegerField(default=0, help_text="Bytes received so far.")
+    parts = models.JSONField(
+        default=list, blank=True,
+        help_text="Storage names of the received chunks, in order."
+    )
+    sha256 = models.CharField(
+        max_length=64, blank=True, default='',
+        help_text="For direct-to-storage uploads: SHA-256 the uploaded file must have."
+    )
+    finalizing = models.BooleanField(
+        default=False, help_text="A finalize request is assembling the file; other changes must wait."
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(help_text="Unfinished uploads are removed after this time.")
 
-                # Extract IPFS hash (usually first token in last line)
-                ipfs_output = result.stdout.strip().splitlines()[-1]
-                ipfs_hash = ipfs_output.split()[1]  # "added <hash> <filename>"
+    def __str__(self):
+        return f"{self.file_name} ({self.offset}/{self.length} bytes)"
 
-                self.ipfs_hash = ipfs_hash
-                super().save(update_fields=["ipfs_hash"])  # Save hash without recursion
+    @property
+    def complete(self):
+        return self.offset == self.length
 
-            except subprocess.CalledProcessError as e:
-                # Optional: Log error or raise custom exception
-                print("Error running IPFS add:", e.stderr)
+    def discard(self):
+        """Delete the received chunks and the session."""
+        from django.core.files.storage import default_storage
 
+        for name in self.parts:
+            default_storage.delete(name)
+        self.delete()
 
 
 
@@ -159,7 +402,7 @@ class Document(models.Model):
     # Path to the actual document file. For security and blockchain integration,
     # consider storing only the hash of the document on-chain, and the file off-chain.
     document_file = models.FileField(
-        upload_to='legal_documents/',
+        upload_to='legal_documents/', storage=content_addressed_storage,
         help_text="The actual legal document file (e.g., PDF)."
     )
     # Hash of the document content, which will be used for blockchain verification
@@ -172,10 +415,23 @@ class Document(models.Model):
         help_text="User who uploaded this document."
     )
     upload_date = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['upload_date', 'id'], name='document_uploaded_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.document_type} for {self.property.unique_property_identifier}"
 
+    def save(self, *args, **kwargs):
+        from .uploadhandlers import adopt_stored_upload
+
+        # Files streamed by the upload handler are already in storage.
+        adopt_stored_upload(self.document_file)
+        super().save(*args, **kwargs)
+
 class Transaction(models.Model):
     """
     Represents a property transaction (e.g., sale, transfer) that involves signing and verification.
@@ -229,9 +485,25 @@ class Transaction(models.Model):
         null=True, blank=True,
         help_text="Timestamp from the blockchain when the transaction was confirmed."
     )
+    # Signing progress, kept up to date by signing.py
+    signatures_required = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of signing requirements of the transaction."
+    )
+    signatures_collected = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of those fulfilled by a verified signature of the document's current hash."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='transaction_created_id_idx'),
+            # High-water mark of the change feed
+            models.Index(fields=['updated_at', 'id'], name='transaction_updated_id_idx'),
+        ]
+
     def __str__(self):
         return f"Transaction {self.id} for {self.property.unique_property_identifier}"
 
@@ -266,6 +538,10 @@ class DigitalSignature(models.Model):
         max_length=255,
         help_text="The hash of the document content at the moment of signing."
     )
+    verified = models.BooleanField(
+        default=False,
+        help_text="Whether signature_value is a valid signature of document_hash_at_signing under signer_public_key."
+    )
     # Optional: Reference to the blockchain transaction where this signature might be recorded
     blockchain_signature_hash = models.CharField(
         max_length=255, unique=True, null=True, blank=True,
@@ -279,6 +555,155 @@ class DigitalSignature(models.Model):
         # Ensures a user can't sign the same document multiple times with the same signature value
         # (though typically a new signature would be generated for each signing event if content changes)
         unique_together = ('document', 'signer', 'signature_value')
+        indexes = [
+            models.Index(fields=['signed_at', 'id'], name='signature_signed_id_idx'),
+        ]
+
+
+class SigningRequirement(models.Model):
+    """
+    A party who must sign a document for a transaction to be fully signed.
+    ``fulfilled`` and the transaction's progress counters are maintained by
+    ``signing.py`` as signatures, documents and requirements change.
+    """
+    transaction = models.ForeignKey(
+        Transaction, on_delete=models.CASCADE, related_name='signing_requirements',
+        help_text="The transaction that needs the signature."
+    )
+    document = models.ForeignKey(
+        Document, on_delete=models.CASCADE, related_name='signing_requirements',
+        help_text="The document to be signed; it belongs to the transaction's property."
+    )
+    party = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='signing_requirements',
+        help_text="The user who must sign it."
+    )
+    fulfilled = models.BooleanField(
+        default=False,
+        help_text="The party has a verified signature of the document's current hash."
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['transaction', 'document', 'party'], name='signing_requirement_uniq'),
+        ]
+        indexes = [
+            # Requirements a new or deleted signature may affect
+            models.Index(fields=['document', 'party'], name='signing_requirement_signer_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.party_id} must sign {self.document_id} for {self.transaction_id}"
+
+
+class AnchorBatch(models.Model):
+    """
+    A Merkle tree over the digests of a batch of documents and signatures;
+    only its root needs to be written on chain. See ``anchoring.py``.
+    """
+    merkle_root = models.CharField(max_length=64, unique=True, help_text="Hex SHA-256 root of the batch's Merkle tree.")
+    leaf_count = models.PositiveIntegerField(help_text="Number of leaves in the tree.")
+    created_at = models.DateTimeField(auto_now_add=True)
+    blockchain_transaction_hash = models.CharField(
+        max_length=255, unique=True, null=True, blank=True,
+        help_text="The transaction that recorded the root on chain, once published."
+    )
+    anchored_at = models.DateTimeField(null=True, blank=True, help_text="When the root was published.")
+
+    class Meta:
+        verbose_name_plural = "anchor batches"
+
+    def __str__(self):
+        return f"Anchor {self.merkle_root[:12]} ({self.leaf_count} leaves)"
+
+
+class AnchorProof(models.Model):
+    """
+    Inclusion proof of one document or signature in an ``AnchorBatch``: the
+    sibling hashes from its leaf up to the root. A row changed after it was
+    anchored gets one proof per anchored leaf.
+    """
+    KINDS = [
+        ('document', 'Document'),
+        ('signature', 'Digital signature'),
+    ]
+    batch = models.ForeignKey(AnchorBatch, on_delete=models.CASCADE, related_name='proofs')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.UUIDField(help_text="Primary key of the anchored Document or DigitalSignature.")
+    leaf = models.CharField(max_length=64, help_text="Hex leaf hash of the row as it was anchored.")
+    leaf_index = models.PositiveIntegerField()
+    siblings = models.BinaryField(help_text="Concatenated 32-byte sibling hashes, leaf level first.")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id', 'leaf'], name='anchor_proof_leaf_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Proof of {self.kind} {self.object_id} in {self.batch_id}"
+
+
+class AnchorLock(models.Model):
+    """
+    Row held locked by ``anchor_pending`` while it writes a batch, so
+    overlapping ``anchor_batch`` runs never insert the same proof twice.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    locked_at = models.DateTimeField(null=True, blank=True, help_text="Start of the latest batch written under the lock.")
+
+    def __str__(self):
+        return f"Lock {self.name}"
+
+
+class AuditEvent(models.Model):
+    """
+    Append-only record of a change to a transaction or signature, written by
+    ``signals.py``. Each entry's hash covers the previous one, so editing or
+    removing an entry breaks the chain; see ``audit.py``.
+    """
+    ACTIONS = [
+        ('create', 'Create'),
+        ('update', 'Update'),
+        ('delete', 'Delete'),
+    ]
+    sequence = models.PositiveBigIntegerField(unique=True, help_text="Position in the chain, from 1 without gaps.")
+    created_at = models.DateTimeField()
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    model = models.CharField(max_length=100, help_text="Model label, e.g. 'api_APP.transaction'.")
+    object_id = models.CharField(max_length=64)
+    data = models.JSONField(help_text="Field values of the row after the change (before it, for deletions).")
+    prev_hash = models.CharField(max_length=64, help_text="entry_hash of the previous event.")
+    entry_hash = models.CharField(max_length=64)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model', 'object_id'], name='audit_event_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.sequence} {self.action} {self.model} {self.object_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Audit events are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Audit events are append-only.")
+
+
+class AuditCheckpoint(models.Model):
+    """
+    The audit log was verified up to ``sequence``, whose hash was
+    ``entry_hash``; ``verify_audit_log`` resumes from the latest one.
+    """
+    sequence = models.PositiveBigIntegerField(unique=True)
+    entry_hash = models.CharField(max_length=64)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Audit log verified up to #{self.sequence}"
 
 
 
@@ -335,6 +760,9 @@ class NINInfo(models.Model):
         verbose_name = "NIN Information"
         verbose_name_plural = "NIN Information"
         ordering = ['last_name', 'first_name']
+        indexes = [
+            models.Index(fields=['last_name', 'first_name', 'id'], name='nininfo_name_id_idx'),
+        ]
 
     def __str__(self):
         """
@@ -0,0 +1,207 @@
+"""
+Keyset (cursor) pagination for the list endpoints.
+
+Pages are selected with a ``WHERE (k1, k2, ...) > (v1, v2, ...)`` condition on
+an ordered, unique key instead of ``OFFSET``, so every page costs the same
+index range scan however deep the client has scrolled. Cursors are opaque
+base64 tokens carrying the key of the row a page starts after (or before).
+"""
+
+import base64
+import datetime
+import decimal
+import json
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from drf_yasg import openapi
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGINATION_PARAMETERS = [
+    openapi.Parameter('cursor', openapi.IN_QUERY, description="Opaque cursor taken from a previous response's 'next' or 'previous' link", type=openapi.TYPE_STRING),
+    openapi.Parameter('page_size', openapi.IN_QUERY, description="Number of results per page (bounded by the server maximum)", type=openapi.TYPE_INTEGER),
+    openapi.Parameter('count', openapi.IN_QUERY, description="Set to 'estimate' to include an estimated total in 'estimated_count'", type=openapi.TYPE_STRING),
+]
+
+
+def encode_cursor(values, reverse=False):
+    payload = {'k': [_encode_value(v) for v in values]}
+    if reverse:
+        payload['r'] = 1
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Return ``(values, reverse)`` for a cursor, raising ``ValueError`` if it
+    was not produced by ``encode_cursor``.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = payload['k']
+    except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+        raise ValueError('invalid cursor')
+    if not isinstance(values, list):
+        raise ValueError('invalid cursor')
+    return values, bool(payload.get('r'))
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, decimal.Decimal)):
+        return str(value)
+    return value
+
+
+def keyset_filter(ordering, values, reverse=False):
+    """
+    ``Q`` selecting rows strictly after ``values`` in ``ordering`` (or strictly
+    before them when ``reverse``). Fields may carry a ``-`` prefix.
+    """
+    condition = Q()
+    for i, field in enumerate(ordering):
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        lookup = 'lt' if descending != reverse else 'gt'
+        term = Q(**{f'{name}__{lookup}': values[i]})
+        for previous, value in zip(ordering[:i], values[:i]):
+            term &= Q(**{previous.lstrip('-'): value})
+        condition |= term
+    return condition
+
+
+def key_of(row, ordering):
+    if isinstance(row, dict):
+        return [row[field.lstrip('-')] for field in ordering]
+    return [getattr(row, field.lstrip('-')) for field in ordering]
+
+
+def estimate_count(queryset):
+    """
+    Cheap row estimate: the planner's guess on PostgreSQL, where ``COUNT(*)``
+    has to scan the table, and an exact count elsewhere.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate a queryset on a unique ordered key such as ``('created_at', 'id')``.
+
+        paginator = KeysetPagination(ordering=('created_at', 'id'))
+        page = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response(serializer(page, many=True).data)
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+
+    def __init__(self, ordering, page_size=None, max_page_size=None):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size or getattr(settings, 'API_PAGE_SIZE', 50)
+        self.max_page_size = max_page_size or getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def parse_key(self, model, values):
+        """
+        The cursor's ``values`` converted to the ordering fields' types; a
+        tampered cursor is a 404, never an error inside the ORM.
+        """
+        if len(values) != len(self.ordering):
+            raise NotFound('Invalid cursor.')
+        try:
+            key = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound('Invalid cursor.')
+        if any(value is None for value in key):
+            raise NotFound('Invalid cursor.')
+        return key
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        size = self.get_page_size(request)
+
+        token = request.query_params.get(self.cursor_query_param)
+        values, reverse = None, False
+        if token:
+            try:
+                values, reverse = decode_cursor(token)
+            except ValueError:
+                raise NotFound('Invalid cursor.')
+            values = self.parse_key(queryset.model, values)
+
+        self.estimated_count = None
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.estimated_count = estimate_count(queryset)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(f[1:] if f.startswith('-') else '-' + f for f in ordering)
+            queryset = queryset.filter(keyset_filter(self.ordering, values, reverse=True))
+        elif values is not None:
+            queryset = queryset.filter(keyset_filter(self.ordering, values))
+
+        rows = list(queryset.order_by(*ordering)[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        self.first_key = key_of(rows[0], self.ordering) if rows else values
+        self.last_key = key_of(rows[-1], self.ordering) if rows else values
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or self.last_key is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, encode_cursor(self.last_key))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_key is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(self.base_url, self.cursor_query_param, encode_cursor(self.first_key, reverse=True))
+
+    def get_paginated_response(self, data):
+        body = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.estimated_count is not None:
+            body['estimated_count'] = self.estimated_count
+        body['results'] = data
+        return Response(body)
@@ -0,0 +1,256 @@
+"""
+Request body parsers selected by the request's ``Content-Type``.
+"""
+
+import json
+import mimetypes
+import re
+
+import msgpack
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .base64stream import CHUNK_SIZE, Base64Decoder, Base64Error
+from .uploadhandlers import StoredFileWriter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+class ORJSONParser(JSONParser):
+    """
+    Parses ``application/json`` bodies with orjson (UTF-8 only, as RFC 8259
+    requires), falling back to DRF's parser when orjson is not installed.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % exc)
+
+
+class MessagePackParser(BaseParser):
+    """
+    Parses ``application/msgpack`` bodies. Map keys must be strings.
+    """
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError('MessagePack parse error - %s' % exc)
+
+
+
+# Largest file accepted as base64 (as for resumable uploads).
+UPLOAD_MAX_LENGTH = getattr(settings, 'UPLOAD_MAX_LENGTH', 2 * 1024 ** 3)
+_JSON_WHITESPACE = b' \t\r\n'
+# Where a streamed string's plain run of characters ends.
+_STRING_STOP = re.compile(rb'["\\]')
+_BASE64_ESCAPES = {b'/': b'/', b'n': b'', b'r': b'', b't': b''}
+
+
+class _JSONStream:
+    """Reads a JSON document from a stream a chunk at a time."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffer = b''
+        self.pos = 0
+
+    def _fill(self):
+        if self.pos >= len(self.buffer):
+            self.buffer = self.stream.read(CHUNK_SIZE) if self.stream is not None else b''
+            self.pos = 0
+        return bool(self.buffer)
+
+    def peek(self):
+        return self.buffer[self.pos:self.pos + 1] if self._fill() else b''
+
+    def next(self):
+        char = self.peek()
+        self.pos += len(char)
+        return char
+
+    def skip_whitespace(self):
+        while self.peek() and self.peek() in _JSON_WHITESPACE:
+            self.pos += 1
+
+    def expect(self, char):
+        self.skip_whitespace()
+        if self.next() != char:
+            raise ParseError(f'JSON parse error - expected {char.decode()!r}')
+
+    def value(self, limit):
+        """The next JSON value (of at most ``limit`` bytes of source), decoded."""
+        self.skip_whitespace()
+        raw = bytearray()
+        depth = 0
+        in_string = escaped = False
+        while True:
+            char = self.peek()
+            if not char:
+                break
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == b'\\':
+                    escaped = True
+                elif char == b'"':
+                    in_string = False
+            elif char == b'"':
+                in_string = True
+            elif char in b'[{':
+                depth += 1
+            elif char in b']}':
+                if not depth:
+                    break
+                depth -= 1
+            elif char == b',' and not depth:
+                break
+            raw += char
+            self.pos += 1
+            if len(raw) > limit:
+                raise ParseError(f'JSON parse error - a value is longer than {limit} bytes')
+            if not depth and not in_string and raw[:1] == b'"' and len(raw) > 1:
+                break
+        try:
+            return json.loads(raw)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % exc)
+
+    def stream_string(self, write):
+        """Pass the raw contents of the next JSON string to ``write`` piece by piece."""
+        self.expect(b'"')
+        while True:
+            if not self._fill():
+                raise ParseError('JSON parse error - unterminated string')
+            match = _STRING_STOP.search(self.buffer, self.pos)
+            end = match.start() if match else len(self.buffer)
+            if end > self.pos:
+                write(self.buffer[self.pos:end])
+            self.pos = end
+            if match is None:
+                continue
+            if self.next() == b'"':
+                return
+            escape = _BASE64_ESCAPES.get(self.next())
+            if escape is None:
+                raise ParseError('JSON parse error - unexpected escape in base64 data')
+            write(escape)
+
+
+class _Base64Member:
+    """Decodes a streamed base64 string (optionally a ``data:`` URI) into a ``StoredFileWriter``."""
+
+    def __init__(self, writer, max_length):
+        self.writer = writer
+        self.max_length = max_length
+        self.decoder = Base64Decoder()
+        self.head = b''
+        self.content_type = None
+
+    def write(self, piece):
+        if self.head is not None:
+            # Strip a 'data:<type>;base64,' prefix, which may span pieces.
+            self.head += piece
+            if self.head.startswith(b'data:'[:len(self.head)]) and len(self.head) < 5:
+                return
+            if self.head.startswith(b'data:'):
+                prefix, comma, rest = self.head.partition(b',')
+                if not comma:
+                    if len(self.head) > 256:
+                        raise ParseError('Malformed data URI.')
+                    return
+                self.content_type = prefix[5:].split(b';')[0].decode('ascii', 'replace')
+                piece = rest
+            else:
+                piece = self.head
+            self.head = None
+        try:
+            data = self.decoder.decode(piece)
+        except Base64Error as exc:
+            raise ParseError('Invalid base64 data - %s' % exc)
+        if self.decoder.size > self.max_length:
+            raise ParseError(f'Files larger than {self.max_length} bytes are not accepted.')
+        self.writer.write(data)
+
+    def finish(self):
+        if self.head:
+            self.write(b'')  # shorter than a data URI prefix
+        try:
+            self.decoder.finish()
+        except Base64Error as exc:
+            raise ParseError('Invalid base64 data - %s' % exc)
+        return self.decoder.size
+
+
+class Base64FileJSONParser(BaseParser):
+    """
+    Parses a JSON object whose ``file_key`` member is a file as a base64
+    string (or ``data:`` URI). That member is decoded while the body is read
+    and written straight to ``file_field``'s storage, hashed on the way, so
+    memory use does not grow with the file; the parsed data holds it as a
+    ``StoredUploadedFile`` named by ``file_name_key``. The other members
+    are ordinary JSON values of at most ``MAX_MEMBER_LENGTH`` bytes.
+    """
+    media_type = 'application/json'
+    file_field = None
+    file_key = 'content'
+    file_name_key = 'file_name'
+    content_type_key = 'content_type'
+    MAX_MEMBER_LENGTH = 64 * 1024
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        reader = _JSONStream(stream)
+        data = {}
+        member = None
+        reader.expect(b'{')
+        try:
+            reader.skip_whitespace()
+            if reader.peek() == b'}':
+                reader.next()
+            else:
+                while True:
+                    reader.skip_whitespace()
+                    key = reader.value(self.MAX_MEMBER_LENGTH)
+                    if not isinstance(key, str):
+                        raise ParseError('JSON parse error - object keys must be strings')
+                    reader.expect(b':')
+                    if key == self.file_key:
+                        if member is not None:
+                            raise ParseError(f'JSON parse error - duplicate {key!r}')
+                        writer = StoredFileWriter(self.file_field, str(data.get(self.file_name_key) or 'upload'))
+                        member = _Base64Member(writer, UPLOAD_MAX_LENGTH)
+                        reader.stream_string(member.write)
+                        size = member.finish()
+                    else:
+                        data[key] = reader.value(self.MAX_MEMBER_LENGTH)
+                    reader.skip_whitespace()
+                    separator = reader.next()
+                    if separator == b'}':
+                        break
+                    if separator != b',':
+                        raise ParseError("JSON parse error - expected ',' or '}'")
+            reader.skip_whitespace()
+            if reader.peek():
+                raise ParseError('JSON parse error - data after the object')
+        except Exception:
+            if member is not None:
+                member.writer.abort()
+            raise
+        if member is not None:
+            file_name = str(data.get(self.file_name_key) or 'upload')
+            content_type = (
+                data.get(self.content_type_key) or member.content_type
+                or mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+            )
+            data[self.file_key] = member.writer.finish(file_name, content_type, size)
+        return data
@@ -0,0 +1,201 @@
+"""
+Downsized previews of uploaded images.
+
+List screens should not download full-resolution deed scans. When an image
+is stored, its ``ContentBlob`` is queued (``preview_status='pending'``) and
+``preview_worker`` renders it at each of ``PREVIEW_WIDTHS`` with Pillow, in
+a pool of processes because decoding and resampling are CPU-bound. Workers
+claim blobs before rendering them; an image whose process died is retried
+on its own, up to ``PREVIEW_MAX_ATTEMPTS`` times. Previews are stored under
+the SHA-256 of the image they were made from, so content uploaded twice is
+rendered once; ``gc_blobs`` deletes them with the blob.
+
+Serializers expose the URLs with ``PreviewURLsField``; list queries fetch
+them for the whole page with ``preview_annotation``.
+"""
+
+import io
+import logging
+import posixpath
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import F, JSONField, OuterRef, Subquery
+from django.db.models.functions import Right
+from django.utils import timezone
+
+from .cache import property_cache
+from .models import ContentBlob, Document, Property, ResourceVersion
+from .storage import blob_digest, blob_name, media_storage
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_PREFIX = getattr(settings, 'PREVIEW_PREFIX', 'previews')
+PREVIEW_WIDTHS = tuple(sorted(getattr(settings, 'PREVIEW_WIDTHS', (160, 480, 1024))))
+PREVIEW_FORMAT = getattr(settings, 'PREVIEW_FORMAT', 'WEBP').upper()
+PREVIEW_QUALITY = getattr(settings, 'PREVIEW_QUALITY', 80)
+PREVIEW_MAX_ATTEMPTS = getattr(settings, 'PREVIEW_MAX_ATTEMPTS', 3)
+PREVIEW_LEASE = getattr(settings, 'PREVIEW_LEASE', 600)
+
+_EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg'}
+
+
+def preview_format():
+    """``PREVIEW_FORMAT``, or JPEG if Pillow was built without WebP."""
+    from PIL import features
+
+    if PREVIEW_FORMAT == 'WEBP' and not features.check('webp'):
+        return 'JPEG'
+    return PREVIEW_FORMAT
+
+
+def preview_name(sha256, width, fmt):
+    return posixpath.join(PREVIEW_PREFIX, sha256[:2], sha256[2:4], f'{sha256}-{width}.{_EXTENSIONS[fmt]}')
+
+
+def render_previews(sha256):
+    """
+    Render and store the previews of blob ``sha256``; returns ``{width: name}``.
+    Runs in pool processes, so it uses the storage but not the database.
+    """
+    from PIL import Image, ImageOps
+
+    storage = media_storage.inner
+    fmt = preview_format()
+    previews = {}
+    with storage.open(blob_name(sha256), 'rb') as f:
+        image = Image.open(f)
+        # JPEG decodes straight to a reduced scale that still covers the largest preview.
+        image.draft('RGB', (PREVIEW_WIDTHS[-1], PREVIEW_WIDTHS[-1]))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if fmt != 'JPEG' and image.has_transparency_data else 'RGB')
+        # Largest first, each one downscaled from the previous.
+        for width in reversed(PREVIEW_WIDTHS):
+            if width >= image.width and width != PREVIEW_WIDTHS[0]:
+                continue  # never upscale; the smallest preview is always made
+            image.thumbnail((width, image.height), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, fmt, quality=PREVIEW_QUALITY)
+            name = preview_name(sha256, width, fmt)
+            storage.delete(name)  # a re-render replaces the file instead of saving beside it
+            previews[str(width)] = storage.save(name, ContentFile(buffer.getvalue()))
+    return previews
+
+
+def _render(sha256):
+    try:
+        return render_previews(sha256), None
+    except Exception as e:  # not an image Pillow can read, too large, gone from storage...
+        return None, f'{type(e).__name__}: {e}'
+
+
+def claim_pending(limit):
+    """
+    Claim up to ``limit`` queued blobs with a conditional UPDATE on their
+    status, as the pin queue does, so two workers never render the same
+    image. Claims of workers that died lapse after ``PREVIEW_LEASE``.
+
+    A blob retried after its pool process died is claimed on its own, so
+    only the image that killed the process uses up its attempts.
+    """
+    now = timezone.now()
+    expired = ContentBlob.objects.filter(
+        preview_status='rendering', preview_claimed_at__lt=now - timedelta(seconds=PREVIEW_LEASE)
+    )
+    expired.filter(preview_attempts__gte=PREVIEW_MAX_ATTEMPTS).update(preview_status='failed', preview_claimed_at=None)
+    expired.update(preview_status='pending', preview_claimed_at=None)
+
+    candidates = ContentBlob.objects.filter(preview_status='pending').order_by('created_at').values_list(
+        'sha256', 'preview_attempts'
+    )[:limit * 2]
+    claimed = []
+    for sha256, attempts in candidates:
+        if attempts and claimed:
+            continue
+        won = ContentBlob.objects.filter(sha256=sha256, preview_status='pending').update(
+            preview_status='rendering', preview_claimed_at=now, preview_attempts=F('preview_attempts') + 1
+        )
+        if won:
+            claimed.append(sha256)
+            if attempts:
+                break
+        if len(claimed) >= limit:
+            break
+    return claimed
+
+
+def release_unfinished(sha256s):
+    """Requeue claimed blobs whose render never reported back, or give up on them after ``PREVIEW_MAX_ATTEMPTS``."""
+    claimed = ContentBlob.objects.filter(sha256__in=sha256s, preview_status='rendering')
+    claimed.filter(preview_attempts__gte=PREVIEW_MAX_ATTEMPTS).update(preview_status='failed', preview_claimed_at=None)
+    claimed.update(preview_status='pending', preview_claimed_at=None)
+
+
+def render_pending(executor, limit=32):
+    """
+    Render up to ``limit`` queued blobs on ``executor`` and record the
+    outcome. Returns the number of blobs processed.
+
+    If a pool process dies (e.g. killed for memory on a huge image), the
+    blobs without a result are requeued and ``BrokenProcessPool`` is
+    re-raised for the caller to start a new pool.
+    """
+    pending = claim_pending(limit)
+    finished = []
+    try:
+        for sha256, (previews, error) in zip(pending, executor.map(_render, pending)):
+            finished.append(sha256)
+            if error is not None:
+                logger.warning("Could not render previews of blob %s: %s", sha256, error)
+                ContentBlob.objects.filter(sha256=sha256).update(preview_status='failed', preview_claimed_at=None)
+            elif not ContentBlob.objects.filter(sha256=sha256).update(
+                preview_status='done', previews=previews, preview_claimed_at=None
+            ):
+                # Collected by gc_blobs meanwhile.
+                for name in previews.values():
+                    media_storage.inner.delete(name)
+    except BrokenProcessPool:
+        unfinished = pending[len(finished):]
+        logger.error("A preview process died rendering blob(s) %s", ', '.join(unfinished))
+        release_unfinished(unfinished)
+        raise
+    finally:
+        if finished:
+            # Responses showing preview URLs change (see PreviewURLsField).
+            ResourceVersion.bump(ContentBlob._meta.label_lower)
+            touch_referencing_rows(finished)
+    return len(pending)
+
+
+def touch_referencing_rows(sha256s):
+    """
+    Move ``updated_at`` of the properties and documents stored as the blobs,
+    so the change feed hands out their new ``preview_urls``.
+    """
+    names = [blob_name(sha256) for sha256 in sha256s]
+    now = timezone.now()
+    properties = list(Property.objects.filter(proof_of_ownership_document__in=names).values_list('pk', flat=True))
+    if properties:
+        Property.objects.filter(pk__in=properties).update(updated_at=now)
+        for pk in properties:
+            property_cache.invalidate_tag(f'property:{pk}')
+        # .update() sends no signals; keep ETags honest.
+        ResourceVersion.bump(Property._meta.label_lower)
+    if Document.objects.filter(document_file__in=names).update(updated_at=now):
+        ResourceVersion.bump(Document._meta.label_lower)
+
+
+def preview_annotation(file_field):
+    """Subquery of the previews of the blob in ``file_field``, for ``QuerySet.annotate()``."""
+    blobs = ContentBlob.objects.filter(sha256=Right(OuterRef(file_field), 64))
+    return Subquery(blobs.values('previews')[:1], output_field=JSONField())
+
+
+def previews_of(name):
+    """``{width: name}`` of the previews of the stored file ``name``, ``None`` if it is not a blob."""
+    sha256 = blob_digest(name)
+    if sha256 is None:
+        return None
+    return ContentBlob.objects.filter(sha256=sha256).values_list('previews', flat=True).first()
@@ -0,0 +1,73 @@
+"""
+Response renderers selected by the client's ``Accept`` header.
+
+``ORJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer`` with
+orjson doing the encoding, and falls back to DRF when orjson is not
+installed. ``MessagePackRenderer`` serves ``application/msgpack`` for
+clients that prefer a compact binary body.
+"""
+
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+# Types orjson/msgpack can't encode natively (Decimal, lazy strings, ...) go
+# through DRF's encoder, so every format represents them the same way.
+_drf_default = encoders.JSONEncoder().default
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renders ``application/json`` with orjson.
+
+    Datetimes are passed to DRF's encoder to keep its ISO 8601 formatting,
+    and U+2028/U+2029 are escaped exactly like ``JSONRenderer`` does.
+    orjson only supports two-space indentation, which is used whenever an
+    indent is requested.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+        try:
+            ret = orjson.dumps(data, default=_drf_default, option=option)
+        except orjson.JSONEncodeError:
+            # Out-of-range integers and the like: let DRF produce its usual error.
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders ``application/msgpack`` (request it with ``Accept`` or ``?format=msgpack``).
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_drf_default, use_bin_type=True)
+
+
+class FileDownloadRenderer(ORJSONRenderer):
+    """
+    Accepts any media type, so a file download is not refused with 406
+    whatever the client's ``Accept`` says. The file itself bypasses
+    rendering; only JSON error bodies come through here.
+    """
+    media_type = '*/*'
+    format = 'download'
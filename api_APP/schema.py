@@ -0,0 +1,21 @@
+"""
+drf-yasg schema customisations.
+
+Kept apart from ``parsers.py``: DRF imports the parsers while loading its
+settings, before drf-yasg can be imported.
+"""
+
+from drf_yasg.inspectors import SwaggerAutoSchema
+from drf_yasg.utils import is_form_media_type
+
+
+class UploadAutoSchema(SwaggerAutoSchema):
+    """
+    Documents upload endpoints as multipart forms while still listing the
+    JSON/MessagePack content types they accept for metadata-only requests.
+    (drf-yasg otherwise documents only the non-form types.)
+    """
+
+    def get_consumes(self):
+        media_types = [parser.media_type for parser in self.get_parser_classes()]
+        return sorted(media_types, key=lambda media_type: not is_form_media_type(media_type))
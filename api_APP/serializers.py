@@ -8,11 +8,180 @@ from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
 from django.conf import settings # To reference settings.AUTH_USER_MODEL if needed directly
 
-from .models import UserProfile, Property, Document, Transaction, DigitalSignature
+from .models import (
+    UserProfile, Property, Document, Transaction, DigitalSignature, SigningRequirement, UploadSession, ContentBlob,
+)
+from .previews import preview_annotation, previews_of
+from .signatures import verify
+from .storage import media_storage
+from drf_yasg import openapi
 
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+SPARSE_FIELDSET_PARAMETERS = [
+    openapi.Parameter('fields', openapi.IN_QUERY, description="Comma-separated fields to return, e.g. 'id,document_hash' or 'id,property_details.ipfs_hash'", type=openapi.TYPE_STRING),
+    openapi.Parameter('expand', openapi.IN_QUERY, description="Comma-separated nested '*_details' objects to include, e.g. 'property_details,property_details.current_owner_details'", type=openapi.TYPE_STRING),
+]
+
+
+def _split_param(value):
+    return {item.strip() for item in (value or '').split(',') if item.strip()}
+
+
+def requested_expansions(request):
+    """
+    Dotted paths of the nested representations asked for with ``?expand=``.
+    Naming a nested field in ``?fields=`` expands it too.
+    """
+    query = getattr(request, 'query_params', None) or {}
+    expand = _split_param(query.get('expand'))
+    for field in _split_param(query.get('fields')):
+        parts = field.split('.')[:-1]
+        expand.update('.'.join(parts[:i + 1]) for i in range(len(parts)))
+    return expand
+
+
+def _is_expanded(path, expand):
+    return path in expand or any(item.startswith(path + '.') for item in expand)
+
+
+class PreviewURLsField(serializers.DictField):
+    """
+    URLs of the downsized previews of an image file field, keyed by width
+    (see ``previews.py``); empty until ``preview_worker`` has rendered them,
+    ``null`` without a stored file.
+
+    The previews are read from a query annotation named after the field's
+    source (added by ``setup_eager_loading()`` and ``CompiledSerializer``),
+    or looked up per object when it is missing.
+    """
+
+    def __init__(self, file_field, **kwargs):
+        self.file_field = file_field
+        kwargs.setdefault('source', file_field + '_previews')
+        kwargs.setdefault('child', serializers.URLField())
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def annotation(self):
+        return preview_annotation(self.file_field)
+
+    def get_attribute(self, instance):
+        try:
+            return getattr(instance, self.source)
+        except AttributeError:
+            return previews_of(getattr(instance, self.file_field).name)
+
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for width, name in value.items():
+            url = media_storage.url(name)
+            urls[width] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets and opt-in expansion driven by the request's query string.
+
+    Nested ``*_details`` representations are left out unless requested with
+    ``?expand=`` (dotted for deeper levels), and ``?fields=`` keeps only the
+    listed fields on read. ``setup_eager_loading()`` joins exactly the tables
+    the expanded representation will read.
+    """
+
+    def _field_path(self):
+        parts = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                parts.append(node.field_name)
+            node = node.parent
+        return ''.join(part + '.' for part in reversed(parts))
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        prefix = self._field_path()
+        expand = requested_expansions(request)
+        for name in [name for name in fields if name.endswith('_details')]:
+            if not _is_expanded(prefix + name, expand):
+                del fields[name]
+        if prefix:
+            # Annotations are only added to the top-level query.
+            for name in [name for name, field in fields.items() if hasattr(field, 'annotation')]:
+                del fields[name]
+
+        # Writes need every field to validate; sparse fieldsets only shape reads.
+        if request is not None and not hasattr(self.root, 'initial_data'):
+            only = {
+                field[len(prefix):].split('.', 1)[0]
+                for field in _split_param(request.query_params.get('fields'))
+                if field.startswith(prefix)
+            }
+            if only:
+                # Explicitly expanded objects are kept even if not listed.
+                only.update(name for name in fields if name.endswith('_details'))
+                for name in [name for name in fields if name not in only]:
+                    del fields[name]
+        return fields
+
+    @classmethod
+    def _related_paths(cls, expand, path_prefix='', source_prefix=''):
+        paths = []
+        for name, field in cls._declared_fields.items():
+            if not name.endswith('_details') or not isinstance(field, serializers.BaseSerializer):
+                continue
+            path = path_prefix + name
+            if not _is_expanded(path, expand):
+                continue
+            source = source_prefix + (field.source or name)
+            paths.append(source)
+            if issubclass(type(field), DynamicFieldsMixin):
+                paths += type(field)._related_paths(expand, path + '.', source + '__')
+        return paths
+
+    @classmethod
+    def expanded_models(cls, request=None, path_prefix=''):
+        """Models of the nested representations included for ``request``."""
+        expand = requested_expansions(request)
+        models = []
+        for name, field in cls._declared_fields.items():
+            if not name.endswith('_details') or not isinstance(field, serializers.ModelSerializer):
+                continue
+            path = path_prefix + name
+            if not _is_expanded(path, expand):
+                continue
+            models.append(field.Meta.model)
+            if issubclass(type(field), DynamicFieldsMixin):
+                models += type(field).expanded_models(request, path + '.')
+        if not path_prefix and cls._annotations(request):
+            models.append(ContentBlob)  # preview_worker bumps its version
+        return models
+
+    @classmethod
+    def _annotations(cls, request=None):
+        """Annotations read by the top-level fields that ``?fields=`` keeps."""
+        query = getattr(request, 'query_params', None) or {}
+        only = {field.split('.', 1)[0] for field in _split_param(query.get('fields'))}
+        return {
+            field.source: field.annotation()
+            for name, field in cls._declared_fields.items()
+            if hasattr(field, 'annotation') and (not only or name in only)
+        }
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, request=None):
+        """Join every relation the requested representation reads, so a page costs one query."""
+        related = cls._related_paths(requested_expansions(request))
+        annotations = cls._annotations(request)
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset.select_related(*related) if related else queryset
+
+
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the User model.
     """
@@ -25,7 +194,16 @@ class UserSerializer(serializers.ModelSerializer):
         # Add other fields as needed, e.g., is_staff, is_active
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class AccountSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Serializer for Django auth users (transaction parties and signers).
+    """
+    class Meta:
+        model = User
+        fields = ['id', 'username']
+
+
+class UserProfileSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the UserProfile model.
     """
@@ -48,7 +226,7 @@ from django.contrib.auth import get_user_model # Or your UserProfile model path
 #UserProfile = get_user_model()
 
 
-class PropertySerializer(serializers.ModelSerializer):
+class PropertySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Property model.
     """
@@ -62,6 +240,7 @@ class PropertySerializer(serializers.ModelSerializer):
     # current_owner = serializers.PrimaryKeyRelatedField(queryset=UserProfile.objects.all())
 
     proof_of_ownership_document = serializers.FileField(required=False, allow_null=True, use_url=True) # use_url=True is good for GET
+    preview_urls = PreviewURLsField('proof_of_ownership_document')
 
     class Meta:
         model = Property
@@ -70,7 +249,7 @@ class PropertySerializer(serializers.ModelSerializer):
             'description',
             'current_owner',  # <--- ADD THIS FOR WRITING (expects UserProfile ID)
             'current_owner_details', # <--- This is for GET requests (read-only)
-            'proof_of_ownership_document', 'gps_latitude', 'gps_longitude',
+            'proof_of_ownership_document', 'preview_urls', 'gps_latitude', 'gps_longitude',
             'survey_plan_hash','ipfs_hash', 'created_at', 'updated_at'
         ]
         read_only_fields = ('id', 'created_at', 'updated_at', 'ipfs_hash') # ipfs_hash is set by the model's save method
@@ -80,7 +259,7 @@ class PropertySerializer(serializers.ModelSerializer):
         # }
 
 
-class DocumentSerializer(serializers.ModelSerializer):
+class DocumentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Document model.
     """
@@ -91,27 +270,52 @@ class DocumentSerializer(serializers.ModelSerializer):
     # It allows null as per model.
     uploaded_by_details = UserSerializer(source='uploaded_by', read_only=True, allow_null=True)
 
+    preview_urls = PreviewURLsField('document_file')
+
     class Meta:
         model = Document
         fields = [
-            'id', 'property', 'property_details', 'document_type', 'document_file',
+            'id', 'property', 'property_details', 'document_type', 'document_file', 'preview_urls',
             'document_hash', 'uploaded_by', 'uploaded_by_details', 'upload_date'
         ]
         read_only_fields = ('id', 'upload_date')
         # 'uploaded_by' can be null, so ensure it's not required if not set during creation
         extra_kwargs = {
-            'uploaded_by': {'required': False, 'allow_null': True}
+            'uploaded_by': {'required': False, 'allow_null': True},
+            # Filled in from the upload when omitted (see validate)
+            'document_hash': {'required': False},
         }
 
-
-class TransactionSerializer(serializers.ModelSerializer):
+    def validate(self, attrs):
+        # Files streamed through StreamingHashUploadHandler arrive with their
+        # SHA-256 computed; it is authoritative over the client's value.
+        digest = getattr(attrs.get('document_file'), 'sha256', None)
+        supplied = attrs.get('document_hash')
+        if digest:
+            if supplied and supplied.lower() != digest:
+                raise serializers.ValidationError(
+                    {'document_hash': ['Does not match the SHA-256 of the uploaded file.']}
+                )
+            duplicates = Document.objects.filter(document_hash=digest)
+            if self.instance is not None:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if not supplied and duplicates.exists():
+                raise serializers.ValidationError({'document_hash': ['This document has already been uploaded.']})
+            attrs['document_hash'] = digest
+        elif self.instance is None and not supplied:
+            raise serializers.ValidationError({'document_hash': ['This field is required.']})
+        return attrs
+
+
+class TransactionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Transaction model.
     """
     # 'property', 'seller', 'buyer' will be IDs for write operations.
     property_details = PropertySerializer(source='property', read_only=True) # Optional
-    seller_details = UserSerializer(source='seller', read_only=True)
-    buyer_details = UserSerializer(source='buyer', read_only=True)
+    # seller/buyer are auth users, not UserProfiles
+    seller_details = AccountSerializer(source='seller', read_only=True)
+    buyer_details = AccountSerializer(source='buyer', read_only=True)
 
     class Meta:
         model = Transaction
@@ -119,27 +323,149 @@ class TransactionSerializer(serializers.ModelSerializer):
             'id', 'property', 'property_details', 'seller', 'seller_details',
             'buyer', 'buyer_details', 'transaction_price', 'transaction_date',
             'status', 'blockchain_transaction_hash', 'blockchain_block_number',
-            'blockchain_timestamp', 'created_at', 'updated_at'
+            'blockchain_timestamp', 'signatures_required', 'signatures_collected', 'created_at', 'updated_at'
         ]
-        read_only_fields = ('id', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'signatures_required', 'signatures_collected', 'created_at', 'updated_at')
 
 
-class DigitalSignatureSerializer(serializers.ModelSerializer):
+class DigitalSignatureSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the DigitalSignature model.
     """
     # 'document', 'signer' will be IDs for write operations.
     document_details = DocumentSerializer(source='document', read_only=True) # Optional
-    signer_details = UserSerializer(source='signer', read_only=True)
+    signer_details = AccountSerializer(source='signer', read_only=True)
 
     class Meta:
         model = DigitalSignature
         fields = [
             'id', 'document', 'document_details', 'signer', 'signer_details',
             'signature_value', 'signer_public_key', 'signed_at',
-            'document_hash_at_signing', 'blockchain_signature_hash'
+            'document_hash_at_signing', 'verified', 'blockchain_signature_hash'
         ]
-        read_only_fields = ('id', 'signed_at')
+        # The signer is the authenticated user (set by the view).
+        read_only_fields = ('id', 'signer', 'signed_at', 'verified')
+
+    def validate(self, attrs):
+        # Checked once, when the signature is recorded; its inputs are immutable.
+        if self.instance is None:
+            attrs['verified'] = verify(
+                attrs['signer_public_key'], attrs['signature_value'], attrs['document_hash_at_signing']
+            )
+        return attrs
+
+
+# Most signatures one bulk verification request may cover.
+SIGNATURE_BULK_VERIFY_MAX = getattr(settings, 'SIGNATURE_BULK_VERIFY_MAX', 10000)
+
+
+class SignatureVerificationRequestSerializer(serializers.Serializer):
+    """
+    Which signatures to re-verify: listed IDs, or all signatures on a
+    document or on the documents of a property.
+    """
+    ids = serializers.ListField(
+        child=serializers.UUIDField(), required=False, allow_empty=False, max_length=SIGNATURE_BULK_VERIFY_MAX
+    )
+    document = serializers.UUIDField(required=False)
+    property = serializers.UUIDField(required=False)
+
+    def validate(self, attrs):
+        if len(attrs) != 1:
+            raise serializers.ValidationError("Give exactly one of 'ids', 'document' or 'property'.")
+        return attrs
+
+
+class SigningRequirementListSerializer(serializers.ListSerializer):
+    """Several requirements posted at once; a pair listed twice is rejected."""
+
+    def validate(self, attrs):
+        pairs = [(item['document'].pk, item['party'].pk) for item in attrs]
+        if len(set(pairs)) != len(pairs):
+            raise serializers.ValidationError("The same party and document are listed more than once.")
+        return attrs
+
+
+class SigningRequirementSerializer(serializers.ModelSerializer):
+    """
+    Serializer for signing requirements. The transaction is taken from the
+    URL (``context['transaction']``); the document must be one of its property's.
+    """
+    class Meta:
+        model = SigningRequirement
+        fields = ['id', 'transaction', 'document', 'party', 'fulfilled', 'created_at']
+        read_only_fields = ('id', 'transaction', 'fulfilled', 'created_at')
+        list_serializer_class = SigningRequirementListSerializer
+
+    def validate(self, attrs):
+        transaction = self.context['transaction']
+        if attrs['document'].property_id != transaction.property_id:
+            raise serializers.ValidationError({'document': ["The document does not belong to the transaction's property."]})
+        if SigningRequirement.objects.filter(transaction=transaction, document=attrs['document'], party=attrs['party']).exists():
+            raise serializers.ValidationError("This party is already required to sign this document.")
+        return attrs
+
+
+# Most signatures one batch signing request may create.
+SIGNATURE_BATCH_MAX = getattr(settings, 'SIGNATURE_BATCH_MAX', 1000)
+
+
+class SignatureBatchItemSerializer(serializers.Serializer):
+    """
+    One signature of a batch. ``document`` is a plain UUID: the documents of
+    the whole batch are fetched with a single query by the view.
+    """
+    document = serializers.UUIDField()
+    signature_value = serializers.CharField()
+    signer_public_key = serializers.CharField(max_length=255)
+    document_hash_at_signing = serializers.CharField(max_length=255)
+
+
+class SignatureBatchSerializer(serializers.Serializer):
+    """
+    Signatures recorded together for the authenticated user. Items are
+    validated one by one by the view, so a bad item does not reject the rest.
+    """
+    signatures = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=SIGNATURE_BATCH_MAX,
+        help_text="Items with document, signature_value, signer_public_key and document_hash_at_signing."
+    )
+
+
+# Largest file accepted by resumable uploads (2 GiB unless configured).
+UPLOAD_MAX_LENGTH = getattr(settings, 'UPLOAD_MAX_LENGTH', 2 * 1024 ** 3)
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for resumable upload sessions. The owner, progress and expiry
+    are set by the server.
+    """
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'target', 'file_name', 'content_type', 'length', 'offset', 'created_at', 'expires_at']
+        read_only_fields = ('id', 'offset', 'created_at', 'expires_at')
+
+    def validate_length(self, value):
+        if value < 1:
+            raise serializers.ValidationError('Must be at least 1 byte.')
+        if value > UPLOAD_MAX_LENGTH:
+            raise serializers.ValidationError(f'Files larger than {UPLOAD_MAX_LENGTH} bytes are not accepted.')
+        return value
+
+
+class DirectUploadSessionSerializer(UploadSessionSerializer):
+    """
+    Upload session for a file sent straight to S3; the client states the
+    file's SHA-256 up front.
+    """
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', help_text="Hex SHA-256 of the file.")
+
+    class Meta(UploadSessionSerializer.Meta):
+        fields = UploadSessionSerializer.Meta.fields + ['sha256']
+
+    def validate_sha256(self, value):
+        return value.lower()
 
 
 class UserLoginSerializer(serializers.Serializer):
@@ -177,7 +503,7 @@ class UserLoginSerializer(serializers.Serializer):
 
 
 
-class NINInfoSerializer(serializers.ModelSerializer):
+class NINInfoSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = NINInfo
         # Specify all fields from the NINInfo model to be included in the serializer.
@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import audit, signing
+from .cache import property_cache
+from .models import (
+    ChangeTombstone, DigitalSignature, Document, Property, ResourceVersion, SigningRequirement, Transaction, UserProfile,
+)
+from .storage import media_storage
+
+
+@receiver([post_save, post_delete], sender=Property)
+def invalidate_cached_property(sender, instance, **kwargs):
+    property_cache.invalidate_tag(f'property:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_cached_owner(sender, instance, **kwargs):
+    # Cached properties embed their owner's details.
+    property_cache.invalidate_tag(f'userprofile:{instance.pk}')
+
+
+@receiver(post_delete, sender=Property)
+@receiver(post_delete, sender=Transaction)
+def record_tombstone(sender, instance, **kwargs):
+    resource = 'properties' if sender is Property else 'transactions'
+    ChangeTombstone.objects.create(resource=resource, object_id=instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Property)
+@receiver([post_save, post_delete], sender=Document)
+@receiver([post_save, post_delete], sender=Transaction)
+@receiver([post_save, post_delete], sender=DigitalSignature)
+@receiver([post_save, post_delete], sender=UserProfile)
+@receiver([post_save, post_delete], sender=get_user_model())
+def bump_resource_version(sender, update_fields=None, **kwargs):
+    # Changes the ETag of every list (or expanded object) showing this model.
+    # Logging in saves only last_login, which no response shows; bumping on
+    # it would invalidate every cached list on every login.
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    ResourceVersion.bump(sender._meta.label_lower)
+
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=DigitalSignature)
+def audit_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:  # fixtures being loaded
+        audit.record('create' if created else 'update', instance)
+
+
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=DigitalSignature)
+def audit_delete(sender, instance, **kwargs):
+    audit.record('delete', instance)
+
+
+@receiver(post_save, sender=DigitalSignature)
+@receiver(post_delete, sender=DigitalSignature)
+def update_signing_progress(sender, instance, raw=False, **kwargs):
+    if not raw:
+        signing.refresh(SigningRequirement.objects.filter(document_id=instance.document_id, party_id=instance.signer_id))
+
+
+@receiver(post_save, sender=Document)
+def update_signing_progress_of_document(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # A new document hash voids the signatures of the old one.
+    if not (created or raw) and (update_fields is None or 'document_hash' in update_fields):
+        signing.refresh(SigningRequirement.objects.filter(document_id=instance.pk))
+
+
+@receiver(pre_save, sender=SigningRequirement)
+def remember_requirement_transaction(sender, instance, raw=False, **kwargs):
+    instance._stored_transaction = None
+    if not (raw or instance._state.adding):
+        instance._stored_transaction = sender.objects.filter(pk=instance.pk).values_list('transaction_id', flat=True).first()
+
+
+@receiver(post_save, sender=SigningRequirement)
+def count_signing_requirement(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        signing.adjust({instance.transaction_id: (1, int(instance.fulfilled))})
+        signing.refresh(sender.objects.filter(pk=instance.pk))
+    else:
+        # Edited in place (admin only): recount what it may have moved between.
+        signing.recount({instance.transaction_id, instance._stored_transaction or instance.transaction_id})
+
+
+@receiver(post_delete, sender=SigningRequirement)
+def uncount_signing_requirement(sender, instance, **kwargs):
+    signing.adjust({instance.transaction_id: (-1, -int(instance.fulfilled))})
+
+
+STORED_FILE_FIELDS = {
+    Property: 'proof_of_ownership_document',
+    Document: 'document_file',
+}
+
+
+@receiver(pre_save, sender=Property)
+@receiver(pre_save, sender=Document)
+def remember_stored_file(sender, instance, update_fields=None, **kwargs):
+    field = STORED_FILE_FIELDS[sender]
+    instance._stored_file = None
+    if not instance._state.adding and (update_fields is None or field in update_fields):
+        instance._stored_file = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_save, sender=Document)
+def count_stored_file_references(sender, instance, created, update_fields=None, **kwargs):
+    field = STORED_FILE_FIELDS[sender]
+    if not created and update_fields is not None and field not in update_fields:
+        return
+    previous = getattr(instance, '_stored_file', None) or ''
+    current = getattr(instance, field).name or ''
+    if current != previous:
+        media_storage.retain(current)
+        media_storage.release(previous)
+
+
+@receiver(post_delete, sender=Property)
+@receiver(post_delete, sender=Document)
+def release_stored_file(sender, instance, **kwargs):
+    media_storage.release(getattr(instance, STORED_FILE_FIELDS[sender]).name)
@@ -0,0 +1,203 @@
+"""
+Cryptographic verification of document signatures.
+
+A ``DigitalSignature`` signs the UTF-8 bytes of its
+``document_hash_at_signing`` with the signer's private key. Two schemes are
+recognised from the public key itself:
+
+* Ed25519: a 32-byte raw key;
+* ECDSA over secp256k1 with SHA-256: a 33-byte compressed or 65-byte
+  uncompressed SEC1 point. Signatures are DER, or 64-byte ``r || s``
+  (65 bytes with a trailing recovery id is accepted too).
+
+Keys and signatures are hex or base64 (standard or URL-safe); keys may also
+be PEM. Parsed keys are kept in an LRU cache, since the same signers sign
+many documents, so a verification costs one OpenSSL call.
+"""
+
+import base64
+import binascii
+import functools
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+
+ED25519 = 'ed25519'
+SECP256K1 = 'ecdsa-secp256k1'
+
+# Parsed public keys kept in memory (per process).
+KEY_CACHE_SIZE = getattr(settings, 'SIGNATURE_KEY_CACHE_SIZE', 4096)
+# Bulk verification: batches up to VERIFY_INLINE_MAX are checked in the
+# calling process, larger ones are spread over VERIFY_PROCESSES processes.
+VERIFY_PROCESSES = getattr(settings, 'SIGNATURE_VERIFY_PROCESSES', None) or min(4, os.cpu_count() or 1)
+VERIFY_INLINE_MAX = getattr(settings, 'SIGNATURE_VERIFY_INLINE_MAX', 256)
+# Seconds a pool may sit unused before its processes are stopped.
+VERIFY_POOL_IDLE = getattr(settings, 'SIGNATURE_VERIFY_POOL_IDLE', 300)
+
+_HEX = re.compile(r'^(0x)?[0-9a-fA-F]+$')
+_ECDSA = ec.ECDSA(hashes.SHA256())
+
+
+class SignatureError(ValueError):
+    """A public key or signature that cannot be decoded."""
+
+
+def _decode(text):
+    text = text.strip()
+    if _HEX.match(text) and len(text) % 2 == 0:
+        return bytes.fromhex(text[2:] if text[:2].lower() == '0x' else text)
+    altchars = b'-_' if '-' in text or '_' in text else None  # URL-safe alphabet
+    try:
+        return base64.b64decode(text + '=' * (-len(text) % 4), altchars=altchars, validate=True)
+    except binascii.Error:
+        raise SignatureError('not hex or base64') from None
+
+
+@functools.lru_cache(maxsize=KEY_CACHE_SIZE)
+def load_public_key(text):
+    """``(scheme, key)`` of a public key in any accepted encoding."""
+    if text.lstrip().startswith('-----BEGIN'):
+        try:
+            key = serialization.load_pem_public_key(text.strip().encode())
+        except ValueError as e:
+            raise SignatureError(f'invalid PEM key: {e}') from None
+        if isinstance(key, ed25519.Ed25519PublicKey):
+            return ED25519, key
+        if isinstance(key, ec.EllipticCurvePublicKey) and isinstance(key.curve, ec.SECP256K1):
+            return SECP256K1, key
+        raise SignatureError('only Ed25519 and secp256k1 keys are supported')
+    raw = _decode(text)
+    try:
+        if len(raw) == 32:
+            return ED25519, ed25519.Ed25519PublicKey.from_public_bytes(raw)
+        if len(raw) in (33, 65):
+            return SECP256K1, ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256K1(), raw)
+    except ValueError as e:
+        raise SignatureError(f'invalid public key: {e}') from None
+    raise SignatureError(f'a {len(raw)}-byte key is neither Ed25519 nor secp256k1')
+
+
+def _ecdsa_signatures(raw):
+    """DER encodings ``raw`` may stand for: itself, and/or a fixed-size ``r || s``."""
+    candidates = []
+    if len(raw) >= 8 and raw[0] == 0x30 and raw[1] == len(raw) - 2:
+        candidates.append(raw)
+    if len(raw) in (64, 65):
+        candidates.append(encode_dss_signature(int.from_bytes(raw[:32], 'big'), int.from_bytes(raw[32:64], 'big')))
+    return candidates
+
+
+def verify(public_key, signature, message):
+    """
+    Whether ``signature`` (text) is valid for ``message`` (text or bytes)
+    under ``public_key`` (text). Undecodable keys or signatures are invalid.
+    """
+    if isinstance(message, str):
+        message = message.encode()
+    try:
+        scheme, key = load_public_key(public_key)
+        raw = _decode(signature)
+        if scheme == ED25519:
+            key.verify(raw, message)
+            return True
+    except (SignatureError, InvalidSignature, ValueError):
+        return False
+    for der in _ecdsa_signatures(raw):
+        try:
+            key.verify(der, message, _ECDSA)
+            return True
+        except (InvalidSignature, ValueError):
+            pass
+    return False
+
+
+def verify_many(items):
+    """
+    ``[valid, ...]`` for ``(public_key, signature, message)`` triples.
+
+    Neither scheme has a batch API in OpenSSL: each signature is one native
+    call, with every distinct key parsed once through the cache.
+    """
+    return [verify(public_key, signature, message) for public_key, signature, message in items]
+
+
+_pool = None
+_pool_users = 0
+_idle_timer = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool, _pool_users
+    with _pool_lock:
+        if _idle_timer is not None:
+            _idle_timer.cancel()
+        if _pool is None:
+            # Spawned, not forked: web server processes may be running threads.
+            _pool = ProcessPoolExecutor(VERIFY_PROCESSES, mp_context=multiprocessing.get_context('spawn'))
+        _pool_users += 1
+        return _pool
+
+
+def _release_pool(pool):
+    """Done with ``pool``: stop it once it has been unused for ``VERIFY_POOL_IDLE`` seconds."""
+    global _pool_users, _idle_timer
+    with _pool_lock:
+        _pool_users -= 1
+        if _pool is pool and not _pool_users:
+            _idle_timer = threading.Timer(VERIFY_POOL_IDLE, _discard_idle_pool, (pool,))
+            _idle_timer.daemon = True
+            _idle_timer.start()
+
+
+def _discard_idle_pool(pool):
+    with _pool_lock:
+        if _pool is not pool or _pool_users:
+            return  # replaced, or picked up again meanwhile
+    _discard_pool(pool)
+
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def verify_parallel(items):
+    """
+    ``verify_many()`` across ``VERIFY_PROCESSES`` processes. The pool is
+    started on first use and stopped after ``VERIFY_POOL_IDLE`` seconds
+    without any; each worker caches keys of its own.
+    """
+    items = list(items)
+    if len(items) <= VERIFY_INLINE_MAX or VERIFY_PROCESSES < 2:
+        return verify_many(items)
+    # A few chunks per process evens out the load without much pickling.
+    size = max(VERIFY_INLINE_MAX // 4, -(-len(items) // (VERIFY_PROCESSES * 4)))
+    pool = _get_pool()
+    try:
+        chunks = pool.map(verify_many, [items[i:i + size] for i in range(0, len(items), size)])
+        return [valid for chunk in chunks for valid in chunk]
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start afresh next time.
+        _discard_pool(pool)
+        return verify_many(items)
+    finally:
+        _release_pool(pool)
+
+
+def verify_signature(signature):
+    """Verify a ``DigitalSignature`` (or its field values) against its document hash."""
+    return verify(signature.signer_public_key, signature.signature_value, signature.document_hash_at_signing)
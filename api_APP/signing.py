@@ -0,0 +1,97 @@
+"""
+Signature collection for transactions.
+
+A ``SigningRequirement`` says which party must sign which document for a
+transaction. It is fulfilled by a verified signature of the party on the
+document whose ``document_hash_at_signing`` is the document's current hash,
+so re-uploading a document makes its earlier signatures stop counting.
+
+``signatures_required`` and ``signatures_collected`` on ``Transaction`` are
+running counters: ``signals.py`` calls ``refresh()`` for the requirements a
+saved or deleted signature, re-hashed document or new requirement may
+affect, and only the requirements whose state flipped change the counters.
+``requirement_status()`` computes the same thing from scratch in one query.
+"""
+
+from collections import defaultdict
+
+from django.db.models import Exists, F, OuterRef
+from django.utils import timezone
+
+from .models import DigitalSignature, ResourceVersion, SigningRequirement, Transaction
+
+
+def signed_annotation():
+    """Whether the requirement's party has a valid signature of the document's current hash."""
+    return Exists(DigitalSignature.objects.filter(
+        document=OuterRef('document'), signer=OuterRef('party'), verified=True,
+        document_hash_at_signing=OuterRef('document__document_hash'),
+    ))
+
+
+def adjust(deltas):
+    """Add ``{transaction_id: (required, collected)}`` to the transactions' counters."""
+    now = timezone.now()
+    changed = False
+    for pk, (required, collected) in deltas.items():
+        if required or collected:
+            changed |= bool(Transaction.objects.filter(pk=pk).update(
+                signatures_required=F('signatures_required') + required,
+                signatures_collected=F('signatures_collected') + collected,
+                updated_at=now,
+            ))
+    if changed:
+        # .update() sends no signals; keep ETags and the change feed honest.
+        ResourceVersion.bump(Transaction._meta.label_lower)
+
+
+def refresh(requirements):
+    """
+    Re-derive ``fulfilled`` for the ``requirements`` queryset and move the
+    counters of the transactions whose requirements flipped.
+
+    Each flip is conditional on the old value and counted from the rows the
+    UPDATE changed, so concurrent refreshes of the same requirement (e.g. a
+    signature saved while its document is re-hashed) count it once.
+    """
+    flips = defaultdict(lambda: {True: [], False: []})
+    rows = requirements.annotate(signed=signed_annotation()).values_list('pk', 'transaction_id', 'fulfilled', 'signed')
+    for pk, transaction_id, fulfilled, signed in rows:
+        if fulfilled != signed:
+            flips[transaction_id][signed].append(pk)
+    deltas = {}
+    for transaction_id, by_state in flips.items():
+        collected = 0
+        for signed, pks in by_state.items():
+            if pks:
+                flipped = SigningRequirement.objects.filter(pk__in=pks, fulfilled=not signed).update(fulfilled=signed)
+                collected += flipped if signed else -flipped
+        deltas[transaction_id] = (0, collected)
+    adjust(deltas)
+
+
+def recount(transaction_ids):
+    """Recompute the counters of the transactions (and their requirements) from scratch."""
+    refresh(SigningRequirement.objects.filter(transaction_id__in=transaction_ids))
+    now = timezone.now()
+    for pk in transaction_ids:
+        requirements = SigningRequirement.objects.filter(transaction_id=pk)
+        Transaction.objects.filter(pk=pk).update(
+            signatures_required=requirements.count(),
+            signatures_collected=requirements.filter(fulfilled=True).count(),
+            updated_at=now,
+        )
+    ResourceVersion.bump(Transaction._meta.label_lower)
+
+
+def requirement_status(transaction_id):
+    """
+    ``[(document_id, document_type, party_id, party_username, signed), ...]``
+    for every requirement of the transaction, computed with one query.
+    """
+    return list(
+        SigningRequirement.objects.filter(transaction_id=transaction_id)
+        .annotate(signed=signed_annotation())
+        .order_by('party_id', 'document__document_type', 'document_id')
+        .values_list('document_id', 'document__document_type', 'party_id', 'party__username', 'signed')
+    )
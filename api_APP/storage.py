@@ -0,0 +1,271 @@
+"""
+Content-addressed media storage.
+
+Property and document files are stored once per distinct content, under
+their SHA-256 in a sharded layout (``blobs/ab/cd/abcd...``) on the default
+storage (S3 or the local media directory). A re-uploaded deed resolves to
+the blob that is already there, so nothing is written (or sent to S3)
+again. ``ContentBlob`` rows count the model fields referencing each blob;
+``signals.py`` keeps the counts and ``gc_blobs`` removes blobs that have had
+no references for a grace period.
+
+Names outside ``blobs/`` (files saved before this storage existed) are
+passed through to the default storage unchanged.
+"""
+
+import base64
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, Storage, default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = getattr(settings, 'CONTENT_STORE_PREFIX', 'blobs')
+INCOMING_PREFIX = 'incoming'
+
+
+class DirectTransferUnsupported(Exception):
+    """The inner storage cannot hand out presigned URLs (it is not S3)."""
+
+
+def blob_name(sha256):
+    return posixpath.join(BLOB_PREFIX, sha256[:2], sha256[2:4], sha256)
+
+
+def blob_digest(name):
+    """The SHA-256 a blob name refers to, or ``None`` for other names."""
+    prefix = BLOB_PREFIX + '/'
+    if not name or not name.startswith(prefix):
+        return None
+    digest = name.rsplit('/', 1)[-1]
+    return digest if len(digest) == 64 else None
+
+
+@deconstructible
+class ContentAddressedStorage(Storage):
+    """
+    Deduplicating storage wrapping ``inner`` (the default storage unless given).
+    """
+
+    def __init__(self, inner=None):
+        self._inner = inner
+
+    @property
+    def inner(self):
+        return self._inner or default_storage
+
+    # Saving -------------------------------------------------------------
+
+    def get_available_name(self, name, max_length=None):
+        # The saved name is derived from the content, so the upload name never clashes.
+        return name
+
+    def _save(self, name, content):
+        digest = hashlib.sha256()
+        size = 0
+        for chunk in content.chunks():
+            digest.update(chunk)
+            size += len(chunk)
+        sha256 = digest.hexdigest()
+        if self.claim(sha256):
+            return blob_name(sha256)
+        content.seek(0)
+        incoming = self.inner.save(self._incoming_name(), content)
+        self._move(incoming, blob_name(sha256))
+        return self._register(sha256, size, getattr(content, 'content_type', '') or '')
+
+    def open_incoming(self):
+        """
+        ``(name, handle)`` of a new temporary file to stream an upload into;
+        hand it to ``commit_incoming`` once its digest is known.
+        """
+        name = self._incoming_name()
+        if isinstance(self.inner, FileSystemStorage):
+            path = self.inner.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handle = open(path, 'xb')
+            if self.inner.file_permissions_mode is not None:
+                os.chmod(path, self.inner.file_permissions_mode)
+            return name, handle
+        return name, self.inner.open(name, 'wb')
+
+    def commit_incoming(self, name, sha256, size, content_type=''):
+        """Turn a streamed temporary file into a blob (or drop it if the blob exists)."""
+        if self.claim(sha256):
+            self.inner.delete(name)
+            return blob_name(sha256)
+        self._move(name, blob_name(sha256))
+        return self._register(sha256, size, content_type)
+
+    def _incoming_name(self):
+        return posixpath.join(BLOB_PREFIX, INCOMING_PREFIX, uuid.uuid4().hex)
+
+    def claim(self, sha256):
+        """
+        Touch the blob's row if it exists, so ``gc_blobs`` leaves it alone
+        until the model saving this upload has taken its reference.
+        """
+        from .models import ContentBlob
+
+        # The row is written after the bytes, and gc_blobs removes the bytes
+        # while holding the row's lock, so an existing row means the blob is there.
+        return bool(ContentBlob.objects.filter(sha256=sha256).update(touched_at=timezone.now()))
+
+    def _register(self, sha256, size, content_type):
+        from .models import ContentBlob
+
+        try:
+            with transaction.atomic():
+                ContentBlob.objects.create(
+                    sha256=sha256, size=size, content_type=content_type[:100],
+                    # Rendered by preview_worker (see previews.py).
+                    preview_status='pending' if content_type.startswith('image/') else '',
+                )
+        except IntegrityError:
+            self.claim(sha256)  # stored by a concurrent upload of the same content
+        return blob_name(sha256)
+
+    def _move(self, source, target):
+        inner = self.inner
+        if isinstance(inner, FileSystemStorage):
+            path = inner.path(target)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(inner.path(source), path)
+        elif hasattr(inner, 'bucket'):
+            # S3: server-side copy, the bytes are not sent again.
+            inner.bucket.Object(inner._normalize_name(target)).copy_from(
+                CopySource={'Bucket': inner.bucket.name, 'Key': inner._normalize_name(source)}
+            )
+            inner.delete(source)
+        else:
+            with inner.open(source, 'rb') as f:
+                inner._save(target, f)
+            inner.delete(source)
+
+    # Direct transfers (S3 only) -----------------------------------------
+
+    def _s3(self):
+        inner = self.inner
+        if not hasattr(inner, 'bucket'):
+            raise DirectTransferUnsupported(f'{inner.__class__.__name__} does not support presigned URLs.')
+        return inner
+
+    def presigned_upload(self, sha256, size, content_type, expires):
+        """
+        ``(name, url, headers)`` for a client to PUT a file straight into the
+        bucket. S3 rejects the PUT unless the body matches ``sha256``; check
+        the result with ``verify_incoming`` and then ``commit_incoming`` it.
+        """
+        inner = self._s3()
+        name = self._incoming_name()
+        headers = {
+            'Content-Type': content_type or 'application/octet-stream',
+            'x-amz-checksum-sha256': base64.b64encode(bytes.fromhex(sha256)).decode(),
+        }
+        url = inner.bucket.meta.client.generate_presigned_url('put_object', Params={
+            'Bucket': inner.bucket.name, 'Key': inner._normalize_name(name), 'ContentLength': size,
+            'ContentType': headers['Content-Type'], 'ChecksumSHA256': headers['x-amz-checksum-sha256'],
+        }, ExpiresIn=expires)
+        return name, url, headers
+
+    def verify_incoming(self, name, sha256, size):
+        """
+        Whether the directly uploaded ``name`` has the expected size and
+        digest; ``None`` if nothing has been uploaded there.
+        """
+        from botocore.exceptions import ClientError
+
+        inner = self._s3()
+        try:
+            head = inner.bucket.meta.client.head_object(
+                Bucket=inner.bucket.name, Key=inner._normalize_name(name), ChecksumMode='ENABLED'
+            )
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return None
+            raise  # denied, throttled or unavailable: not the client's fault
+        if head['ContentLength'] != size:
+            return False
+        checksum = head.get('ChecksumSHA256')
+        if checksum:
+            # Verified by S3 when the object was written.
+            return base64.b64decode(checksum).hex() == sha256
+        # S3-compatible stores that keep no checksum: hash the object once.
+        digest = hashlib.sha256()
+        with inner.open(name, 'rb') as f:
+            for chunk in f.chunks():
+                digest.update(chunk)
+        return digest.hexdigest() == sha256
+
+    def presigned_download(self, name, expires, filename=None):
+        """A URL from which the client fetches ``name`` straight from the bucket."""
+        parameters = {'ResponseContentDisposition': f'attachment; filename="{filename}"'} if filename else None
+        return self._s3().url(name, parameters=parameters, expire=expires)
+
+    # Reference counting -----------------------------------------------
+
+    def retain(self, name):
+        from .models import ContentBlob
+
+        sha256 = blob_digest(name)
+        if sha256:
+            ContentBlob.objects.filter(sha256=sha256).update(refcount=F('refcount') + 1, touched_at=timezone.now())
+
+    def release(self, name):
+        """Drop one reference; ``gc_blobs`` removes blobs left with none."""
+        from .models import ContentBlob
+
+        sha256 = blob_digest(name)
+        if sha256:
+            ContentBlob.objects.filter(sha256=sha256, refcount__gt=0).update(
+                refcount=F('refcount') - 1, touched_at=timezone.now()
+            )
+
+    def delete(self, name):
+        # Blobs may be shared, or about to be adopted by a concurrent upload of
+        # the same content; unreferenced ones are reclaimed by gc_blobs.
+        if blob_digest(name) is None:
+            self.inner.delete(name)
+
+    # Everything else is answered by the inner storage --------------------
+
+    def _open(self, name, mode='rb'):
+        return self.inner.open(name, mode)
+
+    def exists(self, name):
+        return self.inner.exists(name)
+
+    def listdir(self, path):
+        return self.inner.listdir(path)
+
+    def size(self, name):
+        return self.inner.size(name)
+
+    def url(self, name):
+        return self.inner.url(name)
+
+    def path(self, name):
+        return self.inner.path(name)
+
+    def get_accessed_time(self, name):
+        return self.inner.get_accessed_time(name)
+
+    def get_created_time(self, name):
+        return self.inner.get_created_time(name)
+
+    def get_modified_time(self, name):
+        return self.inner.get_modified_time(name)
+
+
+media_storage = ContentAddressedStorage()
+
+
+def content_addressed_storage():
+    """Storage of the ``Property`` and ``Document`` file fields."""
+    return media_storage
@@ -1,3 +1,1687 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import uuid
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import unquote
 
-# Create your tests here.
+import boto3
+from botocore.exceptions import ClientError
+import msgpack
+import requests
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+from moto import mock_aws
+from PIL import Image
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models.query import ValuesListIterable
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from . import anchoring, audit, base64stream, previews, signing
+from .cache import LRUCache, get_property_by_ipfs_hash, property_cache
+from .base64stream import Base64Decoder, Base64Encoder, Base64Error
+from .fastserializers import CompiledSerializer, NotCompilable
+from . import signatures
+from .ipfs import pinning
+from .signatures import load_public_key, verify
+from .ipfs.cid import CIDBuilder, compute_bytes_cid
+from .ipfs.client import HTTPIPFSClient, IPFSError, reset_ipfs_client
+from .ipfs.fake import FakeIPFSDaemon
+from .models import (
+    AnchorBatch, AnchorProof, AuditCheckpoint, AuditEvent, ContentBlob, DigitalSignature, Document, NINInfo, PinJob,
+    Property, ResourceVersion, SigningRequirement, Transaction, UploadSession, UserProfile,
+)
+from .pagination import KeysetPagination, encode_cursor
+from .renderers import ORJSONRenderer
+from .serializers import DocumentSerializer, PropertySerializer, TransactionSerializer, UserLoginSerializer
+from .storage import blob_name
+
+
+class CIDTests(SimpleTestCase):
+
+    def test_matches_ipfs_add(self):
+        # Reference values produced by `ipfs add` / `ipfs add --cid-version=1`.
+        self.assertEqual(compute_bytes_cid(b''), 'QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH')
+        self.assertEqual(compute_bytes_cid(b'hello world\n'), 'QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o')
+        self.assertEqual(
+            compute_bytes_cid(b'', version=1), 'bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku'
+        )
+
+    def test_result_does_not_depend_on_write_sizes(self):
+        data = bytes(range(256)) * 5000
+        expected = compute_bytes_cid(data)
+        builder = CIDBuilder()
+        for i in range(0, len(data), 7777):
+            builder.update(data[i:i + 7777])
+        self.assertEqual(builder.cid(), expected)
+        self.assertTrue(expected.startswith('Qm'))
+
+
+class HTTPIPFSClientTests(SimpleTestCase):
+
+    def setUp(self):
+        self.daemon = FakeIPFSDaemon().start()
+        self.client = HTTPIPFSClient(api_url=self.daemon.url, chunk_size=1024)
+
+    def tearDown(self):
+        self.client.close()
+        self.daemon.stop()
+
+    def test_add_streams_file_and_returns_hash(self):
+        data = b'deed' * 5000
+        ipfs_hash = self.client.add(ContentFile(data, name='deed.pdf'))
+        self.assertEqual(ipfs_hash, FakeIPFSDaemon.hash_content(data))
+        self.assertEqual(self.daemon.blobs[ipfs_hash], data)
+
+    def test_connection_is_reused(self):
+        for i in range(5):
+            self.client.add(ContentFile(b'file %d' % i, name='f.txt'))
+        self.assertEqual(self.daemon.connections, 1)
+
+    def test_daemon_error_raises(self):
+        self.daemon.fail_next = 1
+        with self.assertRaises(IPFSError):
+            self.client.add(ContentFile(b'x', name='x.txt'))
+
+
+class PinQueueTests(TestCase):
+
+    def setUp(self):
+        self.daemon = FakeIPFSDaemon().start()
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            IPFS_API_URL=self.daemon.url,
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage',
+            MEDIA_ROOT=self.media.name,
+        )
+        self.settings_override.enable()
+        reset_ipfs_client()
+        self.owner = UserProfile.objects.create(
+            fullname='Ada Obi', residential_address='Effurun', id_number='ID-1', password='secret'
+        )
+
+    def tearDown(self):
+        reset_ipfs_client()
+        self.settings_override.disable()
+        self.daemon.stop()
+        self.media.cleanup()
+
+    def make_property(self, content=b'title deed'):
+        return Property.objects.create(
+            full_address='1 Refinery Road', property_type='land',
+            unique_property_identifier='LT-1', current_owner=self.owner,
+            proof_of_ownership_document=ContentFile(content, name='deed.pdf'),
+        )
+
+    def test_save_computes_cid_and_only_enqueues(self):
+        prop = self.make_property(b'title deed')
+        self.assertEqual(prop.ipfs_hash, compute_bytes_cid(b'title deed'))
+        self.assertEqual(Property.objects.get(ipfs_hash=prop.ipfs_hash), prop)
+        self.assertEqual(PinJob.objects.filter(property=prop, status='queued').count(), 1)
+        self.assertEqual(self.daemon.blobs, {})
+
+    def test_worker_pins_file(self):
+        prop = self.make_property(b'title deed')
+        pinning.run_worker(once=True)
+        self.assertIn(prop.ipfs_hash, self.daemon.blobs)
+        job = PinJob.objects.get()
+        self.assertEqual((job.status, job.last_error), ('done', ''))
+
+    def test_worker_fills_hash_of_legacy_rows(self):
+        prop = self.make_property(b'title deed')
+        Property.objects.filter(pk=prop.pk).update(ipfs_hash=None)
+        pinning.run_worker(once=True)
+        prop.refresh_from_db()
+        self.assertEqual(prop.ipfs_hash, compute_bytes_cid(b'title deed'))
+
+    def test_failed_attempt_is_retried_later(self):
+        self.make_property()
+        self.daemon.fail_next = 1
+        pinning.run_worker(once=True)
+        job = PinJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.available_at, job.created_at)
+
+    def test_claim_is_exclusive(self):
+        self.make_property()
+        self.assertEqual(len(pinning.claim_jobs('worker-a', limit=5)), 1)
+        self.assertEqual(pinning.claim_jobs('worker-b', limit=5), [])
+        job = PinJob.objects.get()
+        self.assertEqual((job.status, job.locked_by), ('running', 'worker-a'))
+
+    def test_expired_lease_is_reclaimed(self):
+        self.make_property()
+        pinning.claim_jobs('worker-a')
+        self.assertEqual(pinning.claim_jobs('worker-b'), [])
+        PinJob.objects.update(locked_at=timezone.now() - datetime.timedelta(seconds=pinning.PIN_LEASE + 1))
+        [job] = pinning.claim_jobs('worker-b')
+        self.assertEqual((job.status, job.locked_by), ('running', 'worker-b'))
+
+    def test_unexpected_error_is_retried_later(self):
+        self.make_property()
+        with mock.patch.object(pinning, 'pin_file', side_effect=RuntimeError('disk on fire')):
+            pinning.run_worker(once=True)
+        job = PinJob.objects.get()
+        self.assertEqual((job.status, job.attempts, job.locked_by), ('queued', 1, ''))
+        self.assertEqual(job.last_error, 'RuntimeError: disk on fire')
+        self.assertGreater(job.available_at, job.created_at)
+
+    def test_gives_up_after_max_attempts(self):
+        self.make_property()
+        PinJob.objects.update(attempts=pinning.PIN_MAX_ATTEMPTS - 1)
+        self.daemon.fail_next = 1
+        pinning.run_worker(once=True)
+        job = PinJob.objects.get()
+        self.assertEqual((job.status, job.attempts), ('failed', pinning.PIN_MAX_ATTEMPTS))
+        self.assertIsNotNone(job.finished_at)
+
+
+class APIFixtureMixin:
+    """
+    Authenticated API client plus a helper creating one full object graph
+    (owner, property, document, transaction, signature, NIN record) per row.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='auditor', password='x', is_staff=True)
+        cls.buyer = User.objects.create_user(username='buyer', password='x')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def add_rows(self, count, offset=0):
+        for i in range(offset, offset + count):
+            owner = UserProfile.objects.create(
+                fullname=f'Owner {i}', residential_address='Warri', id_number=f'OWN-{i}', password='x'
+            )
+            prop = Property.objects.create(
+                full_address=f'{i} Refinery Road', property_type='land',
+                unique_property_identifier=f'LT-{i}', current_owner=owner
+            )
+            document = Document.objects.create(
+                property=prop, document_type='title_deed', document_file=f'legal_documents/{i}.pdf',
+                document_hash=f'hash-{i}', uploaded_by=owner
+            )
+            self.transaction = Transaction.objects.create(
+                property=prop, seller=self.admin, buyer=self.buyer, transaction_price='1000.00'
+            )
+            self.signature = DigitalSignature.objects.create(
+                document=document, signer=self.buyer, signature_value=f'sig-{i}',
+                signer_public_key='pk', document_hash_at_signing=f'hash-{i}'
+            )
+            NINInfo.objects.create(
+                nin=f'{i:011d}', first_name='Ada', last_name=f'Obi{i}', date_of_birth='1990-01-01'
+            )
+        self.property = prop
+        self.document = document
+
+
+class KeysetPaginationTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_rows(5)
+        self.ids = [str(pk) for pk in Property.objects.order_by('created_at', 'id').values_list('pk', flat=True)]
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        return [row['id'] for row in body['results']], body['next'], body['previous']
+
+    def test_next_and_previous(self):
+        seen, url, pages = [], '/properties/?page_size=2', []
+        while url:
+            ids, url, previous = self.page(url)
+            seen += ids
+            pages.append((ids, previous))
+        self.assertEqual(seen, self.ids)
+        self.assertEqual([len(ids) for ids, _ in pages], [2, 2, 1])
+        self.assertIsNone(pages[0][1])
+
+        # Back from the last page: its previous link is a reverse cursor.
+        ids, next_url, previous = self.page(pages[2][1])
+        self.assertEqual(ids, self.ids[2:4])
+        self.assertIsNotNone(next_url)
+        ids, _, previous = self.page(previous)
+        self.assertEqual(ids, self.ids[:2])
+        self.assertIsNone(previous)
+
+    def test_reverse_page_past_the_start(self):
+        cursor = encode_cursor([Property.objects.order_by('created_at', 'id').first().created_at, self.ids[0]], reverse=True)
+        ids, next_url, previous = self.page(f'/properties/?cursor={cursor}')
+        self.assertEqual(ids, [])
+        self.assertIsNone(previous)
+
+    def test_page_size_bounds(self):
+        self.assertEqual(len(self.page('/properties/?page_size=0')[0]), 1)
+        self.assertEqual(len(self.page('/properties/?page_size=x')[0]), 5)
+        paginator = KeysetPagination(ordering=('created_at', 'id'), max_page_size=3)
+        request = Request(APIRequestFactory().get('/properties/', {'page_size': 1000}))
+        self.assertEqual(paginator.get_page_size(request), 3)
+
+    def test_invalid_cursors(self):
+        cursors = [
+            'not base64 json', encode_cursor(['x']), encode_cursor(['not-a-date', 'x']), encode_cursor([[1], {}]),
+            encode_cursor([None, None]), encode_cursor([timezone.now(), 'not-a-uuid']),
+        ]
+        for path in ('/properties/', '/documents/', '/transactions/', '/digital-signatures/'):
+            for cursor in cursors:
+                response = self.client.get(path, {'cursor': cursor})
+                self.assertEqual(response.status_code, 404, (path, cursor, response.content))
+
+
+class LRUCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.cache = LRUCache(maxsize=2, ttl=10, clock=lambda: self.now)
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+        self.assertEqual((self.cache.get('a'), self.cache.get('b'), self.cache.get('c')), (1, None, 3))
+        self.assertEqual(len(self.cache), 2)
+
+    def test_entries_expire(self):
+        self.cache.set('a', 1)
+        self.now = 9.9
+        self.assertEqual(self.cache.get('a'), 1)
+        self.now = 10
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_tag_invalidation(self):
+        self.cache.set('a', 1, tags=('property:1', 'owner:1'))
+        self.cache.set('b', 2, tags=('owner:1',))
+        self.cache.invalidate_tag('property:1')
+        self.assertEqual((self.cache.get('a'), self.cache.get('b')), (None, 2))
+        self.cache.invalidate_tag('owner:1')
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache._tags, {})
+
+
+class PropertyCacheTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        property_cache.clear()
+        self.addCleanup(property_cache.clear)
+        self.add_rows(1)
+        Property.objects.filter(pk=self.property.pk).update(ipfs_hash='QmCached')
+        self.url = '/properties/QmCached/'
+
+    def change_elsewhere(self, **fields):
+        """An update made by another worker: no signals reach this process's cache."""
+        Property.objects.filter(pk=self.property.pk).update(updated_at=timezone.now(), **fields)
+
+    def test_signals_invalidate(self):
+        cached = get_property_by_ipfs_hash('QmCached')
+        self.assertIsNotNone(property_cache.get('QmCached'))
+        cached.description = 'Renovated'
+        cached.save()
+        self.assertIsNone(property_cache.get('QmCached'))
+        get_property_by_ipfs_hash('QmCached')
+        owner = cached.current_owner
+        owner.residential_address = 'Lagos'
+        owner.save()
+        self.assertIsNone(property_cache.get('QmCached'))
+
+    def test_writes_use_the_current_row(self):
+        self.client.get(self.url)
+        self.change_elsewhere(description='Edited by another worker')
+        response = self.client.put(self.url, {'full_address': '2 Refinery Road'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.property.refresh_from_db()
+        self.assertEqual(
+            (self.property.full_address, self.property.description), ('2 Refinery Road', 'Edited by another worker')
+        )
+
+    def test_deleted_row_is_not_resurrected(self):
+        cached = get_property_by_ipfs_hash('QmCached')
+        Transaction.objects.all().delete()
+        Property.objects.filter(pk=self.property.pk).delete()
+        property_cache.set('QmCached', cached)  # as still held by another worker
+        self.assertEqual(self.client.put(self.url, {'description': 'x'}, format='json').status_code, 404)
+        self.assertEqual(self.client.delete(self.url).status_code, 404)
+        self.assertFalse(Property.objects.filter(pk=self.property.pk).exists())
+
+    def test_revalidation_sees_other_workers_changes(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.change_elsewhere(description='Edited by another worker')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['description'], 'Edited by another worker')
+
+
+@override_settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+class QueryBudgetTests(APIFixtureMixin, TestCase):
+    """
+    Each endpoint must load its object graph in a fixed number of queries,
+    however many rows the page holds.
+    """
+    # Property, document and transaction responses add one ResourceVersion
+    # lookup for their ETag.
+    budgets = {
+        '/properties/': 2,
+        '/properties/?expand=current_owner_details': 2,
+        '/documents/': 2,
+        '/documents/?expand=property_details.current_owner_details,uploaded_by_details': 2,
+        '/transactions/': 2,
+        '/transactions/?expand=property_details.current_owner_details,seller_details,buyer_details': 2,
+        '/digital-signatures/': 1,
+        '/digital-signatures/?expand=document_details.property_details.current_owner_details,signer_details': 1,
+        '/nin-info/': 1,
+        '/user-profiles/': 1,
+    }
+
+    def assertMaxQueries(self, ceiling, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertLessEqual(
+            len(queries), ceiling,
+            f'{url} ran {len(queries)} queries (budget {ceiling}):\n'
+            + '\n'.join(q['sql'] for q in queries.captured_queries)
+        )
+
+    def test_list_endpoints(self):
+        self.add_rows(3)
+        for url, budget in self.budgets.items():
+            self.assertMaxQueries(budget, url)
+        # Budgets must not grow with the page size.
+        self.add_rows(7, offset=3)
+        for url, budget in self.budgets.items():
+            self.assertMaxQueries(budget, url)
+
+    def test_detail_endpoints(self):
+        self.add_rows(2)
+        self.assertMaxQueries(2, f'/documents/{self.document.pk}/?expand=property_details.current_owner_details')
+        self.assertMaxQueries(2, f'/transactions/{self.transaction.pk}/?expand=property_details')
+        self.assertMaxQueries(1, f'/transactions/{self.transaction.pk}/')
+        self.assertMaxQueries(1, f'/digital-signatures/{self.signature.pk}/?expand=document_details')
+
+
+@override_settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+class SparseFieldsetTests(APIFixtureMixin, TestCase):
+
+    def test_nested_details_are_opt_in(self):
+        self.add_rows(1)
+        row = self.client.get('/documents/').json()['results'][0]
+        self.assertNotIn('property_details', row)
+        row = self.client.get('/documents/?expand=property_details').json()['results'][0]
+        self.assertEqual(row['property_details']['unique_property_identifier'], 'LT-0')
+        self.assertNotIn('current_owner_details', row['property_details'])
+
+    def test_fields_limits_keys_at_each_level(self):
+        self.add_rows(1)
+        row = self.client.get('/documents/?fields=id,document_hash').json()['results'][0]
+        self.assertEqual(set(row), {'id', 'document_hash'})
+        row = self.client.get(
+            '/digital-signatures/?fields=id,document_details.document_hash'
+        ).json()['results'][0]
+        self.assertEqual(row, {'id': str(self.signature.pk), 'document_details': {'document_hash': 'hash-0'}})
+
+
+@override_settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+class CompiledSerializerTests(APIFixtureMixin, TestCase):
+    """The compiled read path must render byte-for-byte what DRF renders."""
+
+    cases = [
+        (PropertySerializer, Property, {}),
+        (PropertySerializer, Property, {'expand': 'current_owner_details'}),
+        (PropertySerializer, Property, {'fields': 'id,ipfs_hash,current_owner_details.fullname'}),
+        (DocumentSerializer, Document, {'expand': 'property_details.current_owner_details,uploaded_by_details'}),
+        (TransactionSerializer, Transaction, {}),
+        (TransactionSerializer, Transaction, {'expand': 'property_details.current_owner_details,seller_details,buyer_details'}),
+        (TransactionSerializer, Transaction, {'fields': 'id,transaction_price,property_details.created_at'}),
+    ]
+
+    def test_output_matches_drf(self):
+        self.add_rows(3)
+        Property.objects.filter(pk=self.property.pk).update(
+            gps_latitude='6.335000', gps_longitude='5.627000', proof_of_ownership_document='proofs/deed.pdf'
+        )
+        renderer = JSONRenderer()
+        for serializer_class, model, params in self.cases:
+            with self.subTest(serializer=serializer_class.__name__, **params):
+                request = Request(APIRequestFactory().get('/properties/', params))
+                context = {'request': request}
+                ordering = ('upload_date', 'id') if model is Document else ('created_at', 'id')
+                queryset = model.objects.order_by(*ordering)
+                expected = serializer_class(serializer_class.setup_eager_loading(queryset, request), many=True, context=context).data
+                compiled = CompiledSerializer(serializer_class, context=context)
+                self.assertEqual(renderer.render(compiled.render(compiled.queryset(queryset))), renderer.render(expected))
+
+    def test_uncompilable_serializer_is_rejected(self):
+        with self.assertRaises(NotCompilable):
+            CompiledSerializer(UserLoginSerializer)
+
+
+@override_settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+class ContentNegotiationTests(APIFixtureMixin, TestCase):
+
+    def test_orjson_output_matches_drf(self):
+        data = {
+            'id': uuid.uuid4(), 'price': Decimal('10.50'), 'at': datetime.datetime(2024, 5, 1, 9, 30, 0, 123456),
+            'name': 'Ọ̀kọ̀\u2028Warri', 'nested': [1, 2.5, None, True],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            ORJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+    def test_msgpack_response(self):
+        self.add_rows(2)
+        response = self.client.get('/properties/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        body = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(body, self.client.get('/properties/').json())
+
+    def test_metadata_update_with_json_and_msgpack(self):
+        self.add_rows(1)
+        Property.objects.filter(pk=self.property.pk).update(ipfs_hash='QmDeed')
+        url = '/properties/QmDeed/'
+        response = self.client.put(url, {'description': 'Fenced plot'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()['description'], 'Fenced plot')
+
+        response = self.client.put(
+            url, msgpack.packb({'description': 'Fenced plot with gate'}), content_type='application/msgpack'
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.property.refresh_from_db()
+        self.assertEqual(self.property.description, 'Fenced plot with gate')
+
+    def test_malformed_msgpack_is_rejected(self):
+        response = self.client.post('/transactions/', b'\xc1', content_type='application/msgpack')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+class ExportTests(APIFixtureMixin, TestCase):
+
+    def test_ndjson_streams_every_row(self):
+        self.add_rows(3)
+        response = self.client.get('/export/transactions.ndjson?expand=property_details')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['property_details']['unique_property_identifier'] for row in rows], ['LT-0', 'LT-1', 'LT-2'])
+
+    def test_csv_flattens_nested_objects(self):
+        self.add_rows(2)
+        response = self.client.get('/export/digital-signatures.csv?expand=document_details')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]['document_details.document_hash'], 'hash-1')
+
+    def test_gzip_when_accepted(self):
+        self.add_rows(2)
+        response = self.client.get('/export/properties.ndjson', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(gzip.decompress(b''.join(response.streaming_content)).splitlines()), 2)
+
+    def test_staff_only(self):
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.get('/export/properties.csv').status_code, 403)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get('/export/owners.csv').status_code, 404)
+
+
+@override_settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+class ChangeFeedTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        # No settle delay, so rows written by the test are visible at once.
+        patcher = mock.patch('api_APP.endpoints.changes.CHANGE_FEED_SETTLE', datetime.timedelta(0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sync(self, since=None, page_size=2):
+        changes, deleted = [], []
+        while True:
+            params = {'page_size': page_size, **({'since': since} if since else {})}
+            body = self.client.get('/changes/transactions/', params).json()
+            changes += [row['id'] for row in body['changes']]
+            deleted += [row['id'] for row in body['deleted']]
+            since = body['since']
+            if not body['has_more']:
+                return changes, deleted, since
+
+    def test_full_then_incremental_sync(self):
+        self.add_rows(3)
+        first = list(Transaction.objects.order_by('created_at', 'id').values_list('id', flat=True))
+        changes, deleted, since = self.sync()
+        self.assertEqual(changes, [str(pk) for pk in first])
+        self.assertEqual(deleted, [])
+
+        self.assertEqual(self.sync(since)[:2], ([], []))
+
+        Transaction.objects.filter(pk=first[0]).get().save()
+        Transaction.objects.filter(pk=first[1]).delete()
+        changes, deleted, since = self.sync(since)
+        self.assertEqual(changes, [str(first[0])])
+        self.assertEqual(deleted, [str(first[1])])
+
+    def test_invalid_and_expired_tokens(self):
+        now, row = timezone.now(), str(uuid.uuid4())
+        for values in (
+            [now, row, now, 0, 'extra'], ['yesterday', row, now, 0], [now, 'not-a-uuid', now, 0], [now, 7, now, 0],
+            [now, row, now, '0'], [now, row, now, 1.5], [None, None, 'not-a-date', 0],
+            [None, None, now.replace(tzinfo=None), 0], [now.replace(tzinfo=None), row, now, 0], [None, row, now, 0],
+        ):
+            response = self.client.get('/changes/transactions/', {'since': encode_cursor(values)})
+            self.assertEqual(response.status_code, 400, values)
+        self.assertEqual(self.client.get('/changes/transactions/', {'since': 'nope'}).status_code, 400)
+        self.assertEqual(
+            self.client.get('/changes/transactions/', {'since': encode_cursor([now, row, now, 0])}).status_code, 200
+        )
+        old = encode_cursor([None, None, timezone.now() - datetime.timedelta(days=400), 0])
+        self.assertEqual(self.client.get('/changes/transactions/', {'since': old}).status_code, 410)
+        self.assertEqual(self.client.get('/changes/documents/').status_code, 404)
+
+
+@override_settings(DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+class ConditionalGetTests(APIFixtureMixin, TestCase):
+
+    def test_detail_revalidation(self):
+        self.add_rows(1)
+        url = f'/transactions/{self.transaction.pk}/'
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('must-revalidate', response['Cache-Control'])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(len(queries), 1)
+
+        # A different representation or a change to the row gets a new tag.
+        self.assertNotEqual(self.client.get(url + '?fields=id')['ETag'], etag)
+        self.transaction.status = 'completed'
+        self.transaction.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_revalidation(self):
+        self.add_rows(2)
+        response = self.client.get('/documents/?expand=uploaded_by_details')
+        etag = response['ETag']
+        self.assertEqual(self.client.get('/documents/?expand=uploaded_by_details', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            self.client.get('/documents/?expand=uploaded_by_details', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code,
+            304
+        )
+
+        # Editing an expanded owner changes the list's tag.
+        owner = self.document.uploaded_by
+        owner.fullname = 'Renamed'
+        owner.save()
+        self.assertEqual(self.client.get('/documents/?expand=uploaded_by_details', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_login_keeps_tags(self):
+        label = User._meta.label_lower
+        ResourceVersion.bump(label)
+        version = ResourceVersion.objects.get(resource=label).version
+        self.assertTrue(APIClient().login(username='buyer', password='x'))
+        self.assertEqual(ResourceVersion.objects.get(resource=label).version, version)
+
+        self.buyer.username = 'purchaser'
+        self.buyer.save()
+        self.assertEqual(ResourceVersion.objects.get(resource=label).version, version + 1)
+
+
+class StreamingUploadTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=self.media.name,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.media.cleanup)
+        self.addCleanup(self.settings_override.disable)
+        self.add_rows(1)
+
+    def blob_path(self, content):
+        return os.path.join(self.media.name, blob_name(hashlib.sha256(content).hexdigest()))
+
+    def upload_document(self, content, **extra):
+        return self.client.post('/documents/', {
+            'property': self.property.pk, 'document_type': 'sale_agreement',
+            'document_file': SimpleUploadedFile('agreement.pdf', content), **extra,
+        }, format='multipart')
+
+    def test_document_hash_is_filled_in(self):
+        content = b'sale agreement ' * 10000
+        response = self.upload_document(content)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['document_hash'], hashlib.sha256(content).hexdigest())
+        with open(self.blob_path(content), 'rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(os.listdir(os.path.join(self.media.name, 'blobs', 'incoming')), [])
+
+    def test_mismatched_hash_is_rejected_and_file_collected(self):
+        response = self.upload_document(b'agreement', document_hash='0' * 64)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('document_hash', response.json())
+        self.assertEqual(ContentBlob.objects.get().refcount, 0)
+        call_command('gc_blobs', grace_minutes=0, stdout=io.StringIO())
+        self.assertFalse(ContentBlob.objects.exists())
+        self.assertFalse(os.path.exists(self.blob_path(b'agreement')))
+
+    def test_property_upload_gets_cid_in_one_pass(self):
+        response = self.client.post('/properties/', {
+            'full_address': '2 Refinery Road', 'property_type': 'land', 'unique_property_identifier': 'LT-9',
+            'current_owner': self.property.current_owner_id,
+            'proof_of_ownership_document': SimpleUploadedFile('deed.pdf', b'hello world\n'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['ipfs_hash'], 'QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o')
+        self.assertTrue(os.path.exists(self.blob_path(b'hello world\n')))
+
+
+class ContentAddressedStorageTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=self.media.name,
+            IPFS_PINNING_ENABLED=False,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.media.cleanup)
+        self.addCleanup(self.settings_override.disable)
+        self.add_rows(1)
+
+    def attach(self, instance, field, content, name):
+        getattr(instance, field).save(name, ContentFile(content), save=True)
+
+    def test_identical_content_is_stored_once(self):
+        deed = b'certificate of occupancy'
+        self.attach(self.property, 'proof_of_ownership_document', deed, 'deed.pdf')
+        document = Document.objects.create(
+            property=self.property, document_type='title_deed', document_hash='h',
+            document_file=ContentFile(deed, name='scan.pdf'),
+        )
+        self.assertEqual(document.document_file.name, self.property.proof_of_ownership_document.name)
+        blob = ContentBlob.objects.get()
+        self.assertEqual((blob.sha256, blob.size, blob.refcount), (hashlib.sha256(deed).hexdigest(), len(deed), 2))
+        self.assertEqual(len(os.listdir(os.path.dirname(document.document_file.path))), 1)
+
+        document.delete()
+        self.assertEqual(ContentBlob.objects.get().refcount, 1)
+        call_command('gc_blobs', grace_minutes=0, stdout=io.StringIO())
+        self.assertEqual(self.property.proof_of_ownership_document.read(), deed)
+
+    def test_replaced_file_is_released(self):
+        self.attach(self.property, 'proof_of_ownership_document', b'old deed', 'deed.pdf')
+        old_path = self.property.proof_of_ownership_document.path
+        self.attach(self.property, 'proof_of_ownership_document', b'new deed', 'deed.pdf')
+        counts = dict(ContentBlob.objects.values_list('sha256', 'refcount'))
+        self.assertEqual(counts, {hashlib.sha256(b'old deed').hexdigest(): 0, hashlib.sha256(b'new deed').hexdigest(): 1})
+
+        call_command('gc_blobs', grace_minutes=0, stdout=io.StringIO())
+        self.assertFalse(os.path.exists(old_path))
+        self.assertEqual(ContentBlob.objects.get().sha256, hashlib.sha256(b'new deed').hexdigest())
+
+    def test_legacy_names_still_resolve(self):
+        os.makedirs(os.path.join(self.media.name, 'legal_documents'))
+        with open(os.path.join(self.media.name, 'legal_documents', 'old.pdf'), 'wb') as f:
+            f.write(b'legacy')
+        document = Document.objects.create(
+            property=self.property, document_type='other', document_hash='legacy',
+            document_file='legal_documents/old.pdf',
+        )
+        self.assertEqual(document.document_file.read(), b'legacy')
+        self.assertFalse(ContentBlob.objects.exists())
+
+
+class ResumableUploadTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=self.media.name,
+            IPFS_PINNING_ENABLED=False,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.media.cleanup)
+        self.addCleanup(self.settings_override.disable)
+        self.add_rows(1)
+
+    def start(self, content, target='document'):
+        response = self.client.post('/uploads/', {
+            'target': target, 'file_name': 'scan.pdf', 'content_type': 'application/pdf', 'length': len(content),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return f"/uploads/{response.json()['id']}/"
+
+    def patch(self, url, chunk, offset, **headers):
+        return self.client.generic(
+            'PATCH', url, chunk, content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset), **headers
+        )
+
+    def test_chunks_resume_from_offset_and_finalize_into_document(self):
+        content = bytes(range(256)) * 400
+        url = self.start(content)
+        self.assertEqual(self.patch(url, content[:40000], 0)['Upload-Offset'], '40000')
+        # A retry of an already stored chunk is refused with the offset to resume from.
+        retried = self.patch(url, content[:40000], 0)
+        self.assertEqual((retried.status_code, retried['Upload-Offset']), (409, '40000'))
+        self.assertEqual(self.client.head(url)['Upload-Offset'], '40000')
+        self.assertEqual(self.client.post(url + 'finalize/', {}, format='json').status_code, 409)
+        self.assertEqual(self.patch(url, content[40000:], 40000).status_code, 204)
+
+        response = self.client.post(url + 'finalize/', {
+            'property': str(self.property.pk), 'document_type': 'title_deed',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        document = Document.objects.get(pk=response.json()['id'])
+        self.assertEqual(document.document_hash, hashlib.sha256(content).hexdigest())
+        self.assertEqual(document.document_file.read(), content)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(os.path.join(self.media.name, 'uploads', url.split('/')[2])), [])
+
+    def test_finalize_into_property_computes_cid(self):
+        content = b'hello world\n'
+        url = self.start(content, target='proof_of_ownership')
+        self.patch(url, content, 0)
+        response = self.client.post(url + 'finalize/', {
+            'full_address': '2 Refinery Road', 'property_type': 'land', 'unique_property_identifier': 'LT-9',
+            'current_owner': self.property.current_owner_id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['ipfs_hash'], 'QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o')
+
+    def test_chunk_checksum_and_ownership_are_enforced(self):
+        url = self.start(b'abcdef')
+        bad = self.patch(url, b'abc', 0, HTTP_UPLOAD_CHECKSUM='sha256 ' + base64.b64encode(b'0' * 32).decode())
+        self.assertEqual((bad.status_code, bad['Upload-Offset']), (460, '0'))
+        good = self.patch(
+            url, b'abc', 0, HTTP_UPLOAD_CHECKSUM='sha256 ' + base64.b64encode(hashlib.sha256(b'abc').digest()).decode()
+        )
+        self.assertEqual(good['Upload-Offset'], '3')
+        self.assertEqual(self.patch(url, b'defg', 3).status_code, 400)
+
+        other = APIClient()
+        other.force_authenticate(self.buyer)
+        self.assertEqual(other.get(url).status_code, 404)
+
+    def test_chunk_needs_a_valid_content_length(self):
+        url = self.start(b'abcdef')
+        self.assertEqual(self.patch(url, b'abc', 0, CONTENT_LENGTH='').status_code, 411)
+        for value in ('abc', '-1'):
+            with self.subTest(value=value):
+                self.assertEqual(self.patch(url, b'abc', 0, CONTENT_LENGTH=value).status_code, 400)
+        self.assertEqual(self.client.head(url)['Upload-Offset'], '0')
+
+    def test_finalize_claims_the_session(self):
+        url = self.start(b'abcdef')
+        self.patch(url, b'abcdef', 0)
+        session = UploadSession.objects.get()
+        UploadSession.objects.update(finalizing=True)
+        # Another request is assembling the chunks.
+        body = {'property': str(self.property.pk), 'document_type': 'title_deed'}
+        self.assertEqual(self.client.post(url + 'finalize/', body, format='json').status_code, 409)
+        self.assertEqual(self.client.delete(url).status_code, 409)
+        self.assertEqual(self.patch(url, b'', 6).status_code, 409)
+
+        UploadSession.objects.update(finalizing=False)
+        self.assertEqual(self.client.post(url + 'finalize/', {}, format='json').status_code, 400)
+        session.refresh_from_db()
+        self.assertFalse(session.finalizing)
+        self.assertEqual(self.client.post(url + 'finalize/', body, format='json').status_code, 201)
+
+
+@override_settings(
+    DEFAULT_FILE_STORAGE='storages.backends.s3boto3.S3Boto3Storage', AWS_STORAGE_BUCKET_NAME='terra-media',
+    AWS_S3_REGION_NAME='us-east-1', AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing',
+    IPFS_PINNING_ENABLED=False,
+)
+class DirectTransferTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        mock = mock_aws()
+        mock.start()
+        self.addCleanup(mock.stop)
+        self.s3 = boto3.client('s3', region_name='us-east-1')
+        self.s3.create_bucket(Bucket='terra-media')
+        self.add_rows(1)
+
+    def start(self, content, target='document'):
+        response = self.client.post('/uploads/direct/', {
+            'target': target, 'file_name': 'deed.pdf', 'content_type': 'application/pdf',
+            'length': len(content), 'sha256': hashlib.sha256(content).hexdigest(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()
+
+    def put(self, session, content):
+        upload = session['upload']
+        return requests.put(upload['url'], data=content, headers=upload['headers'])
+
+    def test_file_goes_to_s3_and_row_is_created_on_finalize(self):
+        content = b'%PDF deed of assignment'
+        session = self.start(content)
+        finalize = f"/uploads/{session['id']}/finalize/"
+        fields = {'property': str(self.property.pk), 'document_type': 'deed_of_assignment'}
+        self.assertEqual(self.client.post(finalize, fields, format='json').status_code, 409)
+
+        self.assertEqual(self.put(session, content).status_code, 200)
+        response = self.client.post(finalize, fields, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        document = Document.objects.get(pk=response.json()['id'])
+        self.assertEqual(document.document_hash, hashlib.sha256(content).hexdigest())
+        stored = self.s3.get_object(Bucket='terra-media', Key=document.document_file.name)['Body'].read()
+        self.assertEqual(stored, content)
+        self.assertEqual(ContentBlob.objects.get().refcount, 1)
+
+        url = self.client.get(f'/documents/{document.pk}/download-url/').json()['url']
+        self.assertIn(document.document_file.name, url)
+        self.assertIn(f'deed_of_assignment-{document.pk}.pdf', unquote(url))
+        self.assertEqual(requests.get(url).content, content)
+
+    def test_storage_errors_are_not_reported_as_missing_upload(self):
+        session = self.start(b'deed')
+        denied = ClientError({'Error': {'Code': '403', 'Message': 'Forbidden'}}, 'HeadObject')
+        with mock.patch('botocore.client.BaseClient._make_api_call', side_effect=denied), self.assertRaises(ClientError):
+            self.client.post(f"/uploads/{session['id']}/finalize/", {
+                'property': str(self.property.pk), 'document_type': 'title_deed',
+            }, format='json')
+        self.assertFalse(UploadSession.objects.get().finalizing)
+
+    def test_mismatched_upload_is_rejected(self):
+        session = self.start(b'the declared deed')
+        self.put(session, b'something else!!')
+        response = self.client.post(f"/uploads/{session['id']}/finalize/", {
+            'property': str(self.property.pk), 'document_type': 'title_deed',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(Document.objects.filter(document_type='title_deed').exclude(pk=self.document.pk).exists())
+        self.assertNotIn('Contents', self.s3.list_objects_v2(Bucket='terra-media', Prefix='blobs/'))
+
+    def test_proof_of_ownership_is_attached_without_cid(self):
+        content = b'certificate of occupancy'
+        session = self.start(content, target='proof_of_ownership')
+        self.put(session, content)
+        response = self.client.post(f"/uploads/{session['id']}/finalize/", {
+            'full_address': '3 Refinery Road', 'property_type': 'land', 'unique_property_identifier': 'LT-7',
+            'current_owner': self.property.current_owner_id,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIsNone(response.json()['ipfs_hash'])
+        prop = Property.objects.get(pk=response.json()['id'])
+        self.assertEqual(prop.proof_of_ownership_document.read(), content)
+
+
+class DownloadTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=self.media.name,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.media.cleanup)
+        self.addCleanup(self.settings_override.disable)
+        self.add_rows(1)
+        self.content = bytes(range(256)) * 40
+        self.document.document_file.save('deed.pdf', SimpleUploadedFile('deed.pdf', self.content, 'application/pdf'))
+        self.url = f'/documents/{self.document.pk}/download/'
+
+    def test_whole_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['ETag'], f'"{hashlib.sha256(self.content).hexdigest()}"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn(f'title_deed-{self.document.pk}.pdf', response['Content-Disposition'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_ranges(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f'bytes={len(self.content)}-').status_code, 416)
+        # A stale If-Range gets the whole (changed) file instead of a piece of it.
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"outdated"')
+        self.assertEqual((stale.status_code, stale['Content-Length']), (200, str(len(self.content))))
+
+    def test_file_missing_from_storage(self):
+        os.remove(self.document.document_file.path)
+        response = self.client.get(self.url)
+        self.assertEqual((response.status_code, response.json()), (404, {'detail': 'Document not found.'}))
+        Document.objects.filter(pk=self.document.pk).update(document_file='legal_documents/gone.pdf')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(MEDIA_ACCEL_HEADER='X-Accel-Redirect', MEDIA_ACCEL_PREFIX='/protected-media/')
+    def test_proxy_sends_the_bytes(self):
+        response = self.client.get(self.url, HTTP_ACCEPT='application/pdf')
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.document.document_file.name)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response.content, b'')
+
+        missing = self.client.get(f'/documents/{uuid.uuid4()}/download/', HTTP_ACCEPT='application/pdf')
+        self.assertEqual((missing.status_code, missing['Content-Type']), (404, 'application/json'))
+
+
+def die_rendering(sha256):
+    """Stands in for previews._render in a pool process killed on a huge image."""
+    os._exit(1)
+
+
+class PreviewTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=self.media.name,
+            IPFS_PINNING_ENABLED=False,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.media.cleanup)
+        self.addCleanup(self.settings_override.disable)
+        self.add_rows(1)
+        buffer = io.BytesIO()
+        Image.new('RGB', (1200, 800), 'navy').save(buffer, 'PNG')
+        self.property.proof_of_ownership_document.save(
+            'deed.png', SimpleUploadedFile('deed.png', buffer.getvalue(), 'image/png')
+        )
+        self.document.document_file.save('deed.pdf', SimpleUploadedFile('deed.pdf', b'%PDF-1.4', 'application/pdf'))
+
+    def test_images_are_rendered_by_the_worker(self):
+        self.assertEqual(
+            dict(ContentBlob.objects.values_list('content_type', 'preview_status')),
+            {'image/png': 'pending', 'application/pdf': ''},
+        )
+        before = self.client.get('/properties/')
+        self.assertEqual(before.json()['results'][0]['preview_urls'], {})
+
+        call_command('preview_worker', once=True, processes=2, stdout=io.StringIO())
+
+        after = self.client.get('/properties/')
+        self.assertNotEqual(after['ETag'], before['ETag'])
+        urls = after.json()['results'][0]['preview_urls']
+        self.assertEqual(set(urls), {'160', '480', '1024'})
+        self.assertTrue(urls['480'].startswith('http://testserver/') and urls['480'].endswith('.webp'))
+        Property.objects.filter(pk=self.property.pk).update(ipfs_hash='QmDeed')
+        self.assertEqual(self.client.get('/properties/QmDeed/').json()['preview_urls'], urls)
+
+        blob = ContentBlob.objects.get(content_type='image/png')
+        with Image.open(os.path.join(self.media.name, blob.previews['480'])) as preview:
+            self.assertEqual((preview.format, preview.size), ('WEBP', (480, 320)))
+        document = self.client.get(f'/documents/{self.document.pk}/').json()
+        self.assertEqual(document['preview_urls'], {})
+
+    @mock.patch('api_APP.endpoints.changes.CHANGE_FEED_SETTLE', datetime.timedelta(0))
+    def test_rendering_reaches_exports_and_the_change_feed(self):
+        since = self.client.get('/changes/properties/').json()['since']
+        call_command('preview_worker', once=True, processes=1, stdout=io.StringIO())
+
+        changes = self.client.get('/changes/properties/', {'since': since}).json()['changes']
+        self.assertEqual([row['id'] for row in changes], [str(self.property.pk)])
+        self.assertEqual(set(changes[0]['preview_urls']), {'160', '480', '1024'})
+
+        response = self.client.get('/export/properties.csv')
+        [row] = csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode()))
+        self.assertEqual(set(json.loads(row['preview_urls'])), {'160', '480', '1024'})
+
+    def test_previews_are_collected_with_their_blob(self):
+        call_command('preview_worker', once=True, processes=1, stdout=io.StringIO())
+        paths = [
+            os.path.join(self.media.name, name)
+            for name in ContentBlob.objects.get(content_type='image/png').previews.values()
+        ]
+        self.property.proof_of_ownership_document = None
+        self.property.save()
+        call_command('gc_blobs', grace_minutes=0, stdout=io.StringIO())
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+    def test_blobs_are_claimed_once(self):
+        [sha256] = previews.claim_pending(10)
+        self.assertEqual(previews.claim_pending(10), [])
+        blob = ContentBlob.objects.get(sha256=sha256)
+        self.assertEqual((blob.preview_status, blob.preview_attempts), ('rendering', 1))
+
+        # The claim of a worker that died lapses.
+        ContentBlob.objects.update(preview_claimed_at=timezone.now() - datetime.timedelta(seconds=previews.PREVIEW_LEASE + 1))
+        self.assertEqual(previews.claim_pending(10), [sha256])
+
+    def test_killed_pool_is_replaced_and_the_image_given_up(self):
+        with mock.patch('api_APP.previews._render', die_rendering), self.assertLogs('api_APP.previews', 'ERROR') as logs:
+            call_command('preview_worker', once=True, processes=1, stdout=io.StringIO())
+        self.assertEqual(len(logs.records), previews.PREVIEW_MAX_ATTEMPTS)
+        blob = ContentBlob.objects.get(content_type='image/png')
+        self.assertEqual((blob.preview_status, blob.preview_attempts), ('failed', previews.PREVIEW_MAX_ATTEMPTS))
+
+
+class Base64StreamTests(SimpleTestCase):
+
+    def test_pieces_of_any_size(self):
+        data = bytes(range(256)) * 3 + b'tail'
+        encoded = base64.encodebytes(data)  # with MIME line breaks
+        for step in (1, 3, 7, 76, 1000):
+            decoder = Base64Decoder()
+            decoded = b''.join(decoder.decode(encoded[i:i + step]) for i in range(0, len(encoded), step))
+            decoder.finish()
+            self.assertEqual(decoded, data)
+            encoder = Base64Encoder()
+            reencoded = b''.join(encoder.encode(data[i:i + step]) for i in range(0, len(data), step)) + encoder.finish()
+            self.assertEqual(reencoded, base64.b64encode(data))
+
+    def test_invalid_input(self):
+        for text in (b'QQ==QUFB', b'Q!==', b'QUF'):
+            with self.subTest(text=text), self.assertRaises(Base64Error):
+                decoder = Base64Decoder()
+                decoder.decode(text)
+                decoder.finish()
+
+    def test_file_errors(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'scan.b64')
+            with open(source, 'wb') as f:
+                f.write(b'QUFB!')
+            target = os.path.join(directory, 'scan')
+            with self.assertRaises(Base64Error):
+                base64stream.decode_file(source, target)
+            self.assertFalse(os.path.exists(target))
+            # The target's own error is reported, not one from cleaning up after it.
+            with self.assertRaises(FileNotFoundError) as caught:
+                base64stream.encode_file(source, os.path.join(directory, 'missing', 'scan.b64'))
+            self.assertIsNone(caught.exception.__context__)
+
+    def test_batch_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for i in range(3):
+                paths.append(os.path.join(directory, f'scan-{i}.png'))
+                with open(paths[-1], 'wb') as f:
+                    f.write(os.urandom(1000 * i))
+            out = os.path.join(directory, 'out')
+            call_command('base64_convert', 'encode', *paths, output_dir=out, processes=2, stdout=io.StringIO())
+            encoded = sorted(os.path.join(out, name) for name in os.listdir(out))
+            call_command('base64_convert', 'decode', *encoded, processes=2, stdout=io.StringIO())
+            for path in paths:
+                with open(path, 'rb') as original, open(os.path.join(out, os.path.basename(path)), 'rb') as decoded:
+                    self.assertEqual(decoded.read(), original.read())
+
+
+class Base64IngestTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.media = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage', MEDIA_ROOT=self.media.name,
+        )
+        self.settings_override.enable()
+        self.addCleanup(self.media.cleanup)
+        self.addCleanup(self.settings_override.disable)
+        self.add_rows(1)
+        self.content = os.urandom(200 * 1024)
+
+    def post(self, body):
+        return self.client.post('/documents/base64/', body, content_type='application/json')
+
+    def test_document_is_stored_from_base64(self):
+        # Partners wrap lines and escape slashes.
+        encoded = base64.encodebytes(self.content).decode().replace('/', '\\/')
+        body = json.dumps({
+            'property': str(self.property.pk), 'document_type': 'title_deed', 'file_name': 'plan.pdf',
+        })[:-1] + ', "content": "' + encoded.replace('\n', '\\n') + '"}'
+        response = self.post(body)
+        self.assertEqual(response.status_code, 201, response.content)
+        document = Document.objects.get(pk=response.json()['id'])
+        self.assertEqual(document.document_hash, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(document.document_file.read(), self.content)
+        self.assertEqual(ContentBlob.objects.get(sha256=document.document_hash).content_type, 'application/pdf')
+
+    def test_data_uri(self):
+        uri = 'data:image/png;base64,' + base64.b64encode(self.content).decode()
+        response = self.post(json.dumps({
+            'content': uri, 'property': str(self.property.pk), 'document_type': 'other',
+        }))
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(ContentBlob.objects.get(sha256=response.json()['document_hash']).content_type, 'image/png')
+
+    def test_rejected_bodies_leave_no_files(self):
+        good = base64.b64encode(self.content).decode()
+        bodies = [
+            {'property': str(self.property.pk), 'document_type': 'other', 'content': good[:-1]},
+            {'property': str(self.property.pk), 'document_type': 'other', 'content': good[:100] + '!' + good[100:]},
+            {'property': str(self.property.pk), 'document_type': 'other', 'content': good, 'document_hash': 'wrong'},
+        ]
+        for body in bodies:
+            with self.subTest(body=body.get('document_hash')):
+                self.assertEqual(self.post(json.dumps(body)).status_code, 400)
+        incoming = os.path.join(self.media.name, 'blobs', 'incoming')
+        self.assertEqual(os.listdir(incoming) if os.path.isdir(incoming) else [], [])
+        self.assertFalse(Document.objects.exclude(pk=self.document.pk).exists())
+
+
+class SignatureVerificationTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_rows(1)
+        self.message = self.document.document_hash.encode()
+
+    def post(self, public_key, signature):
+        self.client.force_authenticate(self.buyer)
+        return self.client.post('/digital-signatures/', {
+            'document': str(self.document.pk), 'signature_value': signature,
+            'signer_public_key': public_key, 'document_hash_at_signing': self.document.document_hash,
+        }, format='json')
+
+    def test_ed25519(self):
+        key = ed25519.Ed25519PrivateKey.generate()
+        public_key = key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw).hex()
+        response = self.post(public_key, base64.b64encode(key.sign(self.message)).decode())
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertTrue(response.json()['verified'])
+
+        forged = self.post(public_key, base64.b64encode(key.sign(b'another document')).decode())
+        self.assertEqual(forged.status_code, 201)
+        self.assertFalse(forged.json()['verified'])
+        self.assertFalse(DigitalSignature.objects.get(pk=forged.json()['id']).verified)
+
+    def test_secp256k1(self):
+        key = ec.generate_private_key(ec.SECP256K1())
+        der = key.sign(self.message, ec.ECDSA(hashes.SHA256()))
+        r, s = decode_dss_signature(der)
+        compact = (r.to_bytes(32, 'big') + s.to_bytes(32, 'big')).hex()
+        for point in (serialization.PublicFormat.CompressedPoint, serialization.PublicFormat.UncompressedPoint):
+            public_key = key.public_key().public_bytes(serialization.Encoding.X962, point).hex()
+            self.assertTrue(verify(public_key, der.hex(), self.message))
+            self.assertTrue(verify(public_key, compact, self.message))
+            self.assertFalse(verify(public_key, compact, b'tampered'))
+        pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ).decode()
+        self.assertTrue(self.post(pem, base64.b64encode(der).decode()).json()['verified'])
+
+    def test_malformed_input_is_unverified(self):
+        self.assertFalse(verify('pk', 'sig-0', 'hash-0'))
+        self.assertFalse(verify('00' * 32, 'not base64!', 'hash-0'))
+        self.assertFalse(self.post('00' * 40, 'AAAA').json()['verified'])
+
+    def test_keys_are_parsed_once(self):
+        key = ed25519.Ed25519PrivateKey.generate()
+        public_key = key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw).hex()
+        signature = key.sign(self.message).hex()
+        verify(public_key, signature, self.message)
+        hits = load_public_key.cache_info().hits
+        for _ in range(5):
+            self.assertTrue(verify(public_key, signature, self.message))
+        self.assertEqual(load_public_key.cache_info().hits, hits + 5)
+
+    def test_backfill_command(self):
+        key = ed25519.Ed25519PrivateKey.generate()
+        public_key = key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw).hex()
+        # Recorded before verification existed.
+        DigitalSignature.objects.filter(pk=self.signature.pk).update(
+            signer_public_key=public_key, signature_value=key.sign(self.message).hex()
+        )
+        SigningRequirement.objects.create(transaction=self.transaction, document=self.document, party=self.buyer)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.signatures_collected, 0)
+
+        out = io.StringIO()
+        call_command('verify_signatures', stdout=out)
+        self.assertIn('Checked 1 signature(s), updated 1.', out.getvalue())
+        self.signature.refresh_from_db()
+        self.assertTrue(self.signature.verified)
+        event = AuditEvent.objects.order_by('-sequence').first()
+        self.assertEqual((event.action, event.object_id, event.data['verified']), ('update', str(self.signature.pk), True))
+        self.assertEqual(len(list(audit.verify_chain())), 1)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.signatures_collected, 1)
+
+        out = io.StringIO()
+        call_command('verify_signatures', stdout=out)
+        self.assertIn('Checked 0 signature(s)', out.getvalue())
+        call_command('verify_signatures', '--all', stdout=out)
+        self.assertIn('Checked 1 signature(s), updated 0.', out.getvalue())
+
+
+class BulkVerificationTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_rows(2)
+        key = ed25519.Ed25519PrivateKey.generate()
+        public_key = key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw).hex()
+        self.signatures = [
+            DigitalSignature.objects.create(
+                document=self.document, signer=self.buyer, signer_public_key=public_key,
+                signature_value=key.sign(message.encode()).hex(), document_hash_at_signing=self.document.document_hash,
+                verified=True,
+            )
+            for message in (self.document.document_hash, 'hash-1 ', self.document.document_hash + 'x')
+        ]
+        self.document.document_hash = 'hash-1-revised'
+        self.document.save()
+
+    def verify(self, body):
+        return self.client.post('/digital-signatures/verify/', body, format='json')
+
+    def test_results_and_summary(self):
+        response = self.verify({'property': str(self.property.pk)})
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        # The fixture's placeholder signature plus the three above, all on the revised document.
+        self.assertEqual([row['verified'] for row in body['results']], [False, True, False, False])
+        self.assertEqual(body['summary'], {
+            'total': 4, 'valid': 0, 'invalid_signature': 3, 'hash_mismatch': 4, 'differs_from_record': 2,
+        })
+
+        ids = [str(self.signatures[0].pk), str(uuid.uuid4())]
+        body = self.verify({'ids': ids}).json()
+        self.assertEqual(body['summary']['not_found'], ids[1:])
+        self.assertTrue(body['results'][0]['verified'])
+
+    def test_process_pool(self):
+        with mock.patch.object(signatures, 'VERIFY_INLINE_MAX', 0), mock.patch.object(signatures, 'VERIFY_PROCESSES', 2):
+            self.addCleanup(lambda: signatures._pool and signatures._discard_pool(signatures._pool))
+            body = self.verify({'document': str(self.document.pk)}).json()
+        self.assertEqual([row['verified'] for row in body['results']], [False, True, False, False])
+
+    def test_idle_pool_is_stopped(self):
+        items = [('00' * 32, 'AAAA', 'hash-0')] * 3
+        patches = (
+            mock.patch.object(signatures, 'VERIFY_INLINE_MAX', 0), mock.patch.object(signatures, 'VERIFY_PROCESSES', 2),
+            mock.patch.object(signatures, 'VERIFY_POOL_IDLE', 0.2),
+        )
+        with patches[0], patches[1], patches[2]:
+            self.addCleanup(lambda: signatures._pool and signatures._discard_pool(signatures._pool))
+            self.assertEqual(signatures.verify_parallel(items), [False] * 3)
+            pool = signatures._pool
+            self.assertIsNotNone(pool)
+            signatures._idle_timer.join(5)
+        self.assertIsNone(signatures._pool)
+        self.assertTrue(pool._shutdown_thread)
+
+    def test_validation_and_permissions(self):
+        self.assertEqual(self.verify({}).status_code, 400)
+        self.assertEqual(self.verify({'document': str(self.document.pk), 'property': str(self.property.pk)}).status_code, 400)
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.verify({'document': str(self.document.pk)}).status_code, 403)
+
+
+def publish_root(batch):
+    """ANCHOR_PUBLISHER used by AnchoringTests."""
+    return '0x' + hashlib.sha256(batch.merkle_root.encode()).hexdigest()
+
+
+class AnchoringTests(APIFixtureMixin, TestCase):
+
+    def test_merkle_proofs(self):
+        for count in (1, 2, 3, 5, 8, 13):
+            leaves = [anchoring.document_leaf(i, f'hash-{i}') for i in range(count)]
+            root, proofs = anchoring.build_tree(leaves)
+            for i, leaf in enumerate(leaves):
+                self.assertTrue(anchoring.verify_proof(leaf, i, count, proofs[i], root))
+                if count > 1:
+                    self.assertFalse(anchoring.verify_proof(leaves[(i + 1) % count], i, count, proofs[i], root))
+            self.assertFalse(anchoring.verify_proof(leaves[0], 0, count, proofs[0] + b'\0' * 32, root))
+
+    def test_anchor_batch_command(self):
+        self.add_rows(3)
+        out = io.StringIO()
+        call_command('anchor_batch', '--max-leaves', '4', stdout=out)
+        self.assertIn('Anchored 4 row(s)', out.getvalue())
+        call_command('anchor_batch', stdout=out)
+        call_command('anchor_batch', stdout=out)
+        self.assertIn('Nothing to anchor.', out.getvalue())
+        self.assertEqual(AnchorBatch.objects.count(), 2)
+        self.assertEqual(AnchorProof.objects.count(), 6)
+        for batch in AnchorBatch.objects.all():
+            root = bytes.fromhex(batch.merkle_root)
+            for proof in batch.proofs.all():
+                self.assertTrue(anchoring.verify_proof(
+                    bytes.fromhex(proof.leaf), proof.leaf_index, batch.leaf_count, bytes(proof.siblings), root
+                ))
+        self.assertFalse(AnchorBatch.objects.exclude(blockchain_transaction_hash=None).exists())
+
+        with override_settings(ANCHOR_PUBLISHER='api_APP.tests.publish_root'):
+            call_command('anchor_batch', stdout=out)
+        self.assertIn('Published 2 root(s).', out.getvalue())
+        self.assertFalse(AnchorBatch.objects.filter(anchored_at=None).exists())
+
+    @override_settings(ANCHOR_PUBLISHER='api_APP.tests.publish_root')
+    def test_proof_endpoint(self):
+        self.add_rows(2)
+        url = f'/documents/{self.document.pk}/anchor-proof/'
+        self.assertEqual(self.client.get(url).status_code, 404)
+        call_command('anchor_batch', stdout=io.StringIO())
+
+        body = self.client.get(url).json()
+        batch = AnchorBatch.objects.get()
+        self.assertEqual(body['leaf_count'], 4)
+        self.assertEqual(body['merkle_root'], batch.merkle_root)
+        self.assertEqual(body['blockchain_transaction_hash'], publish_root(batch))
+        self.assertTrue(body['valid'])
+        self.assertTrue(body['matches_current'])
+        # The client-side check the endpoint documents.
+        node = anchoring.document_leaf(self.document.pk, self.document.document_hash)
+        self.assertTrue(anchoring.verify_proof(
+            node, body['leaf_index'], body['leaf_count'], bytes.fromhex(''.join(body['siblings'])),
+            bytes.fromhex(body['merkle_root']),
+        ))
+
+        self.document.document_hash = 'hash-1-revised'
+        self.document.save()
+        self.assertFalse(self.client.get(url).json()['matches_current'])
+        body = self.client.get(f'/digital-signatures/{self.signature.pk}/anchor-proof/').json()
+        self.assertEqual((body['kind'], body['matches_current']), ('signature', True))
+
+    def test_changed_rows_are_anchored_again(self):
+        self.add_rows(2)
+        call_command('anchor_batch', stdout=io.StringIO())
+        first = AnchorProof.objects.get(kind='document', object_id=self.document.pk)
+
+        self.document.document_hash = 'hash-1-revised'
+        self.document.save()
+        self.assertEqual(anchoring.unanchored_rows(), [
+            ('document', self.document.pk, anchoring.document_leaf(self.document.pk, 'hash-1-revised')),
+        ])
+        out = io.StringIO()
+        call_command('anchor_batch', stdout=out)
+        self.assertIn('Anchored 1 row(s)', out.getvalue())
+
+        url = f'/documents/{self.document.pk}/anchor-proof/'
+        body = self.client.get(url).json()
+        self.assertEqual((body['valid'], body['matches_current']), (True, True))
+        self.assertNotEqual(body['batch'], first.batch_id)
+        # The proof of the earlier contents is kept, and a revert needs no new batch.
+        self.document.document_hash = 'hash-1'
+        self.document.save()
+        self.assertEqual(anchoring.unanchored_rows(), [])
+        self.assertEqual(self.client.get(url).json()['batch'], first.batch_id)
+
+    def test_overlapping_runs_anchor_each_leaf_once(self):
+        self.add_rows(2)
+        stale = anchoring.unanchored_rows()
+        # Another run anchors the same rows after this one scanned them.
+        anchoring.anchor_pending()
+        with mock.patch.object(anchoring, 'unanchored_rows', return_value=stale):
+            self.assertIsNone(anchoring.anchor_pending())
+        self.add_rows(1, offset=2)
+        with mock.patch.object(anchoring, 'unanchored_rows', return_value=stale + anchoring.unanchored_rows()):
+            batch = anchoring.anchor_pending()
+        self.assertEqual(batch.leaf_count, 2)
+        self.assertEqual(AnchorProof.objects.count(), 6)
+
+
+class AuditLogTests(APIFixtureMixin, TestCase):
+
+    def verify(self, *args):
+        out = io.StringIO()
+        call_command('verify_audit_log', *args, stdout=out)
+        return out.getvalue()
+
+    def test_changes_are_chained(self):
+        self.add_rows(2)
+        self.transaction.status = 'signed'
+        self.transaction.save()
+        self.signature.delete()
+
+        events = list(AuditEvent.objects.order_by('sequence'))
+        self.assertEqual([event.sequence for event in events], [1, 2, 3, 4, 5, 6])
+        self.assertEqual(
+            [(event.action, event.model) for event in events[-2:]],
+            [('update', 'api_APP.transaction'), ('delete', 'api_APP.digitalsignature')],
+        )
+        self.assertEqual(events[-2].data['status'], 'signed')
+        self.assertEqual(events[0].prev_hash, audit.GENESIS_HASH)
+        for previous, event in zip(events, events[1:]):
+            self.assertEqual(event.prev_hash, previous.entry_hash)
+        with self.assertRaises(ValueError):
+            events[0].save()
+        with self.assertRaises(ValueError):
+            events[0].delete()
+
+    def test_incremental_verification(self):
+        self.add_rows(3)
+        self.assertIn('Verified 6 event(s), #1 to #6.', self.verify('--checkpoint-every', '4', '--chunk-size', '2'))
+        self.assertEqual(list(AuditCheckpoint.objects.order_by('sequence').values_list('sequence', flat=True)), [4, 6])
+        self.assertIn('No new events since #6.', self.verify())
+        self.add_rows(1, offset=3)
+        self.assertIn('Verified 2 event(s), #7 to #8.', self.verify())
+
+    def test_tampering_is_detected(self):
+        self.add_rows(3)
+        self.verify()
+        AuditEvent.objects.filter(sequence=3).update(data={'status': 'completed'})
+        # Already verified history is only re-hashed on request.
+        self.assertIn('No new events', self.verify())
+        with self.assertRaisesMessage(CommandError, 'broken at #3: contents do not match'):
+            self.verify('--full')
+
+        AuditEvent.objects.filter(sequence=6).update(object_id='forged')
+        with self.assertRaisesMessage(CommandError, 'broken at #6: checkpointed entry was modified'):
+            self.verify()
+
+    def test_removed_entry_is_detected(self):
+        self.add_rows(3)
+        AuditEvent.objects.filter(sequence=4).delete()
+        with self.assertRaisesMessage(CommandError, 'broken at #4: entry is missing (events up to #3 are intact)'):
+            self.verify('--chunk-size', '3')
+        self.assertFalse(AuditCheckpoint.objects.exists())
+
+
+class BatchSigningTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_rows(3)
+        self.documents = list(Document.objects.order_by('document_hash'))
+        self.key = ed25519.Ed25519PrivateKey.generate()
+        self.public_key = self.key.public_key().public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        ).hex()
+
+    def item(self, document, signed_hash=None, signature=None):
+        signed_hash = signed_hash or document.document_hash
+        return {
+            'document': str(document.pk), 'signer_public_key': self.public_key,
+            'signature_value': signature or self.key.sign(signed_hash.encode()).hex(),
+            'document_hash_at_signing': signed_hash,
+        }
+
+    def sign(self, items):
+        return self.client.post('/digital-signatures/batch/', {'signatures': items}, format='json')
+
+    def test_per_item_status(self):
+        first, second, third = self.documents
+        existing = DigitalSignature.objects.create(document=third, signer=self.admin, **{
+            key: value for key, value in self.item(third).items() if key != 'document'
+        })
+        missing = self.item(first)
+        del missing['signature_value']
+        items = [
+            self.item(first), self.item(second, signature='00' * 64), self.item(third), self.item(first),
+            self.item(second, signed_hash='stale'), {**self.item(first), 'document': str(uuid.uuid4())}, missing,
+        ]
+        response = self.sign(items)
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual([result['status'] for result in body['results']], [
+            'created', 'created', 'already_signed', 'duplicate', 'hash_mismatch', 'document_not_found', 'invalid',
+        ])
+        self.assertEqual([result.get('verified') for result in body['results'][:2]], [True, False])
+        self.assertEqual(body['results'][2]['id'], str(existing.pk))
+        self.assertIn('signature_value', body['results'][6]['errors'])
+        self.assertEqual(body['summary'], {
+            'total': 7, 'created': 2, 'already_signed': 1, 'duplicate': 1, 'hash_mismatch': 1,
+            'document_not_found': 1, 'invalid': 1,
+        })
+        self.assertEqual(DigitalSignature.objects.filter(signer=self.admin).count(), 3)
+        # Rows saved without signals are still in the audit log, and the chain holds.
+        logged = set(AuditEvent.objects.filter(action='create').values_list('object_id', flat=True))
+        self.assertTrue({result['id'] for result in body['results'][:2]} <= logged)
+        call_command('verify_audit_log', '--full', stdout=io.StringIO())
+
+        self.assertEqual(self.sign([]).status_code, 400)
+        self.assertEqual(self.client.post('/digital-signatures/batch/', {}, format='json').status_code, 400)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def count(items):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.sign(items).status_code, 200)
+            return len(queries)
+
+        small = count([self.item(self.documents[0])])
+        DigitalSignature.objects.filter(signer=self.admin).delete()
+        large = count([self.item(document, signature=f'{i:02x}' * 64) for i in range(10) for document in self.documents])
+        self.assertEqual(small, large)
+
+
+class SigningRequirementTests(APIFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.add_rows(2)
+        self.deed = self.document
+        self.agreement = Document.objects.create(
+            property=self.property, document_type='sale_agreement', document_file='legal_documents/sale.pdf',
+            document_hash='hash-sale', uploaded_by=self.property.current_owner
+        )
+        self.url = f'/transactions/{self.transaction.pk}/'
+
+    def require(self, body):
+        return self.client.post(self.url + 'signing-requirements/', body, format='json')
+
+    def sign(self, user, document, verified=True):
+        return DigitalSignature.objects.create(
+            document=document, signer=user, signature_value=f'sig-{user.pk}-{document.pk}-{verified}', signer_public_key='pk',
+            document_hash_at_signing=document.document_hash, verified=verified,
+        )
+
+    def assertProgress(self, required, collected):
+        self.transaction.refresh_from_db()
+        self.assertEqual((self.transaction.signatures_required, self.transaction.signatures_collected), (required, collected))
+        with self.assertNumQueries(1):
+            body = self.client.get(self.url + 'signing-status/').json()
+        self.assertEqual((body['required'], body['collected']), (required, collected))
+        return body
+
+    def test_progress_follows_signatures(self):
+        response = self.require([
+            {'document': str(self.deed.pk), 'party': self.buyer.pk},
+            {'document': str(self.agreement.pk), 'party': self.buyer.pk},
+            {'document': str(self.deed.pk), 'party': self.admin.pk},
+        ])
+        self.assertEqual(response.status_code, 201, response.content)
+        body = self.assertProgress(3, 0)
+        self.assertFalse(body['complete'])
+
+        self.sign(self.buyer, self.deed)
+        self.sign(self.buyer, self.agreement, verified=False)
+        self.assertProgress(3, 1)
+
+        key = ed25519.Ed25519PrivateKey.generate()
+        self.client.post('/digital-signatures/batch/', {'signatures': [{
+            'document': str(self.deed.pk), 'document_hash_at_signing': self.deed.document_hash,
+            'signer_public_key': key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw).hex(),
+            'signature_value': key.sign(self.deed.document_hash.encode()).hex(),
+        }]}, format='json')
+        body = self.assertProgress(3, 2)
+        self.assertEqual(
+            [(party['username'], [row['document_type'] for row in party['outstanding_documents']]) for party in body['parties']],
+            [('auditor', []), ('buyer', ['sale_agreement'])],
+        )
+
+        signature = self.sign(self.buyer, self.agreement)
+        self.assertTrue(self.assertProgress(3, 3)['complete'])
+        signature.delete()
+        self.assertProgress(3, 2)
+
+        # A new version of the deed needs new signatures.
+        self.deed.document_hash = 'hash-1-revised'
+        self.deed.save()
+        self.assertProgress(3, 0)
+
+        requirement = SigningRequirement.objects.get(document=self.agreement)
+        response = self.client.delete(f'{self.url}signing-requirements/{requirement.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertProgress(2, 0)
+
+    def test_requirement_validation(self):
+        other_document = Document.objects.get(document_hash='hash-0')
+        self.assertEqual(self.require({'document': str(other_document.pk), 'party': self.buyer.pk}).status_code, 400)
+        self.assertEqual(self.require({'document': str(self.deed.pk), 'party': self.buyer.pk}).status_code, 201)
+        self.assertEqual(self.require({'document': str(self.deed.pk), 'party': self.buyer.pk}).status_code, 400)
+
+        duplicated = {'document': str(self.agreement.pk), 'party': self.buyer.pk}
+        response = self.require([duplicated, duplicated])
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertFalse(SigningRequirement.objects.filter(document=self.agreement).exists())
+
+        outsider = User.objects.create_user(username='outsider', password='x')
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.require({'document': str(self.agreement.pk), 'party': self.buyer.pk}).status_code, 403)
+        self.assertEqual(self.client.get(f'/transactions/{uuid.uuid4()}/signing-status/').status_code, 404)
+
+    def test_concurrent_refreshes_count_once(self):
+        requirement = SigningRequirement.objects.create(transaction=self.transaction, document=self.deed, party=self.buyer)
+        # Verified without signals: the counter lags until the next refresh.
+        DigitalSignature.objects.filter(pk=self.sign(self.buyer, self.deed, verified=False).pk).update(verified=True)
+        self.transaction.refresh_from_db()
+        self.assertEqual(self.transaction.signatures_collected, 0)
+
+        # Another refresh completes between this one's read and its update.
+        original, raced = ValuesListIterable.__iter__, []
+
+        def racing(iterable):
+            rows = list(original(iterable))
+            if not raced:
+                raced.append(True)
+                signing.refresh(SigningRequirement.objects.filter(pk=requirement.pk))
+            return iter(rows)
+
+        with mock.patch.object(ValuesListIterable, '__iter__', racing):
+            signing.refresh(SigningRequirement.objects.filter(pk=requirement.pk))
+        self.assertTrue(raced)
+        self.assertProgress(1, 1)
@@ -0,0 +1,202 @@
+"""
+Single-pass uploads: hash files while they stream into storage.
+
+``StreamingHashUploadHandler`` takes over the multipart file fields named
+by a view. Each chunk is fed to SHA-256 (and optionally to the IPFS CID
+builder) and written directly to the file's final storage location, so
+there is no temporary copy and no second pass to verify the content. The
+view receives a ``StoredUploadedFile`` carrying the digests; models adopt
+its storage name instead of saving the bytes again.
+"""
+
+import functools
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers
+
+from .ipfs.cid import CIDBuilder
+
+
+class StoredUploadedFile(UploadedFile):
+    """
+    An upload already written to ``storage`` under ``stored_as``. Its content
+    is read back from storage only if something asks for it.
+    """
+
+    def __init__(self, storage, stored_as, name, content_type, size, charset,
+                 content_type_extra=None, sha256=None, ipfs_cid=None):
+        self.storage = storage
+        self.stored_as = stored_as
+        self.sha256 = sha256
+        self.ipfs_cid = ipfs_cid
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+
+    @property
+    def file(self):
+        if self._file is None:
+            self._file = self.storage.open(self.stored_as, 'rb')
+        return self._file
+
+    @file.setter
+    def file(self, value):
+        self._file = value
+
+    @property
+    def closed(self):
+        return self._file is None or self._file.closed
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+    def open(self, mode=None):
+        if self._file is None or self._file.closed:
+            self._file = self.storage.open(self.stored_as, mode or 'rb')
+        else:
+            self._file.seek(0)
+        return self
+
+    def discard(self):
+        self.close()
+        self.storage.delete(self.stored_as)
+
+
+def open_for_writing(storage, name, max_length=None):
+    """
+    Reserve an available name in ``storage`` and open it for writing. Local
+    storage is opened exclusively so two uploads can't claim the same name;
+    remote backends (S3) stream the writes as a multipart upload.
+    """
+    while True:
+        name = storage.get_available_name(name, max_length=max_length)
+        if not isinstance(storage, FileSystemStorage):
+            return name, storage.open(name, 'wb')
+        path = storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            handle = open(path, 'xb')
+        except FileExistsError:
+            continue
+        if storage.file_permissions_mode is not None:
+            os.chmod(path, storage.file_permissions_mode)
+        return name, handle
+
+
+class StoredFileWriter:
+    """
+    Writes one file for the model ``field`` to its storage, hashing it (and
+    optionally building its IPFS CID) on the way.
+    """
+
+    def __init__(self, field, file_name, with_cid=False):
+        self.storage = field.storage
+        if hasattr(self.storage, 'commit_incoming'):
+            # Content-addressed: the name is only known once the digest is.
+            self.stored_as, self.handle = self.storage.open_incoming()
+        else:
+            name = field.generate_filename(None, file_name)
+            self.stored_as, self.handle = open_for_writing(self.storage, name, field.max_length)
+        self.digest = hashlib.sha256()
+        self.cid = CIDBuilder(version=getattr(settings, 'IPFS_CID_VERSION', 0)) if with_cid else None
+
+    def write(self, data):
+        self.digest.update(data)
+        if self.cid is not None:
+            self.cid.update(data)
+        self.handle.write(data)
+
+    def finish(self, file_name, content_type, size, charset=None, content_type_extra=None):
+        """Close the file and return it as a ``StoredUploadedFile``."""
+        self.handle.close()
+        sha256 = self.digest.hexdigest()
+        if hasattr(self.storage, 'commit_incoming'):
+            self.stored_as = self.storage.commit_incoming(self.stored_as, sha256, size, content_type or '')
+        return StoredUploadedFile(
+            self.storage, self.stored_as, file_name, content_type, size, charset, content_type_extra,
+            sha256=sha256, ipfs_cid=self.cid.cid() if self.cid is not None else None,
+        )
+
+    def abort(self):
+        self.handle.close()
+        self.storage.delete(self.stored_as)
+
+
+class StreamingHashUploadHandler(FileUploadHandler):
+    """
+    Writes the given model file fields straight to storage while hashing them.
+    Other file fields fall through to Django's default handlers.
+    """
+
+    def __init__(self, request=None, fields=(), cid_fields=()):
+        super().__init__(request)
+        self.fields = {field.name: field for field in fields}
+        self.cid_fields = set(cid_fields)
+        self.writer = None
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        field = self.fields.get(field_name)
+        if field is None:
+            return
+        self.writer = StoredFileWriter(field, file_name, with_cid=field_name in self.cid_fields)
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.writer is None:
+            return raw_data
+        self.writer.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self.writer is None:
+            return None
+        upload = self.writer.finish(
+            self.file_name, self.content_type, file_size, self.charset, self.content_type_extra
+        )
+        self.writer = None
+        return upload
+
+    def upload_interrupted(self):
+        if self.writer is not None:
+            self.writer.abort()
+            self.writer = None
+
+
+def stream_uploads(*fields, cid_fields=()):
+    """
+    View decorator installing ``StreamingHashUploadHandler`` for ``fields``
+    (model FileFields whose names match the form fields). Place it directly
+    above ``@api_view`` so the handler is in place before DRF reads the body.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(request, *args, **kwargs):
+            request.upload_handlers.insert(0, StreamingHashUploadHandler(request, fields, cid_fields))
+            return view(request, *args, **kwargs)
+        return wrapped
+    return decorator
+
+
+def adopt_stored_upload(field_file):
+    """
+    Point ``field_file`` at a ``StoredUploadedFile`` it was assigned instead
+    of letting the model field write the same bytes again. Returns the upload,
+    or ``None`` for anything else.
+    """
+    upload = getattr(field_file, '_file', None)
+    if field_file._committed or not isinstance(upload, StoredUploadedFile):
+        return None
+    field_file.name = upload.stored_as
+    field_file._committed = True
+    return upload
+
+
+def discard_stored_uploads(files):
+    """Delete streamed uploads belonging to a request that was rejected."""
+    for upload in files.values():
+        if isinstance(upload, StoredUploadedFile):
+            upload.discard()
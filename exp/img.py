@@ -1,19 +1,22 @@
-import base64
+import os
+import sys
+
+# Run as a script from anywhere: make the project importable.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_APP.base64stream import decode_file, encode_file
 
 def image_to_bytes_and_save(image_path, output_file_path):
     """
-    Converts an image to a base64 encoded byte string and saves it to a file.
+    Converts an image to a base64 encoded byte string and saves it to a file,
+    a chunk at a time (see api_APP/base64stream.py).
 
     Args:
         image_path (str): The path to the input image file.
         output_file_path (str): The path where the byte file will be saved.
     """
     try:
-        with open(image_path, "rb") as image_file:
-            encoded_string = base64.b64encode(image_file.read())
-
-        with open(output_file_path, "wb") as output_file:
-            output_file.write(encoded_string)
+        encode_file(image_path, output_file_path)
         print(f"Image '{image_path}' successfully converted to bytes and saved to '{output_file_path}'.")
     except FileNotFoundError:
         print(f"Error: Image file not found at '{image_path}'")
@@ -22,20 +25,15 @@ def image_to_bytes_and_save(image_path, output_file_path):
 
 def bytes_to_image(input_file_path, output_image_path):
     """
-    Reads a base64 encoded byte string from a file and converts it back to an image.
+    Reads a base64 encoded byte string from a file and converts it back to an image,
+    a chunk at a time.
 
     Args:
         input_file_path (str): The path to the file containing the byte string.
         output_image_path (str): The path where the recovered image will be saved.
     """
     try:
-        with open(input_file_path, "rb") as input_file:
-            encoded_string = input_file.read()
-        
-        decoded_image_data = base64.b64decode(encoded_string)
-
-        with open(output_image_path, "wb") as output_image_file:
-            output_image_file.write(decoded_image_data)
+        decode_file(input_file_path, output_image_path)
         print(f"Bytes from '{input_file_path}' successfully converted back to image and saved to '{output_image_path}'.")
     except FileNotFoundError:
         print(f"Error: Byte file not found at '{input_file_path}'")